@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+"""
+    Benchmark of joining contacts with topology. Synthetic topology of
+    service endpoints, sites and service groups is generated together with
+    contacts for part of them, and contacts are attached both with the
+    previous per entity lookup and with the ContactsIndex based mesh step.
+    Service groups have their contacts given as strings, as GOCDB reports
+    them, with comma separated lists and placeholders without email.
+
+    Run from the repository root:
+
+        python benchmarks/bench_contacts_mesh.py [--endpoints 200000] [--contacts 50000]
+"""
+
+import argparse
+import copy
+import gc
+import os
+import time
+
+from argo_connectors.log import Logger
+from argo_connectors.mesh.contacts import attach_contacts_topodata
+
+
+def filter_dups_noemails_previous(contact_list):
+    only_emails = list()
+    no_dups = list()
+    visited = set()
+    for contact in contact_list:
+        if contact in visited:
+            continue
+        else:
+            no_dups.append(contact)
+        visited.add(contact)
+
+    for contact in no_dups:
+        if '@' not in contact:
+            continue
+
+        if ',' in contact:
+            only_emails = only_emails + contact.split(',')
+        elif ';' in contact:
+            only_emails = only_emails + contact.split(';')
+        else:
+            only_emails.append(contact)
+
+    return only_emails
+
+
+def attach_contacts_previous(contacts, topodata, notification_flag=None):
+    updated_topodata = list()
+
+    for entity in topodata:
+        if 'subgroup' in entity:
+            if entity['subgroup'] in contacts:
+                emails = list()
+                for contact in contacts[entity['subgroup']]:
+                    if isinstance(contact, str):
+                        filtered_emails = filter_dups_noemails_previous(contacts[entity['subgroup']])
+                        if filtered_emails:
+                            entity.update(notifications={'contacts': filtered_emails,
+                                                         'enabled': True})
+                            break
+                    else:
+                        emails.append(contact['email'])
+                if emails:
+                    filtered_emails = filter_dups_noemails_previous(emails)
+                    if filtered_emails:
+                        entity.update(notifications={'contacts': filtered_emails,
+                                                     'enabled': True})
+        else:
+            contact_key = None
+            lookup_key = entity['hostname'].replace('_', '+', 1)
+            if lookup_key in contacts:
+                contact_key = lookup_key
+            else:
+                lookup_key = '{}+{}'.format(entity['hostname'], entity['service'])
+                if lookup_key in contacts:
+                    contact_key = lookup_key
+            if contact_key:
+                entity.update(notifications={'contacts': contacts[contact_key],
+                                             'enabled': True})
+
+        updated_topodata.append(entity)
+
+    return updated_topodata
+
+
+def build_topology(nendpoints, ncontacts):
+    nsites = max(nendpoints // 20, 1)
+    nservicegroups = max(nsites // 5, 1)
+    group_endpoints, group_groups, servicegroups = list(), list(), list()
+    endpoints_contacts, sites_contacts, servicegroups_contacts = dict(), dict(), dict()
+
+    for i in range(nendpoints):
+        hostname = 'host{}.site{}.example.org'.format(i, i % nsites)
+        service = 'service{}'.format(i % 7)
+        group_endpoints.append({'group': 'SITE{}'.format(i % nsites),
+                                'hostname': hostname, 'service': service,
+                                'type': 'SITES', 'tags': {'scope': 'EGI'}})
+        if i % max(nendpoints // ncontacts, 1) == 0 and len(endpoints_contacts) < ncontacts:
+            endpoints_contacts['{}+{}'.format(hostname, service)] = ['admin{}@example.org'.format(i)]
+
+    for i in range(nsites):
+        site = 'SITE{}'.format(i)
+        group_groups.append({'group': 'NGI{}'.format(i % 40), 'subgroup': site,
+                             'type': 'NGI', 'tags': {'scope': 'EGI'}})
+        sites_contacts[site] = [
+            {'email': 'admin{}@example.org'.format(j % 5)} for j in range(10)
+        ] + [{'email': ';'.join('ops{}@example.org'.format(j) for j in range(5))}]
+
+    for i in range(nservicegroups):
+        servicegroup = 'SG{}'.format(i)
+        servicegroups.append({'group': 'PROJECT{}'.format(i % 10), 'subgroup': servicegroup,
+                              'type': 'PROJECT', 'tags': {'scope': 'EGI'}})
+        if i % 10 == 0:
+            servicegroups_contacts[servicegroup] = ['N/A'] * 40
+        else:
+            servicegroups_contacts[servicegroup] = [
+                ','.join('vo{}@example.org'.format(k) for k in range(j, j + 3))
+                for j in range(40)
+            ]
+
+    return (group_groups, group_endpoints, servicegroups, sites_contacts,
+            endpoints_contacts, servicegroups_contacts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark joining contacts with topology')
+    parser.add_argument('--endpoints', dest='endpoints', type=int, default=200000,
+                        help='number of service endpoints')
+    parser.add_argument('--contacts', dest='contacts', type=int, default=50000,
+                        help='number of service endpoints with contacts')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=7,
+                        help='number of runs, best one is reported')
+    args = parser.parse_args()
+
+    logger = Logger(os.path.basename(__file__))
+    logger.customer = 'BENCH'
+
+    (group_groups, group_endpoints, servicegroups, sites_contacts,
+     endpoints_contacts, servicegroups_contacts) = build_topology(args.endpoints, args.contacts)
+    print('Topology: {} endpoints, {} sites, {} service groups, {} endpoint contacts'.format(
+        len(group_endpoints), len(group_groups), len(servicegroups), len(endpoints_contacts)))
+
+    def run(attach, contacts, topology):
+        topology = copy.deepcopy(topology)
+        gc.disable()
+        start = time.perf_counter()
+        attach(contacts, topology)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        return elapsed
+
+    def previous(contacts, topology):
+        attach_contacts_previous(contacts, topology)
+
+    def indexed(contacts, topology):
+        attach_contacts_topodata(logger, contacts, topology)
+
+    joins = [('sites', sites_contacts, group_groups),
+             ('service groups', servicegroups_contacts, servicegroups),
+             ('endpoints', endpoints_contacts, group_endpoints)]
+
+    # runs are interleaved so that both variants see the same noise, best
+    # run of every join is reported
+    old, new = dict(), dict()
+    for _ in range(args.repeat):
+        for name, contacts, topology in joins:
+            old[name] = min(old.get(name, float('inf')), run(previous, contacts, topology))
+            new[name] = min(new.get(name, float('inf')), run(indexed, contacts, topology))
+
+    for name, _, _ in joins:
+        print('{:<16} per entity lookup: {:.3f}s  contacts index: {:.3f}s ({:.1f}x)'.format(
+            name, old[name], new[name], old[name] / new[name]))
+    print('{:<16} per entity lookup: {:.3f}s  contacts index: {:.3f}s ({:.1f}x)'.format(
+        'total', sum(old.values()), sum(new.values()),
+        sum(old.values()) / sum(new.values())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+"""
+    Micro-benchmark of GOCDB service endpoint field extraction. Records from
+    tests/sample-service_endpoint.xml are replicated to the requested number
+    and fields are extracted both with per-field descendant xpath() search
+    and with single pass dispatch over direct children.
+
+    Run from the repository root:
+
+        python benchmarks/bench_gocdb_parse.py [--records 100000]
+"""
+
+import argparse
+import copy
+import os
+import time
+
+from lxml import etree
+
+from argo_connectors.log import Logger
+from argo_connectors.parse.base import ParseHelpers
+from argo_connectors.parse.gocdb_topology import ParseServiceEndpoints
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests',
+                      'sample-service_endpoint.xml')
+
+
+def scale_feed(records):
+    sample = etree.parse(SAMPLE).getroot()
+    services = list(sample)
+    root = etree.Element('results')
+    for i in range(records):
+        service = copy.deepcopy(services[i % len(services)])
+        key = '{}G0'.format(i)
+        service.attrib['PRIMARY_KEY'] = key
+        service.find('PRIMARY_KEY').text = key
+        root.append(service)
+
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8')
+
+
+def extract_xpath(root, helpers):
+    fields = [('HOSTNAME', 'hostname'), ('SERVICE_TYPE', 'type'),
+              ('HOSTDN', 'hostdn'), ('NODE_MONITORED', 'monitored'),
+              ('IN_PRODUCTION', 'production'), ('SITENAME', 'site'),
+              ('ROC_NAME', 'roc')]
+    for service in root:
+        record = dict()
+        for tag, field in fields:
+            for node in service.xpath('.//' + tag):
+                record[field] = helpers.parse_xmltext(node)
+        for node in service.xpath('.//EXTENSIONS'):
+            if node.getparent().tag == 'SERVICE_ENDPOINT':
+                record['extensions'] = node
+        record['endpoints'] = service.find('.//ENDPOINTS')
+
+
+def extract_dispatch(root, helpers):
+    fields = ParseServiceEndpoints.endpoint_fields
+    tags = ParseServiceEndpoints.endpoint_tags
+    for service in root:
+        record = dict()
+        children = helpers.find_children(service, tags)
+        for tag, field in fields:
+            if tag in children:
+                record[field] = helpers.parse_xmltext(children[tag])
+        record['extensions'] = children.get('EXTENSIONS')
+        record['endpoints'] = children.get('ENDPOINTS')
+
+
+def timeit(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark GOCDB service endpoints field extraction')
+    parser.add_argument('--records', dest='records', type=int, default=100000,
+                        help='number of service endpoints in scaled feed')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3,
+                        help='number of runs, best one is reported')
+    args = parser.parse_args()
+
+    logger = Logger(os.path.basename(__file__))
+    logger.customer = 'BENCH'
+    helpers = ParseHelpers(logger)
+
+    feed = scale_feed(args.records)
+    root = etree.fromstring(feed)
+    print('Feed: {} records, {:.1f} MB'.format(args.records, len(feed) / 1024 / 1024))
+
+    xpath = min(timeit(extract_xpath, root, helpers) for _ in range(args.repeat))
+    dispatch = min(timeit(extract_dispatch, root, helpers) for _ in range(args.repeat))
+    print('Field extraction xpath():   {:.3f}s'.format(xpath))
+    print('Field extraction dispatch:  {:.3f}s ({:.1f}x)'.format(dispatch, xpath / dispatch))
+
+    full = min(timeit(ParseServiceEndpoints, logger, feed, 'BENCH', False, True, True)
+               for _ in range(args.repeat))
+    print('ParseServiceEndpoints:      {:.3f}s'.format(full))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+"""
+    Benchmark of JSON backends available to jsoncodec. Provider and Agora
+    sample feeds from tests/ are replicated to production size and every
+    backend decodes them and encodes resulting topology back, both
+    compact as sent to WEB-API and indented as written to files.
+
+    Run from the repository root:
+
+        python benchmarks/bench_json_codec.py [--resources 5000]
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+
+from argo_connectors import jsoncodec
+
+TESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests')
+
+FEEDS = {
+    'provider-resources': 'sample-private-resource.json',
+    'provider-providers': 'sample-private-provider.json',
+    'agora-resources': 'agora_resource_sample.json',
+    'agora-providers': 'agora_provider_sample.json',
+}
+
+
+def scale_feed(filename, size):
+    with open(os.path.join(TESTS, filename), encoding='utf-8') as fp:
+        sample = json.load(fp)
+
+    records = sample['results'] if isinstance(sample, dict) else sample
+    scaled = list()
+    for i in range(size):
+        record = copy.deepcopy(records[i % len(records)])
+        record['id'] = '{}-{}'.format(record['id'], i)
+        scaled.append(record)
+
+    if isinstance(sample, dict):
+        sample.update(results=scaled, total=size, to=size)
+        return json.dumps(sample)
+
+    return json.dumps(scaled)
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        took = time.perf_counter() - start
+        best = took if best is None else min(best, took)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON backends on provider and Agora feeds')
+    parser.add_argument('--resources', dest='resources', type=int, default=5000,
+                        help='number of records in resources feeds')
+    parser.add_argument('--providers', dest='providers', type=int, default=500,
+                        help='number of records in providers feeds')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3,
+                        help='number of runs, best one is reported')
+    args = parser.parse_args()
+
+    feeds = dict()
+    for name, filename in FEEDS.items():
+        size = args.resources if name.endswith('resources') else args.providers
+        feeds[name] = scale_feed(filename, size)
+        print('{}: {} records, {:.1f} MB'.format(name, size, len(feeds[name]) / 2 ** 20))
+
+    backends = jsoncodec.available_backends()
+    baseline = dict()
+    print('{:<20} {:<8} {:>16} {:>16} {:>16}'.format('feed', 'backend', 'decode', 'encode', 'indent=4'))
+    try:
+        for name, feed in feeds.items():
+            data = json.loads(feed)
+            for backend in reversed(backends):
+                jsoncodec.set_backend(backend)
+                timings = (best_of(args.repeat, jsoncodec.loads, feed),
+                           best_of(args.repeat, jsoncodec.dumps, data),
+                           best_of(args.repeat, jsoncodec.dumps, data, 4))
+                if backend == 'json':
+                    baseline[name] = timings
+                print('{:<20} {:<8} {:>16} {:>16} {:>16}'.format(
+                    name, backend, *['{:.3f}s ({:.1f}x)'.format(t, b / t)
+                                     for t, b in zip(timings, baseline[name])]))
+    finally:
+        jsoncodec.set_backend()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+"""
+    Benchmark of building map of storage endpoints and VO paths from BDII
+    data. LDAP entries from tests/sample-bdii_sepaths.json are replicated
+    with distinct storage paths, so every storage endpoint ends up with
+    the requested number of VO paths, and map is built both with the
+    previous per entry rescan of endpoint paths and with
+    EndpointPathIndex.
+
+    Run from the repository root:
+
+        python benchmarks/bench_sepath_index.py [--paths 2000]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from bonsai import LDAPEntry
+
+from argo_connectors.log import Logger
+from argo_connectors.mesh.storage_element_path import build_endpoint_path_index, extract_value
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests',
+                      'sample-bdii_sepaths.json')
+
+
+def update_map_entry(endpoint, mapping, sepath, voname):
+    if endpoint not in mapping:
+        mapping[endpoint] = list()
+    mapping[endpoint].append({'voname': voname, 'GlueVOInfoPath': sepath})
+
+
+def ispath_already_added(endpoint, mapping, sepath):
+    if endpoint in mapping:
+        sepaths = set()
+        for entry in mapping[endpoint]:
+            sepaths.add(entry['GlueVOInfoPath'])
+        return sepath in sepaths
+
+    return False
+
+
+def build_map_previous(bdiidata):
+    mapping = dict()
+
+    for entry in bdiidata:
+        voname = extract_value('GlueVOInfoAccessControlBaseRule', entry)
+        if isinstance(voname, list):
+            voname = list(filter(lambda e: 'VO:' in e, voname))
+            if voname:
+                voname = voname[0].split(':')[1]
+            else:
+                continue
+
+        sepath = extract_value('GlueVOInfoPath', entry)
+        sepath = sepath[0] if isinstance(sepath, list) else None
+        endpoint = extract_value('GlueSEUniqueID', entry['dn'].rdns)
+
+        if (voname and sepath and endpoint
+                and not ispath_already_added(endpoint, mapping, sepath)):
+            for vo in voname.split(' '):
+                update_map_entry(endpoint, mapping, sepath, vo)
+
+    return mapping
+
+
+def scale_entries(paths):
+    with open(SAMPLE) as fh:
+        sample = json.load(fh)
+
+    entries = list()
+    for i in range(paths):
+        for record in sample:
+            entry = LDAPEntry(record['dn'])
+            for key, value in record.items():
+                if key == 'dn':
+                    continue
+                if key == 'GlueVOInfoPath':
+                    value = [(value[0] if isinstance(value, list) else value) + '/{}'.format(i)]
+                entry[key] = value
+            entries.append(entry)
+
+    return entries
+
+
+def timeit(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark map of storage endpoints and VO paths')
+    parser.add_argument('--paths', dest='paths', type=int, default=2000,
+                        help='number of VO paths per sample LDAP entry')
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3,
+                        help='number of runs, best one is reported')
+    args = parser.parse_args()
+
+    logger = Logger(os.path.basename(__file__))
+    logger.customer = 'BENCH'
+
+    entries = scale_entries(args.paths)
+    print('BDII data: {} LDAP entries'.format(len(entries)))
+
+    old = min(timeit(build_map_previous, entries) for _ in range(args.repeat))
+    new = min(timeit(build_endpoint_path_index, logger, entries) for _ in range(args.repeat))
+    print('Per entry rescan:    {:.3f}s'.format(old))
+    print('EndpointPathIndex:   {:.3f}s ({:.1f}x)'.format(new, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,7 @@ import asyncio
 from argo_connectors.exceptions import ConnectorHttpError, ConnectorParseError
 from argo_connectors.log import Logger
 from argo_connectors.tasks.flat_downtimes import TaskCsvDowntimes
-from argo_connectors.tasks.common import write_state
+from argo_connectors.tasks.common import run_task, write_state
 
 from argo_connectors.config import Global, CustomerConf
 
@@ -34,6 +34,8 @@ def main():
     parser.add_argument('-d', dest='date', nargs=1, metavar='YEAR-MONTH-DAY', required=True)
     parser.add_argument('-c', dest='custconf', nargs=1, metavar='customer.conf', help='path to customer configuration file', type=str, required=False)
     parser.add_argument('-g', dest='gloconf', nargs=1, metavar='global.conf', help='path to global configuration file', type=str, required=False)
+    parser.add_argument('--force-publish', dest='force_publish', action='store_true',
+                        help='send data to WEB-API even if it did not change since last publish', required=False)
     args = parser.parse_args()
 
     logger = Logger(os.path.basename(sys.argv[0]))
@@ -75,8 +77,8 @@ def main():
                                 webapi_opts, confcust,
                                 confcust.get_custname(cust), feed,
                                 current_date, uidservtype, args.date[0],
-                                timestamp)
-        loop.run_until_complete(task.run())
+                                timestamp, force_publish=args.force_publish)
+        loop.run_until_complete(run_task(task))
 
     except (ConnectorHttpError, ConnectorParseError, KeyboardInterrupt) as exc:
         logger.error(repr(exc))
@@ -8,6 +8,7 @@ import asyncio
 
 from argo_connectors.config import CustomerConf, Global
 from argo_connectors.log import Logger
+from argo_connectors.tasks.common import run_task
 from argo_connectors.tasks.webapi_metricprofile import TaskWebApiMetricProfile
 from argo_connectors.utils import date_check
 
@@ -48,7 +49,7 @@ def main():
             task = TaskWebApiMetricProfile(
                 loop, logger, sys.argv[0], globopts, cglob, confcust, cust, fixed_date
             )
-            loop.run_until_complete(task.run())
+            loop.run_until_complete(run_task(task))
 
         except (KeyboardInterrupt) as exc:
             logger.error(repr(exc))
@@ -10,7 +10,7 @@ import asyncio
 from argo_connectors.exceptions import ConnectorHttpError, ConnectorParseError
 from argo_connectors.log import Logger
 from argo_connectors.tasks.gocdb_servicetypes import TaskGocdbServiceTypes
-from argo_connectors.tasks.common import write_state
+from argo_connectors.tasks.common import run_task, write_state
 from argo_connectors.utils import date_check
 
 from argo_connectors.config import Global, CustomerConf
@@ -72,7 +72,7 @@ def main():
             loop, logger, sys.argv[0], globopts, auth_opts, webapi_opts,
             confcust, custname, feed, fixed_date, args.initsync
         )
-        loop.run_until_complete(task.run())
+        loop.run_until_complete(run_task(task))
 
     except (KeyboardInterrupt) as exc:
         logger.error(repr(exc))
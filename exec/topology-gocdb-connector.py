@@ -11,6 +11,7 @@ from argo_connectors.exceptions import ConnectorError, ConnectorParseError, Conn
 from argo_connectors.log import Logger
 from argo_connectors.tasks.common import write_state
 from argo_connectors.tasks.gocdb_topology import TaskGocdbTopology
+from argo_connectors.tasks.workers import shutdown_parse_pool
 from argo_connectors.utils import date_check
 
 logger = None
@@ -44,6 +45,15 @@ def get_bdii_opts(confcust):
         return None
 
 
+async def run_topology(task):
+    async with task.http_registry:
+        try:
+            await task.run()
+
+        finally:
+            await task.close_ldap_sessions()
+
+
 def main():
     global logger, globopts, confcust
     parser = argparse.ArgumentParser(description="""Fetch entities (ServiceGroups, Sites, Endpoints)
@@ -55,6 +65,8 @@ def main():
                         help='path to global configuration file', type=str, required=False)
     parser.add_argument('-d', dest='date', metavar='YEAR-MONTH-DAY',
                         help='write data for this date', type=str, required=False)
+    parser.add_argument('--force-publish', dest='force_publish', action='store_true',
+                        help='send data to WEB-API even if it did not change since last publish', required=False)
     args = parser.parse_args()
     group_endpoints, group_groups = [], []
     logger = Logger(os.path.basename(sys.argv[0]))
@@ -114,9 +126,10 @@ def main():
             loop, logger, sys.argv[0], SERVICE_ENDPOINTS_PI, SERVICE_GROUPS_PI,
             SITES_PI, globopts, auth_opts, webapi_opts, bdii_opts, confcust,
             custname, topofeed, topofetchtype, fixed_date, uidservendp,
-            pass_extensions, topofeedpaging, notiflag
+            pass_extensions, topofeedpaging, notiflag,
+            force_publish=args.force_publish
         )
-        loop.run_until_complete(task.run())
+        loop.run_until_complete(run_topology(task))
 
     except (ConnectorError, ConnectorParseError, ConnectorHttpError, KeyboardInterrupt) as exc:
         logger.error(repr(exc))
@@ -125,6 +138,7 @@ def main():
         )
 
     finally:
+        shutdown_parse_pool()
         loop.close()
 
 
@@ -9,7 +9,7 @@ import asyncio
 from argo_connectors.config import Global, CustomerConf
 from argo_connectors.exceptions import ConnectorHttpError, ConnectorParseError
 from argo_connectors.log import Logger
-from argo_connectors.tasks.common import write_state
+from argo_connectors.tasks.common import run_task, write_state
 from argo_connectors.tasks.flat_topology import TaskFlatTopology
 from argo_connectors.utils import date_check
 
@@ -37,6 +37,8 @@ def main():
     parser.add_argument('-c', dest='custconf', nargs=1, metavar='customer.conf', help='path to customer configuration file', type=str, required=False)
     parser.add_argument('-g', dest='gloconf', nargs=1, metavar='global.conf', help='path to global configuration file', type=str, required=False)
     parser.add_argument('-d', dest='date', metavar='YEAR-MONTH-DAY', help='write data for this date', type=str, required=False)
+    parser.add_argument('--force-publish', dest='force_publish', action='store_true',
+                        help='send data to WEB-API even if it did not change since last publish', required=False)
     args = parser.parse_args()
     group_endpoints, group_groups = list(), list()
     logger = Logger(os.path.basename(sys.argv[0]))
@@ -74,9 +76,10 @@ def main():
     try:
         task = TaskFlatTopology(
             loop, logger, sys.argv[0], globopts, webapi_opts, confcust,
-            custname, topofeed, fetchtype, fixed_date, uidservendp
+            custname, topofeed, fetchtype, fixed_date, uidservendp,
+            force_publish=args.force_publish
         )
-        loop.run_until_complete(task.run())
+        loop.run_until_complete(run_task(task))
 
     except (ConnectorHttpError, ConnectorParseError, KeyboardInterrupt) as exc:
         logger.error(repr(exc))
@@ -8,6 +8,7 @@ import asyncio
 
 from argo_connectors.exceptions import ConnectorHttpError, ConnectorParseError
 from argo_connectors.tasks.vapor_weights import TaskVaporWeights
+from argo_connectors.tasks.common import run_task
 from argo_connectors.tasks.common import write_weights_metricprofile_state as write_state
 from argo_connectors.log import Logger
 
@@ -65,7 +66,7 @@ def main():
             task = TaskVaporWeights(loop, logger, sys.argv[0], globopts,
                                     confcust, VAPORPI, jobcust, cglob,
                                     fixed_date)
-            loop.run_until_complete(task.run())
+            loop.run_until_complete(run_task(task))
 
         except (ConnectorHttpError, ConnectorParseError, KeyboardInterrupt) as exc:
             logger.error(repr(exc))
@@ -14,21 +14,35 @@ class Global(object):
     """
     # options common for all connectors
     conf_general = {'General': ['WriteJson',
-                                'PublishWebAPI', 'PassExtensions', 'CompressJson']}
+                                'PublishWebAPI', 'PassExtensions', 'CompressJson',
+                                'CompactJson']}
     conf_auth = {'Authentication': ['HostKey', 'HostCert', 'CAPath', 'CAFile',
                                     'VerifyServerCert', 'UsePlainHttpAuth',
                                     'HttpUser', 'HttpPass']}
-    conf_conn = {'Connection': ['Timeout', 'Retry', 'SleepRetry', 'RetryRandom', 'SleepRandomRetryMax']}
-    conf_state = {'InputState': ['SaveDir', 'Days']}
-    conf_webapi = {'WebAPI': ['Token', 'Host']}
+    conf_conn = {'Connection': ['Timeout', 'Retry', 'SleepRetry', 'RetryRandom', 'SleepRandomRetryMax',
+                                'PoolSize', 'KeepAliveTimeout']}
+    conf_state = {'InputState': ['SaveDir', 'Days', 'HttpCache', 'PublishSkipUnchanged', 'ResourceIdCache']}
+    conf_webapi = {'WebAPI': ['Token', 'Host', 'BatchSize', 'BatchConcurrency', 'Compress']}
+    conf_parse = {'Parse': ['PoolSize']}
 
     # options specific for every connector
     conf_topo_output = {'Output': ['TopologyGroupOfEndpoints',
-                                   'TopologyGroupOfGroups']}
-    conf_downtimes_output = {'Output': ['Downtimes']}
-    conf_weights_output = {'Output': ['Weights']}
+                                   'TopologyGroupOfGroups', 'Format']}
+    conf_downtimes_output = {'Output': ['Downtimes', 'Format']}
+    conf_weights_output = {'Output': ['Weights', 'Format']}
     conf_metricprofile_output = {'Output': ['MetricProfile']}
 
+    # options that can be left out of config file and their defaults
+    conf_defaults = {'General': {'CompactJson': 'False'},
+                     'Connection': {'PoolSize': '10', 'KeepAliveTimeout': '60'},
+                     'InputState': {'HttpCache': 'False',
+                                    'PublishSkipUnchanged': 'False',
+                                    'ResourceIdCache': 'False'},
+                     'Parse': {'PoolSize': '3'},
+                     'Output': {'Format': 'json'},
+                     'WebAPI': {'BatchSize': '0', 'BatchConcurrency': '4',
+                                'Compress': 'False'}}
+
     def __init__(self, caller, confpath=None, **kwargs):
         self.optional = dict()
 
@@ -40,6 +54,11 @@ class Global(object):
 
         self.optional.update(self._lowercase_dict(self.conf_auth))
         self.optional.update(self._lowercase_dict(self.conf_webapi))
+        self.optional.update(self._lowercase_dict(self.conf_parse))
+        self.defaults = self._lowercase_dict(self.conf_defaults)
+        self.default_values = dict(((sect + opt).lower(), value)
+                                   for sect, opts in self.conf_defaults.items()
+                                   for opt, value in opts.items())
 
         self.shared_secopts = self._merge_dict(self.conf_general,
                                                self.conf_auth, self.conf_conn,
@@ -48,7 +67,8 @@ class Global(object):
         self.secopts = {
             'topology-gocdb-connector.py':
             self._merge_dict(self.shared_secopts,
-                             self.conf_topo_output),
+                             self.conf_topo_output,
+                             self.conf_parse),
             'topology-json-connector.py':
             self._merge_dict(self.shared_secopts,
                              self.conf_topo_output),
@@ -111,8 +131,9 @@ class Global(object):
         return newd
 
     def is_complete(self, opts, section):
-        all = set([section + o for o in self.optional[section]])
-        diff = all.symmetric_difference(opts.keys())
+        defaults = set([section + o for o in self.defaults.get(section, [])])
+        all = set([section + o for o in self.optional[section]]) - defaults
+        diff = all.symmetric_difference(set(opts.keys()) - defaults)
         if diff:
             return (False, diff)
         return (True, None)
@@ -129,7 +150,8 @@ class Global(object):
     def _one_active(self, options):
         loweropts = self._lowercase_dict(options)
 
-        lval = [eval(self.options[k]) for k in self._concat_sectopt(loweropts)]
+        lval = [eval(self.options[k]) for k in self._concat_sectopt(loweropts)
+                if k in self.options]
 
         if any(lval):
             return True
@@ -162,8 +184,8 @@ class Global(object):
                                 if self._checkpath and os.path.isfile(optget) is False:
                                     raise OSError(errno.ENOENT, optget)
 
-                                if ('output' in section.lower() and 'DATE' not
-                                        in optget):
+                                if ('output' in section.lower() and opt != 'Format'
+                                        and 'DATE' not in optget):
                                     self.logger.error(
                                         'No DATE placeholder in %s' % opt)
                                     raise SystemExit(1)
@@ -175,6 +197,9 @@ class Global(object):
                                 if (s in self.optional.keys() and
                                         e.option in self.optional[s]):
                                     pass
+                                elif e.option in self.defaults.get(s, []):
+                                    options.setdefault(s + e.option,
+                                                       self.default_values[s + e.option])
                                 else:
                                     raise e
 
@@ -224,9 +249,12 @@ class CustomerConf(object):
                       'AuthenticationHttpPass', 'BDII', 'BDIIHost', 'BDIIPort',
                       'BDIIQueryBase', 'BDIIQueryFilterSRM',
                       'BDIIQueryAttributesSRM', 'BDIIQueryFilterSEPATH',
-                      'BDIIQueryAttributesSEPATH', 'WebAPIToken',
+                      'BDIIQueryAttributesSEPATH', 'BDIICacheTTL',
+                      'BDIICacheBackgroundRefresh', 'WebAPIToken',
                       'WeightsEmpty', 'DowntimesEmpty', 'ServiceTypesFeed',
                       'HonorNotificationFlag']
+    # optional options that are not required for the complete set
+    _cust_defaults = ['BDIICacheTTL', 'BDIICacheBackgroundRefresh']
     tenantdir = ''
     deftopofeed = 'https://goc.egi.eu/gocdbpi/'
 
@@ -424,6 +452,8 @@ class CustomerConf(object):
     def is_complete_bdii(self, opts):
         diff = []
         for opt in self._cust_optional:
+            if opt in self._cust_defaults:
+                continue
             if opt.lower().startswith('bdii'):
                 if opt.lower() not in opts:
                     diff.append(opt)
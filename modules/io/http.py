@@ -3,6 +3,8 @@ import asyncio
 import aiohttp
 import random
 
+from urllib.parse import urlparse
+
 from aiohttp import client_exceptions, http_exceptions, ClientSession
 from argo_connectors.utils import module_class_name
 from argo_connectors.exceptions import ConnectorHttpError
@@ -26,15 +28,77 @@ def build_connection_retry_settings(globopts):
     return (retry, timeout)
 
 
+def build_connection_pool_settings(globopts):
+    pool_size = int(globopts.get('ConnectionPoolSize'.lower(), 10))
+    keepalive_timeout = float(globopts.get('ConnectionKeepAliveTimeout'.lower(), 60))
+    return (pool_size, keepalive_timeout)
+
+
+class SessionRegistry(object):
+    """
+        Run-scoped registry of keep-alive client sessions. One session with
+        its own TCPConnector is created per upstream host on first use and
+        handed out to every SessionWithRetry built with the registry, so
+        connections and TLS handshakes are reused across all fetches and
+        WEB-API calls of one connector run. Sessions are closed only with
+        close() at the end of the run, or when registry is used as async
+        context manager, once the run leaves it.
+    """
+    def __init__(self, globopts):
+        self.globopts = globopts
+        self._sessions = dict()
+        self._ssl_contexts = dict()
+
+    def get_session(self, url):
+        parts = urlparse(url)
+        key = (parts.scheme, parts.netloc)
+        session = self._sessions.get(key, None)
+        if session is None or session.closed:
+            pool_size, keepalive_timeout = build_connection_pool_settings(self.globopts)
+            connector = aiohttp.TCPConnector(limit=pool_size,
+                                             keepalive_timeout=keepalive_timeout)
+            session = ClientSession(connector=connector)
+            self._sessions[key] = session
+        return session
+
+    def get_ssl_context(self, globopts):
+        # pooled connections are keyed by SSL context so same settings
+        # must result with the same context object
+        key = tuple(globopts.get(opt.lower(), None) for opt in
+                    ['AuthenticationCAPath', 'AuthenticationCAFile',
+                     'AuthenticationHostCert', 'AuthenticationHostKey'])
+        if key not in self._ssl_contexts:
+            self._ssl_contexts[key] = build_ssl_settings(globopts)
+        return self._ssl_contexts[key]
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
 class SessionWithRetry(object):
     def __init__(self, logger, msgprefix, globopts, token=None, custauth=None,
-                 verbose_ret=False, handle_session_close=False):
-        self.ssl_context = build_ssl_settings(globopts)
+                 verbose_ret=False, handle_session_close=False, registry=None,
+                 cache=None, binary=False):
         n_try, client_timeout = build_connection_retry_settings(globopts)
         client_timeout = aiohttp.ClientTimeout(total=client_timeout,
                                                connect=client_timeout, sock_connect=client_timeout,
                                                sock_read=client_timeout)
-        self.session = ClientSession(timeout=client_timeout)
+        self.registry = registry
+        if self.registry:
+            self.ssl_context = self.registry.get_ssl_context(globopts)
+            self.session = None
+        else:
+            self.ssl_context = build_ssl_settings(globopts)
+            self.session = ClientSession(timeout=client_timeout)
+        self.client_timeout = client_timeout
         self.n_try = n_try
         self.logger = logger
         self.token = token
@@ -48,10 +112,22 @@ class SessionWithRetry(object):
         self.verbose_ret = verbose_ret
         self.handle_session_close = handle_session_close
         self.globopts = globopts
+        self.cache = cache
+        self.binary = binary
         self.erroneous_statuses = [404]
 
+    def _get_session(self, url):
+        if self.registry:
+            return self.registry.get_session(url)
+        return self.session
+
+    def _cache_identity(self):
+        user = self.custauth.login if self.custauth else ''
+        hostcert = self.globopts.get('AuthenticationHostCert'.lower(), '')
+        return '{}:{}:{}'.format(self.token or '', user, hostcert)
+
     async def _http_method(self, method, url, data=None, headers=None):
-        method_obj = getattr(self.session, method)
+        method_obj = getattr(self._get_session(url), method)
         raised_exc = None
         n = 1
         if self.token:
@@ -60,6 +136,11 @@ class SessionWithRetry(object):
                 'x-api-key': self.token,
                 'Accept': 'application/json'
             })
+        use_cache = self.cache is not None and method == 'get'
+        if use_cache:
+            cache_identity = self._cache_identity()
+            headers = dict(headers or {})
+            headers.update(self.cache.conditional_headers(url, cache_identity))
         try:
             connct_rty_rnd = self.globopts['ConnectionRetryRandom'.lower()]
             if connct_rty_rnd == 'True':
@@ -75,7 +156,8 @@ class SessionWithRetry(object):
                         self.logger.info(f"{module_class_name(self)} Customer:{self.logger.customer} : HTTP Connection try - {n} after sleep {sleepsecs} seconds")
                 try:
                     async with method_obj(url, data=data, headers=headers,
-                                          ssl=self.ssl_context, auth=self.custauth) as response:
+                                          ssl=self.ssl_context, auth=self.custauth,
+                                          timeout=self.client_timeout) as response:
                         if response.status in self.erroneous_statuses:
                             if getattr(self.logger, 'job', False):
                                 self.logger.error('{}.http_{}({}) Customer:{} Job:{} - Erroneous HTTP status: {} {}'.\
@@ -93,8 +175,23 @@ class SessionWithRetry(object):
                                                          response.status,
                                                          response.reason))
                             break
-                        content = await response.text()
+                        if use_cache and response.status == 304:
+                            content = await self.cache.load(url, cache_identity)
+                            if not self.binary:
+                                content = content.decode('utf-8')
+                            if self.verbose_ret:
+                                return (content, response.headers, response.status)
+                            return content
+                        if self.binary:
+                            # raw body without charset detection and decoded
+                            # copy, parsers consume bytes directly
+                            content = await response.read()
+                        else:
+                            content = await response.text()
                         if content:
+                            if use_cache:
+                                await self.cache.store(url, cache_identity, content,
+                                                       response.headers)
                             if self.verbose_ret:
                                 return (content, response.headers, response.status)
                             return content
@@ -163,7 +260,7 @@ class SessionWithRetry(object):
 
         finally:
             if not self.handle_session_close:
-                await self.session.close()
+                await self.close()
 
     async def http_get(self, url, headers=None):
         try:
@@ -201,4 +298,7 @@ class SessionWithRetry(object):
 
 
     async def close(self):
+        # shared sessions are closed by the registry at the end of run
+        if self.registry:
+            return None
         return await self.session.close()
@@ -0,0 +1,92 @@
+import datetime
+import hashlib
+import json
+import os
+
+import aiofiles
+
+
+class HttpCache(object):
+    """
+        Persistent cache of fetched upstream feeds used for conditional GET
+        requests. Entry is keyed by URL and identity the connector
+        authenticates with and kept only if server returned ETag or
+        Last-Modified header. Next fetch of the same URL sends
+        If-None-Match/If-Modified-Since and on HTTP 304 body is served from
+        disk.
+    """
+    def __init__(self, cachedir, savedays=None):
+        self.cachedir = cachedir
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        os.makedirs(self.cachedir, exist_ok=True)
+        if savedays:
+            self._prune(int(savedays))
+
+    def _prune(self, savedays):
+        oldest = datetime.datetime.now() - datetime.timedelta(days=savedays)
+        for entry in os.listdir(self.cachedir):
+            path = os.path.join(self.cachedir, entry)
+            mtime = datetime.datetime.fromtimestamp(os.path.getmtime(path))
+            if mtime < oldest:
+                os.remove(path)
+
+    def _key(self, url, identity):
+        return hashlib.sha256('{}\n{}'.format(url, identity).encode()).hexdigest()
+
+    def _paths(self, url, identity):
+        key = self._key(url, identity)
+        return (os.path.join(self.cachedir, key + '.meta'),
+                os.path.join(self.cachedir, key + '.body'))
+
+    def conditional_headers(self, url, identity):
+        metafile, bodyfile = self._paths(url, identity)
+        headers = dict()
+
+        if not os.path.exists(metafile) or not os.path.exists(bodyfile):
+            return headers
+
+        with open(metafile) as fp:
+            meta = json.load(fp)
+        if meta.get('etag', None):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified', None):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        return headers
+
+    async def load(self, url, identity):
+        metafile, bodyfile = self._paths(url, identity)
+        async with aiofiles.open(bodyfile, mode='rb') as fp:
+            content = await fp.read()
+        # entry is pruned by age of its files, confirmed one is kept fresh
+        os.utime(metafile)
+        os.utime(bodyfile)
+        self.hits += 1
+        self.bytes_saved += len(content)
+
+        return content
+
+    async def store(self, url, identity, content, headers):
+        self.misses += 1
+        etag = headers.get('ETag', None)
+        last_modified = headers.get('Last-Modified', None)
+        if not etag and not last_modified:
+            return
+
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        metafile, bodyfile = self._paths(url, identity)
+        async with aiofiles.open(bodyfile + '.tmp', mode='wb') as fp:
+            await fp.write(content)
+        os.replace(bodyfile + '.tmp', bodyfile)
+        async with aiofiles.open(metafile + '.tmp', mode='w') as fp:
+            await fp.write(json.dumps({'url': url, 'etag': etag,
+                                       'last_modified': last_modified}))
+        os.replace(metafile + '.tmp', metafile)
+
+    def summary(self):
+        return 'CacheHits:%d CacheMisses:%d CacheSavedBytes:%d' % (self.hits,
+                                                                   self.misses,
+                                                                   self.bytes_saved)
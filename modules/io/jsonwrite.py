@@ -1,5 +1,11 @@
-import json
+import asyncio
 import gzip
+import json
+
+from argo_connectors import jsoncodec
+from argo_connectors.jsoncodec import JsonPayload
+
+JSON_WRITE_BUFFER = 256 * 1024
 
 
 class JsonWriter(object):
@@ -11,7 +17,7 @@ class JsonWriter(object):
     def write_json(self):
         try:
             if self.compress_json == str(True):
-                json_data = json.dumps(self.data, indent=4)
+                json_data = jsoncodec.dumps(self.data, indent=4)
 
                 with gzip.open(self.filename + '.gz', 'wb') as f:
                     f.write(json_data.encode())
@@ -19,7 +25,7 @@ class JsonWriter(object):
                 return True, None
             
             else:
-                json_data = json.dumps(self.data, indent=4)
+                json_data = jsoncodec.dumps(self.data, indent=4)
 
                 with open(self.filename, 'w') as f:
                     f.write(json_data)
@@ -28,3 +34,155 @@ class JsonWriter(object):
 
         except Exception as e:
             return False, e
+
+
+class JsonStreamWriter(JsonWriter):
+    """
+        Writer that encodes data incrementally straight into the file or
+        gzip stream and writes it in blocks, so the whole encoded document
+        is never held in memory. Default output is the same as the one of
+        JsonWriter. Compact output encodes records of a list one by one
+        with jsoncodec and without indentation. Compact output of
+        JsonPayload is its already encoded body that is also sent to
+        WEB-API. Default indented output can't reuse it and encodes the
+        data once more. write_json_async() runs the writer in a thread so
+        the event loop is free meanwhile.
+    """
+    def __init__(self, data, filename, compress_json, compact=False):
+        super(JsonStreamWriter, self).__init__(data, filename, compress_json)
+        self.compact = compact
+
+    def iterencode(self):
+        data = jsoncodec.payload_data(self.data)
+
+        if self.compact and isinstance(data, list):
+            yield '['
+            for i, record in enumerate(data):
+                if i:
+                    yield ','
+                yield jsoncodec.dumps(record)
+            yield ']'
+
+        elif self.compact:
+            yield jsoncodec.dumps(data)
+
+        else:
+            yield from json.JSONEncoder(indent=4).iterencode(data)
+
+    def _write_chunks(self, fileobj):
+        if self.compact and isinstance(self.data, JsonPayload):
+            fileobj.write(self.data.body)
+            return
+
+        chunks, size = list(), 0
+
+        for chunk in self.iterencode():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= JSON_WRITE_BUFFER:
+                fileobj.write(''.join(chunks).encode('utf-8'))
+                chunks, size = list(), 0
+
+        if chunks:
+            fileobj.write(''.join(chunks).encode('utf-8'))
+
+    def write_json(self):
+        try:
+            if self.compress_json == str(True):
+                with gzip.open(self.filename + '.gz', 'wb') as f:
+                    self._write_chunks(f)
+
+            else:
+                with open(self.filename, 'wb') as f:
+                    self._write_chunks(f)
+
+            return True, None
+
+        except Exception as e:
+            return False, e
+
+    async def write_json_async(self):
+        if self.compact and isinstance(self.data, JsonPayload):
+            await self.data.encode()
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.write_json)
+
+
+class NdjsonWriter(JsonStreamWriter):
+    """
+        Writer of newline delimited JSON with one compact record per line.
+        Sidecar index file with .idx suffix maps every value of the index
+        keys, like group or type of topology entity, to list of byte ranges
+        of its lines so consumers can seek to records they need.
+        Consecutive records with the same value share a range. Range of
+        plain file is [offset, length]. Compressed file is written as a
+        sequence of gzip members, one per block, and its range is
+        [member offset, offset in member, length] so reader seeks to the
+        member and decompresses only from there.
+    """
+    def __init__(self, data, filename, compress_json, index_keys=('group', 'type')):
+        if filename.endswith('.json'):
+            filename = filename[:-len('.json')] + '.ndjson'
+        super(NdjsonWriter, self).__init__(data, filename, compress_json)
+        self.index_keys = index_keys
+        self.index = dict()
+
+    def _update_index(self, record, location, length):
+        for key in self.index_keys:
+            value = record.get(key, None) if isinstance(record, dict) else None
+            if value is None:
+                continue
+            ranges = self.index[key].setdefault(str(value), list())
+            if (ranges and ranges[-1][:-2] == list(location[:-1])
+                    and ranges[-1][-2] + ranges[-1][-1] == location[-1]):
+                ranges[-1][-1] += length
+            else:
+                ranges.append(list(location) + [length])
+
+    def _write_block(self, fileobj, block):
+        if self.compress_json == str(True):
+            block = gzip.compress(block)
+        fileobj.write(block)
+
+        return len(block)
+
+    def _write_chunks(self, fileobj):
+        data = jsoncodec.payload_data(self.data)
+        if not isinstance(data, list):
+            data = [data]
+
+        compressed = self.compress_json == str(True)
+        self.index = dict((key, dict()) for key in self.index_keys)
+        chunks, size, offset = list(), 0, 0
+
+        for record in data:
+            line = jsoncodec.dumpb(record) + b'\n'
+            # in compressed file offset is the one of the current member
+            location = (offset, size) if compressed else (offset + size,)
+            self._update_index(record, location, len(line))
+            chunks.append(line)
+            size += len(line)
+            if size >= JSON_WRITE_BUFFER:
+                offset += self._write_block(fileobj, b''.join(chunks))
+                chunks, size = list(), 0
+
+        if chunks:
+            self._write_block(fileobj, b''.join(chunks))
+
+    def write_json(self):
+        try:
+            filename = self.filename
+            if self.compress_json == str(True):
+                filename += '.gz'
+
+            with open(filename, 'wb') as f:
+                self._write_chunks(f)
+
+            with open(self.filename + '.idx', 'w') as f:
+                f.write(jsoncodec.dumps(self.index))
+
+            return True, None
+
+        except Exception as e:
+            return False, e
@@ -1,46 +1,239 @@
 import asyncio
+import hashlib
+import json
+import os
+import time
 
+import aiofiles
 import bonsai
 
 from argo_connectors.utils import module_class_name
 from argo_connectors.exceptions import ConnectorHttpError
 
 
-class LDAPSessionWithRetry(object):
-    def __init__(self, logger, retry_attempts, retry_sleep, connection_timeout):
+LDAP_PAGE_SIZE = 1000
+# stale results older than this many ttls are never served
+LDAP_CACHE_MAX_AGE_TTLS = 3
+
+
+class LDAPCacheWriter(object):
+    """
+        Entries are written to temporary file page by page as they arrive
+        and the file replaces cached results only once the search
+        completed. File is written in executor so event loop is not blocked
+        by file IO.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._fp = None
+
+    def _write(self, entries):
+        if self._fp is None:
+            self._fp = open(self.path + '.tmp', mode='w')
+        for entry in entries:
+            record = dict((key, list(value)) for key, value in entry.items() if key != 'dn')
+            record['dn'] = str(entry['dn'])
+            self._fp.write(json.dumps(record) + '\n')
+
+    def _commit(self):
+        self._write([])
+        self._fp.close()
+        self._fp = None
+        os.replace(self.path + '.tmp', self.path)
+
+    def _abort(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+            os.remove(self.path + '.tmp')
+
+    async def write(self, entries):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._write, entries)
+
+    async def commit(self):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._commit)
+
+    async def abort(self):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._abort)
+
+
+class LDAPCache(object):
+    """
+        On-disk cache of LDAP search results keyed by server, search base,
+        filter and attributes. Results younger than ttl seconds are served
+        from cache and LDAP server is not contacted. Stale results can be
+        served while cache is refreshed, but only until they are max_age
+        seconds old.
+    """
+    def __init__(self, cachedir, ttl, max_age=None):
+        self.cachedir = cachedir
+        self.ttl = ttl
+        self.max_age = max_age or ttl * LDAP_CACHE_MAX_AGE_TTLS
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cachedir, exist_ok=True)
+
+    def path(self, host, port, base, filter, attributes):
+        key = '\n'.join([host, str(port), base, filter, ' '.join(attributes)])
+        return os.path.join(self.cachedir, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def _age(self, path):
+        return time.time() - os.path.getmtime(path)
+
+    def is_fresh(self, path):
+        return self.exists(path) and self._age(path) < self.ttl
+
+    def is_usable(self, path):
+        return self.exists(path) and self._age(path) < self.max_age
+
+    async def load(self, path, consumer):
+        nentries = 0
+        async with aiofiles.open(path, mode='r') as fp:
+            async for line in fp:
+                record = json.loads(line)
+                entry = bonsai.LDAPEntry(record.pop('dn'))
+                for key, value in record.items():
+                    entry[key] = value
+                consumer(entry)
+                nentries += 1
+        self.hits += 1
+
+        return nentries
+
+    def writer(self, path):
+        self.misses += 1
+        return LDAPCacheWriter(path)
+
+    def summary(self):
+        return 'BDIICacheHits:%d BDIICacheMisses:%d' % (self.hits, self.misses)
+
+
+class LDAPSharedSession(object):
+    """
+        One connection to LDAP server shared by several searches that can
+        run concurrently over it. Results are requested in pages and every
+        entry is handed over to consumer as soon as it arrives, so the
+        whole result set is never held in memory. Search that fails on a
+        later page is retried from the start and feeds consumer again with
+        entries it already got, so consumer must be idempotent.
+
+        With cache, fresh results are served from disk. If background_refresh
+        is set, stale results are served from disk as well and cache is
+        refreshed from LDAP server in background. Refresh that is not done
+        by the time session is closed is cancelled, and results that are
+        too old to be served are therefore fetched from LDAP server before
+        the search returns.
+    """
+    def __init__(self, logger, host, port, retry_attempts, retry_sleep,
+                 connection_timeout, page_size=LDAP_PAGE_SIZE, cache=None,
+                 background_refresh=False):
         self.n_try = retry_attempts
         self.retry_sleep_list = [(i + 1) * retry_sleep for i in range(retry_attempts)]
         self.timeout = connection_timeout
         self.logger = logger
+        self.host = host
+        self.port = port
+        self.page_size = page_size
+        self.cache = cache
+        self.background_refresh = background_refresh
+        self.refreshes = list()
+        self.client = bonsai.LDAPClient('ldap://' + host + ':' + port + '/')
+        self._conn = None
+        self._conn_lock = asyncio.Lock()
+
+    async def _connection(self):
+        async with self._conn_lock:
+            if self._conn is None:
+                self._conn = await self.client.connect(True, timeout=float(self.timeout))
 
+            return self._conn
 
-    async def search(self, host, port, base, filter, attributes):
-        raised_exc = None
+    def _drop_connection(self, conn):
+        if self._conn is conn and conn is not None:
+            conn.close()
+            self._conn = None
+
+    async def _search(self, base, filter, attributes, consumer, cache_path=None):
         n = 1
+        conn = None
+        writer = self.cache.writer(cache_path) if cache_path else None
+
+        while n <= self.n_try:
+            try:
+                conn = await self._connection()
+                entries = await conn.paged_search(base,
+                    bonsai.LDAPSearchScope.SUB, filter, attributes,
+                    timeout=float(self.timeout), page_size=self.page_size)
+                nentries, page = 0, list()
+                async for entry in entries:
+                    if consumer:
+                        consumer(entry)
+                    if writer:
+                        page.append(entry)
+                        if len(page) == self.page_size:
+                            await writer.write(page)
+                            page = list()
+                    nentries += 1
+
+                if writer:
+                    await writer.write(page)
+                    await writer.commit()
+
+                return nentries
+
+            except asyncio.CancelledError:
+                if writer:
+                    await writer.abort()
+                raise
+
+            except Exception as exc:
+                self.logger.error('from {}.search() - {}'.format(module_class_name(self), repr(exc)))
+                if writer:
+                    await writer.abort()
+                self._drop_connection(conn)
+                await asyncio.sleep(float(self.retry_sleep_list[n - 1]))
+
+            self.logger.info(f'LDAP Connection try - {n}')
+            n += 1
 
-        try:
-            client = bonsai.LDAPClient('ldap://' + host + ':' + port + '/')
-            while n <= self.n_try:
-                try:
-                    conn = await client.connect(True, timeout=float(self.timeout))
-                    res = await conn.search(base,
-                        bonsai.LDAPSearchScope.SUB, filter, attributes,
-                        timeout=float(self.timeout))
+        self.logger.error('LDAP Connection retry exhausted')
+        raise ConnectorHttpError()
 
-                    return res
+    async def search(self, base, filter, attributes, consumer):
+        if not self.cache:
+            return await self._search(base, filter, attributes, consumer)
 
+        cache_path = self.cache.path(self.host, self.port, base, filter, attributes)
+        if self.cache.is_fresh(cache_path):
+            return await self.cache.load(cache_path, consumer)
 
-                except Exception as exc:
-                    self.logger.error('from {}.search() - {}'.format(module_class_name(self), repr(exc)))
-                    await asyncio.sleep(float(self.retry_sleep_list[n - 1]))
-                    raised_exc = exc
+        if self.background_refresh and self.cache.is_usable(cache_path):
+            nentries = await self.cache.load(cache_path, consumer)
+            self.refreshes.append(asyncio.ensure_future(
+                self._search(base, filter, attributes, None, cache_path)))
+            return nentries
 
-                self.logger.info(f'LDAP Connection try - {n}')
-                n += 1
+        return await self._search(base, filter, attributes, consumer, cache_path)
 
-            else:
-                self.logger.error('LDAP Connection retry exhausted')
+    async def search_many(self, searches):
+        """
+            Run searches given as (base, filter, attributes, consumer)
+            tuples concurrently over the shared connection.
+        """
+        return await asyncio.gather(*[self.search(*search) for search in searches])
 
-        except Exception as exc:
-            self.logger.error('from {}.search() - {}'.format(module_class_name(self), repr(exc)))
-            raise ConnectorHttpError()
+    async def close(self):
+        pending = [refresh for refresh in self.refreshes if not refresh.done()]
+        for refresh in pending:
+            refresh.cancel()
+        if pending:
+            self.logger.info('Cancelled %d unfinished BDII cache refreshes' % len(pending))
+        await asyncio.gather(*self.refreshes, return_exceptions=True)
+        self.refreshes = list()
+        self._drop_connection(self._conn)
@@ -0,0 +1,60 @@
+import datetime
+import hashlib
+import os
+
+import aiofiles
+
+
+class PublishState(object):
+    """
+        Content hashes of resources published to WEB-API kept in state
+        directory. Entry is keyed by API URL, that holds host, component
+        and date, together with tenant and report, so send of data with the
+        same hash as the last successful publish can be skipped. With force
+        every send goes through and the hash is only recorded.
+    """
+    def __init__(self, statedir, savedays=None, force=False):
+        self.statedir = statedir
+        self.force = force
+        self.skipped = 0
+        os.makedirs(self.statedir, exist_ok=True)
+        if savedays:
+            self._prune(int(savedays))
+
+    def _prune(self, savedays):
+        oldest = datetime.datetime.now() - datetime.timedelta(days=savedays)
+        for entry in os.listdir(self.statedir):
+            path = os.path.join(self.statedir, entry)
+            mtime = datetime.datetime.fromtimestamp(os.path.getmtime(path))
+            if mtime < oldest:
+                os.remove(path)
+
+    def _path(self, api, tenant, report=None):
+        key = '{}\n{}\n{}'.format(api, tenant, report or '')
+        return os.path.join(self.statedir, hashlib.sha256(key.encode()).hexdigest())
+
+    async def unchanged(self, api, tenant, digest, report=None):
+        if self.force:
+            return False
+
+        path = self._path(api, tenant, report)
+        if not os.path.exists(path):
+            return False
+
+        async with aiofiles.open(path, mode='r') as fp:
+            published = await fp.read()
+
+        if published == digest:
+            self.skipped += 1
+            return True
+
+        return False
+
+    async def store(self, api, tenant, digest, report=None):
+        path = self._path(api, tenant, report)
+        async with aiofiles.open(path + '.tmp', mode='w') as fp:
+            await fp.write(digest)
+        os.replace(path + '.tmp', path)
+
+    def summary(self):
+        return 'PublishSkipped:%d' % self.skipped
@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+from collections import Counter
+
+import aiofiles
+
+from argo_connectors import jsoncodec
+
+
+class ResourceIds(object):
+    """
+        Ids of WEB-API resources by their name, like weights of every
+        report, kept in state directory for each WEB-API host and tenant.
+        Update of existing resource then needs only HTTP PUT with cached
+        id. Ids of resource type are refreshed from the listing of the
+        whole collection only on a miss or if resource with cached id is
+        not found.
+    """
+    def __init__(self, statedir):
+        self.statedir = statedir
+        self._ids = dict()
+        os.makedirs(self.statedir, exist_ok=True)
+
+    def _path(self, host, tenant):
+        key = '{}\n{}'.format(host, tenant)
+        return os.path.join(self.statedir, hashlib.sha256(key.encode()).hexdigest())
+
+    async def _load(self, host, tenant):
+        path = self._path(host, tenant)
+        if path not in self._ids:
+            try:
+                async with aiofiles.open(path, mode='r') as fp:
+                    self._ids[path] = jsoncodec.loads(await fp.read())
+
+            except (OSError, ValueError):
+                self._ids[path] = dict()
+
+        return self._ids[path]
+
+    async def get(self, host, tenant, resource, name):
+        ids = await self._load(host, tenant)
+        return ids.get(resource, dict()).get(name)
+
+    async def refresh(self, host, tenant, resource, entries):
+        ids = await self._load(host, tenant)
+        names = Counter(entry['name'] for entry in entries)
+        # resources with name that is not unique are always looked up
+        ids[resource] = dict((entry['name'], entry['id']) for entry in entries
+                             if names[entry['name']] == 1)
+        path = self._path(host, tenant)
+        async with aiofiles.open(path + '.tmp', mode='w') as fp:
+            await fp.write(jsoncodec.dumps(ids))
+        os.replace(path + '.tmp', path)
+
+        return ids[resource]
@@ -1,13 +1,22 @@
+import asyncio
 import datetime
 import os
-import json
 
+from argo_connectors import jsoncodec
+from argo_connectors.jsoncodec import JsonPayload
 from argo_connectors.utils import module_class_name
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
 from argo_connectors.exceptions import ConnectorHttpError
 
 
 class WebAPI(object):
+    """
+        Client of WEB-API for one connector. All requests, for every
+        component sent with send() or send_many(), including 409 recovery
+        and updates, go through one pooled session of the given run-scoped
+        registry, or of registry owned by the client that is closed with
+        close(). Client can therefore be created once per run and reused.
+    """
     methods = {
         'downtimes-csv-connector.py': 'downtimes',
         'downtimes-gocdb-connector.py': 'downtimes',
@@ -24,7 +33,8 @@ class WebAPI(object):
 
     def __init__(self, connector, host, token, logger, retry,
                  timeout=180, sleepretry=60, retryrandom=None, sleepretryrandom=None, report=None, endpoints_group=None,
-                 date=None):
+                 date=None, registry=None, publish_state=None, batch_size=None,
+                 batch_concurrency=None, compress=False, resource_ids=None):
         self.connector = os.path.basename(connector)
         self.webapi_method = self.methods[self.connector]
         self.host = host
@@ -33,6 +43,11 @@ class WebAPI(object):
             'x-api-key': self.token,
             'Accept': 'application/json'
         }
+        self.send_headers = dict(self.headers)
+        self.send_headers['Content-Type'] = 'application/json'
+        self.gzip_headers = dict(self.send_headers)
+        self.gzip_headers['Content-Encoding'] = 'gzip'
+        self.compress = compress
         self.report = report
         self.logger = logger
         self.retry = retry
@@ -48,10 +63,17 @@ class WebAPI(object):
             'ConnectionSleepRandomRetryMax'.lower(): sleepretryrandom
         }
         self.endpoints_group = endpoints_group
+        self.publish_state = publish_state
+        self.resource_ids = resource_ids
+        self.batch_size = batch_size
+        self.batch_concurrency = batch_concurrency or 4
         self.date = date or self._construct_datenow()
+        self.own_registry = registry is None
+        self.registry = SessionRegistry(self.retry_options) if self.own_registry else registry
         self.session = SessionWithRetry(self.logger, module_class_name(self),
                                         self.retry_options, verbose_ret=True,
-                                        handle_session_close=True)
+                                        handle_session_close=True,
+                                        registry=self.registry)
 
     def _construct_datenow(self):
         d = datetime.datetime.now()
@@ -82,16 +104,42 @@ class WebAPI(object):
 
         return formatted
 
+    async def _body(self, data_send):
+        body = await data_send.encode()
+        if not self.compress:
+            return body, self.send_headers
+
+        compressed = await data_send.compress()
+        self.logger.info('%s %s() Customer:%s - Request body compressed from %d to %d bytes' %
+                         (module_class_name(self), '_body', self.logger.customer,
+                          len(body), len(compressed)))
+
+        return compressed, self.gzip_headers
+
+    def _plain_fallback(self, status, method):
+        # WEB-API without support for compressed request bodies
+        if status == 415 and self.compress:
+            self.logger.warn('%s %s() Customer:%s - HTTP %s with gzip body rejected, sending plain body' %
+                             (module_class_name(self), method, self.logger.customer,
+                              method.upper()))
+            self.compress = False
+            return True
+
+        return False
+
     async def _send(self, api, data_send, connector):
+        body, send_headers = await self._body(data_send)
         content, headers, status = await self.session.http_post(api,
-                                                                data=json.dumps(
-                                                                    data_send),
-                                                                headers=self.headers)
+                                                                data=body,
+                                                                headers=send_headers)
+        if self._plain_fallback(status, 'post'):
+            return await self._send(api, data_send, connector)
+
         if status != 201:
             if (connector.startswith('topology')
                 or connector.startswith('downtimes')
                     or connector.startswith('service-types')):
-                jsonret = json.loads(content)
+                jsonret = jsoncodec.loads(content)
                 msg = None
                 statusmsg = jsonret.get('status', False)
                 if statusmsg:
@@ -103,7 +151,7 @@ class WebAPI(object):
                                                                           self.logger.customer,
                                                                           msg))
             else:
-                errormsg = json.loads(content)
+                errormsg = jsoncodec.loads(content)
                 if 'errors' in errormsg:
                     errormsg = errormsg['errors'][0]['details']
                 elif 'status' in errormsg:
@@ -117,7 +165,7 @@ class WebAPI(object):
     async def _get(self, api, jsonret=False):
         content, headers, status = await self.session.http_get(api, headers=self.headers)
         if jsonret:
-            return json.loads(content)
+            return jsoncodec.loads(content)
         else:
             return content
 
@@ -138,25 +186,63 @@ class WebAPI(object):
         loc = urlparse(api)
         loc = '{}://{}{}/{}?{}'.format(loc.scheme,
                                        loc.hostname, loc.path, id, loc.query)
-        content, headers, status = await self.session.http_put(loc,
-                                                               data=json.dumps(
-                                                                   data_send),
-                                                               headers=self.headers)
+        body, send_headers = await self._body(data_send)
+        response = await self.session.http_put(loc, data=body,
+                                               headers=send_headers)
+        if response is None:
+            # session logs erroneous 404 status and returns no response
+            return None, 404
+
+        content, headers, status = response
+        if self._plain_fallback(status, 'put'):
+            return await self._put(api, data_send, id)
+
         return content, status
 
-    async def _update(self, api, data_send):
+    async def _resource_id(self, api, name, refresh=False):
+        """
+            Id of resource with given name and whether it is taken from
+            cache of resource ids. Whole collection is fetched and cache
+            refreshed on a miss.
+        """
+        if self.resource_ids and not refresh:
+            id = await self.resource_ids.get(self.host, self.logger.customer,
+                                             self.webapi_method, name)
+            if id is not None:
+                return id, True
+
         content = await self._get(api)
-        content = json.loads(content)
+        content = jsoncodec.loads(content)
+        if self.resource_ids:
+            await self.resource_ids.refresh(self.host, self.logger.customer,
+                                            self.webapi_method, content['data'])
         target = list(
-            filter(lambda w: w['name'] == data_send['name'], content['data']))
+            filter(lambda w: w['name'] == name, content['data']))
         if len(target) > 1:
             self.logger.error('%s %s() Customer:%s Job:%s - HTTP PUT %s' %
                               (module_class_name(self), '_update',
                                self.logger.customer, self.logger.job,
                                'Name of resource not unique on WEB-API, cannot proceed with update'))
-        else:
-            id = target[0]['id']
+            return None, False
+        elif not target:
+            self.logger.error('%s %s() Customer:%s Job:%s - HTTP PUT %s' %
+                              (module_class_name(self), '_update',
+                               self.logger.customer, self.logger.job,
+                               'Resource not found on WEB-API, cannot proceed with update'))
+            return None, False
+
+        return target[0]['id'], False
+
+    async def _update(self, api, data_send):
+        id, cached = await self._resource_id(api, data_send.data['name'])
+        if id is not None:
             content, status = await self._put(api, data_send, id)
+            if status == 404 and cached:
+                # resource with cached id is gone, look it up again
+                id, cached = await self._resource_id(api, data_send.data['name'], refresh=True)
+                if id is None:
+                    return None
+                content, status = await self._put(api, data_send, id)
             if status == 200:
                 self.logger.info('Succesfully updated (HTTP PUT) resource')
             else:
@@ -164,6 +250,7 @@ class WebAPI(object):
                                   (module_class_name(self), '_update',
                                    self.logger.customer, self.logger.job,
                                    content))
+            return status
 
     async def _delete_and_resend(self, api, data_send, topo_component, downtimes_component):
         id = None
@@ -172,9 +259,54 @@ class WebAPI(object):
             id = content['data'][0]['id']
         status = await self._delete(api, id, self.date)
         if status == 200:
-            await self._send(api, data_send, self.connector)
+            status = await self._send(api, data_send, self.connector)
             self.logger.info('Succesfully deleted and created new resource')
 
+        return status
+
+    async def _send_batches(self, api, data_send, topo_component):
+        """
+            Send topology split into batches of batch_size entities to
+            WEB-API that appends them to the resource. First batch is sent
+            alone so that the existing resource for the date is deleted
+            only once, others are sent concurrently and each is retried on
+            its own by the session.
+        """
+        data = data_send.data
+        batches = [JsonPayload(data[i:i + self.batch_size])
+                   for i in range(0, len(data), self.batch_size)]
+
+        status = await self._send(api, batches[0], self.connector)
+        if status == 409:
+            status = await self._delete_and_resend(api, batches[0], topo_component, None)
+        if status != 201:
+            return status
+
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def send_batch(i, batch):
+            async with semaphore:
+                try:
+                    return await self._send(api, batch, self.connector)
+
+                except ConnectorHttpError as exc:
+                    self.logger.error('%s %s() Customer:%s - Batch %d/%d failed - %s' %
+                                      (module_class_name(self), '_send_batches',
+                                       self.logger.customer, i + 1, len(batches),
+                                       repr(exc)))
+                    return None
+
+        statuses = await asyncio.gather(*[send_batch(i, batch)
+                                          for i, batch in enumerate(batches)
+                                          if i > 0])
+        failed = [s for s in statuses if s != 201]
+        if failed:
+            raise ConnectorHttpError('{} of {} batches not sent'.format(len(failed), len(batches)))
+
+        self.logger.info('Sent %d entities in %d batches' % (len(data), len(batches)))
+
+        return status
+
     async def get(self, api_path, jsonret):
         if api_path:
             webapi_url = '{}/{}'.format(self.webapi_method, api_path)
@@ -196,9 +328,14 @@ class WebAPI(object):
             self.logger.error('Failed data fetch from WEB-API')
 
         finally:
-            await self.session.close()
+            await self.close()
 
-    async def send(self, data, topo_component=None, downtimes_component=None):
+    async def close(self):
+        # sessions of run-scoped registry are closed at the end of run
+        if self.own_registry:
+            await self.registry.close()
+
+    async def _publish(self, data, topo_component=None, downtimes_component=None):
         if topo_component:
             # /topology/groups, /topology/endpoints
             webapi_url = '{}/{}'.format(self.webapi_method, topo_component)
@@ -212,30 +349,64 @@ class WebAPI(object):
         else:
             api = 'https://{}/api/v2/{}'.format(self.host, webapi_url)
 
+        # data is encoded once and the same body is used for the resend
         if topo_component:
-            data_send = data
+            data_send = data if isinstance(data, JsonPayload) else JsonPayload(data)
         else:
-            data_send = dict()
+            data_send = JsonPayload(dict())
 
         if self.connector.startswith('downtimes'):
-            data_send = self._format_downtimes(data)
+            data_send = JsonPayload(self._format_downtimes(jsoncodec.payload_data(data)))
 
         if self.connector.startswith('weights'):
-            data_send = self._format_weights(data)
+            data_send = JsonPayload(self._format_weights(jsoncodec.payload_data(data)))
 
         try:
-            status = await self._send(api, data_send, self.connector)
+            # skip whole POST and DELETE cycle if the same data is already
+            # published
+            if self.publish_state:
+                digest = await data_send.digest()
+                if await self.publish_state.unchanged(api, self.logger.customer, digest, self.report):
+                    self.logger.info('Data unchanged since last publish, skipped sending to WEB-API')
+                    return
+
+            if (topo_component and self.batch_size
+                    and isinstance(data_send.data, list)
+                    and len(data_send.data) > self.batch_size):
+                status = await self._send_batches(api, data_send, topo_component)
+
+            else:
+                status = await self._send(api, data_send, self.connector)
 
-            # delete resource on WEB-API and resend
-            if status == 409 and topo_component or downtimes_component:
-                await self._delete_and_resend(api, data_send, topo_component, downtimes_component)
-            elif status == 409:
-                await self._update(api, data_send)
+                # delete resource on WEB-API and resend
+                if status == 409 and (topo_component or downtimes_component):
+                    status = await self._delete_and_resend(api, data_send, topo_component, downtimes_component)
+                elif status == 409:
+                    status = await self._update(api, data_send)
+
+            if self.publish_state and status in (200, 201):
+                await self.publish_state.store(api, self.logger.customer, digest, self.report)
 
             self.logger.info('Data succesfully sent to WEB-API')
 
         except ConnectorHttpError:
             self.logger.error('Failed sent of data to WEB-API')
 
+    async def send(self, data, topo_component=None, downtimes_component=None):
+        try:
+            await self._publish(data, topo_component, downtimes_component)
+
+        finally:
+            await self.close()
+
+    async def send_many(self, sends):
+        """
+            Concurrently send list of (data, topo_component) or (data,
+            topo_component, downtimes_component) tuples over the same
+            session.
+        """
+        try:
+            await asyncio.gather(*[self._publish(*send) for send in sends])
+
         finally:
-            await self.session.close()
+            await self.close()
@@ -0,0 +1,197 @@
+"""
+    JSON codec used for parsing of fetched feeds and for serialization of
+    topology, downtimes and weights sent to WEB-API or written to files.
+    Faster backend is picked if installed, orjson first, then ujson, and
+    standard library json module otherwise. Output of loads() is the same
+    regardless of backend. dumps() without indent may differ only in
+    whitespace, output with indent other than orjson's 2 spaces is always
+    produced by json module so written files stay the same.
+
+    JsonPayload wraps data that is sent to WEB-API and written to file so
+    that it is encoded, and gzip compressed if needed, only once.
+"""
+
+import asyncio
+import functools
+import gzip
+import hashlib
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+BACKENDS = ['orjson', 'ujson', 'json']
+
+# payloads with at least that many records are encoded in thread
+PAYLOAD_THREAD_RECORDS = 5000
+
+# trades little size of compressed topology for much shorter compression
+PAYLOAD_GZIP_LEVEL = 6
+
+backend = None
+JSONDecodeError = json.JSONDecodeError
+
+
+def available_backends():
+    available = list()
+
+    for name in BACKENDS:
+        if name == 'orjson' and orjson is None:
+            continue
+        if name == 'ujson' and ujson is None:
+            continue
+        available.append(name)
+
+    return available
+
+
+def set_backend(name=None):
+    """
+        Select backend by name or the fastest one that is available if name
+        is not given.
+    """
+    global backend, JSONDecodeError
+
+    available = available_backends()
+    if name is None:
+        name = available[0]
+    elif name not in available:
+        raise ValueError('JSON backend {} not available'.format(name))
+
+    backend = name
+    if name == 'orjson':
+        JSONDecodeError = orjson.JSONDecodeError
+    elif name == 'ujson':
+        JSONDecodeError = getattr(ujson, 'JSONDecodeError', ValueError)
+    else:
+        JSONDecodeError = json.JSONDecodeError
+
+    return backend
+
+
+def loads(data):
+    if backend == 'orjson':
+        return orjson.loads(data)
+    elif backend == 'ujson':
+        return ujson.loads(data)
+
+    return json.loads(data)
+
+
+def dumps(data, indent=None):
+    try:
+        if backend == 'orjson' and indent in (None, 2):
+            option = orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(data, option=option).decode('utf-8')
+
+        elif backend == 'ujson' and indent is None:
+            return ujson.dumps(data, ensure_ascii=True, escape_forward_slashes=False)
+
+    except (TypeError, OverflowError):
+        # leave types that faster backends can not serialize to json module
+        pass
+
+    return json.dumps(data, indent=indent)
+
+
+def dumpb(data):
+    """
+        Compact encoding of data as UTF-8 bytes, without intermediate str
+        for orjson.
+    """
+    if backend == 'orjson':
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+
+    return dumps(data).encode('utf-8')
+
+
+class JsonPayload(object):
+    """
+        Data together with its compact JSON encoding. Encoding is done on
+        first use, in thread for large payloads, and the same bytes are
+        reused for HTTP body, its retries and resends and for compact JSON
+        file. Concurrent users wait for the same encoding. Digest is
+        SHA-256 of canonical encoding with sorted keys, so it does not
+        depend on backend.
+    """
+    def __init__(self, data):
+        self.data = data
+        self._body = None
+        self._encoding = None
+        self._gzbody = None
+        self._compressing = None
+        self._digest = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def _encode(self):
+        return dumpb(self.data)
+
+    @property
+    def body(self):
+        if self._body is None:
+            self._body = self._encode()
+
+        return self._body
+
+    async def encode(self):
+        if self._body is not None:
+            return self._body
+
+        if not isinstance(self.data, list) or len(self.data) < PAYLOAD_THREAD_RECORDS:
+            return self.body
+
+        if self._encoding is None:
+            loop = asyncio.get_event_loop()
+            self._encoding = loop.run_in_executor(None, self._encode)
+        self._body = await self._encoding
+
+        return self._body
+
+    async def compress(self):
+        """
+            gzip compressed body, always compressed in thread.
+        """
+        if self._gzbody is None:
+            body = await self.encode()
+            if self._compressing is None:
+                loop = asyncio.get_event_loop()
+                self._compressing = loop.run_in_executor(None, functools.partial(gzip.compress, body,
+                                                                                 compresslevel=PAYLOAD_GZIP_LEVEL))
+            self._gzbody = await self._compressing
+
+        return self._gzbody
+
+    def _hash(self):
+        return hashlib.sha256(json.dumps(self.data, sort_keys=True,
+                                         separators=(',', ':')).encode('utf-8')).hexdigest()
+
+    async def digest(self):
+        if self._digest is None:
+            if isinstance(self.data, list) and len(self.data) >= PAYLOAD_THREAD_RECORDS:
+                loop = asyncio.get_event_loop()
+                self._digest = await loop.run_in_executor(None, self._hash)
+            else:
+                self._digest = self._hash()
+
+        return self._digest
+
+
+def payload_data(data):
+    return data.data if isinstance(data, JsonPayload) else data
+
+
+set_backend()
@@ -2,82 +2,125 @@ def filter_dups_noemails(contact_list):
     # does not preserve order needed for test
     # no_dups = list(orderedset(contact_list))
     only_emails = list()
-    no_dups = list()
     visited = set()
     for contact in contact_list:
         if contact in visited:
             continue
-        else:
-            no_dups.append(contact)
         visited.add(contact)
 
-    for contact in no_dups:
         if '@' not in contact:
             continue
 
         if ',' in contact:
-            only_emails = only_emails + contact.split(',')
+            only_emails.extend(contact.split(','))
         elif ';' in contact:
-            only_emails = only_emails + contact.split(';')
+            only_emails.extend(contact.split(';'))
         else:
             only_emails.append(contact)
 
     return only_emails
 
 
+class ContactsIndex(object):
+    """
+        Index of contacts built once per contacts source. Contacts of
+        group entity are deduplicated and split into single emails only
+        the first time they are looked up and reused for every other group
+        with the same subgroup. Endpoint contacts are looked up directly
+        in contacts, by uid-form key and then by hostname+service key, so
+        no other map of endpoints is built.
+    """
+    def __init__(self, contacts):
+        self.contacts = contacts
+        self._emails = dict()
+
+    def __len__(self):
+        return len(self.contacts)
+
+    def group_emails(self, subgroup):
+        emails = self._emails.get(subgroup, None)
+
+        if emails is None:
+            contacts = self.contacts.get(subgroup, None)
+            if not contacts:
+                emails = tuple()
+            elif isinstance(contacts[0], str):
+                emails = tuple(filter_dups_noemails(contacts))
+            else:
+                emails = tuple(filter_dups_noemails(contact['email'] for contact in contacts))
+            self._emails[subgroup] = emails
+
+        return emails
+
+    def endpoint_contacts(self, endpoint):
+        hostname = endpoint['hostname']
+        # uid-form key of hostname_id endpoint, or plain hostname
+        contacts = self.contacts.get(hostname.replace('_', '+', 1), None)
+        if contacts is None:
+            contacts = self.contacts.get(hostname + '+' + endpoint['service'], None)
+
+        return contacts
+
+class ContactsEnricher(object):
+    """
+        Enricher of group and endpoint entities with their contacts used
+        alone or within EnrichmentPipeline.
+    """
+    def __init__(self, contacts, notification_flag=None):
+        self.index = contacts if isinstance(contacts, ContactsIndex) \
+            else ContactsIndex(contacts)
+        self.notification_flag = notification_flag
+
+    def enrich(self, entity):
+        # group_groups topotype
+        if 'subgroup' in entity:
+            emails = self.index.group_emails(entity['subgroup'])
+            if emails:
+                entity['notifications'] = {
+                    'contacts': list(emails),
+                    'enabled': entity['notifications']['enabled'] \
+                        if self.notification_flag else True
+                }
+
+        # group_endpoints topotype
+        else:
+            contact = self.index.endpoint_contacts(entity)
+            if contact is not None:
+                entity['notifications'] = {
+                    'contacts': contact,
+                    'enabled': entity['notifications']['enabled'] \
+                        if self.notification_flag else True
+                }
+
+
 def attach_contacts_topodata(logger, contacts, topodata, notification_flag=None):
     updated_topodata = list()
-    found_contacts = None
+    entity = None
 
     if len(contacts) == 0:
         return topodata
 
+    enricher = ContactsEnricher(contacts, notification_flag)
+    contacts_get = enricher.index.contacts.get
+
     try:
         for entity in topodata:
-            # group_groups topotype
             if 'subgroup' in entity:
-                if entity['subgroup'] in contacts:
-                    emails = list()
-                    for contact in contacts[entity['subgroup']]:
-                        if isinstance(contact, str):
-                            filtered_emails = filter_dups_noemails(contacts[entity['subgroup']])
-                            if filtered_emails:
-                                entity.update(notifications={
-                                    'contacts': filtered_emails,
-                                    'enabled': entity['notifications']['enabled'] \
-                                        if notification_flag else True
-                                })
-                                break
-                        else:
-                            emails.append(contact['email'])
-                    if emails:
-                        filtered_emails = filter_dups_noemails(emails)
-                        if filtered_emails:
-                            entity.update(notifications={
-                                'contacts': filtered_emails,
-                                'enabled': entity['notifications']['enabled'] \
-                                    if notification_flag else True
-                            })
-
-            # group_endpoints topotype
+                enricher.enrich(entity)
+
+            # lookup of ContactsIndex.endpoint_contacts() done in place, as
+            # two calls per endpoint would cost more than the lookup itself
             else:
-                contact_key = None
-
-                lookup_key = entity['hostname'].replace('_', '+', 1)
-                if lookup_key in contacts:
-                    contact_key = lookup_key
-                else:
-                    lookup_key = '{}+{}'.format(entity['hostname'], entity['service'])
-                    if lookup_key in contacts:
-                        contact_key = lookup_key
-
-                if contact_key:
-                    contact = contacts[contact_key]
-                    entity.update(notifications={
+                hostname = entity['hostname']
+                contact = contacts_get(hostname.replace('_', '+', 1), None)
+                if contact is None:
+                    contact = contacts_get(hostname + '+' + entity['service'], None)
+                if contact is not None:
+                    entity['notifications'] = {
                         'contacts': contact,
                         'enabled': entity['notifications']['enabled'] \
                             if notification_flag else True
-                    })
+                    }
 
             updated_topodata.append(entity)
 
@@ -85,7 +128,5 @@ def attach_contacts_topodata(logger, contacts, topodata, notification_flag=None)
         logger.warn('Error joining contacts and topology data: %s' % repr(exc))
         if entity:
             logger.warn('Topology entity: %s' % entity)
-        if found_contacts:
-            logger.warn('Found contacts: %s' % found_contacts)
 
     return updated_topodata
@@ -0,0 +1,39 @@
+from argo_connectors.utils import module_class_name
+
+
+class EnrichmentPipeline(object):
+    """
+        Single pass enrichment of topology entities. Every registered
+        enricher builds its index once, when it's created, and provides
+        enrich(entity) that updates entity in place. Entities are walked
+        only once and all enrichers are applied in order of registration,
+        so new enricher does not add another traversal of topology.
+    """
+    def __init__(self, logger):
+        self.logger = logger
+        self.enrichers = list()
+
+    def register(self, enricher):
+        self.enrichers.append(enricher)
+
+    def run(self, entities):
+        """
+            Apply enrichers on any iterable of entities, packed topology
+            included, and return list of enriched entities.
+        """
+        enriched = list()
+
+        for entity in entities:
+            for enricher in self.enrichers:
+                try:
+                    enricher.enrich(entity)
+
+                except (KeyError, ValueError, TypeError) as exc:
+                    self.logger.warn('{} Customer:{} : Error enriching topology entity with {} - {}'.format(
+                        module_class_name(self), self.logger.customer,
+                        module_class_name(enricher), repr(exc)))
+                    self.logger.warn('Topology entity: %s' % entity)
+
+            enriched.append(entity)
+
+        return enriched
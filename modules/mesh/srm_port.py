@@ -1,29 +1,51 @@
+def add_srm_port(logger, port_dict, res, attribute_name):
+    try:
+        attribute = res[attribute_name][0]
+        start_index = attribute.index('//')
+        colon_index = attribute.index(':', start_index)
+        end_index = attribute.index('/', colon_index)
+        fqdn = attribute[start_index + 2:colon_index]
+        port = attribute[colon_index + 1:end_index]
+
+        port_dict[fqdn] = port
+
+    except ValueError:
+        logger.error('Exception happened while retrieving port from: %s' % res)
+
+
 def load_srm_port_map(logger, ldap_data, attribute_name):
     """
         Returnes a dictionary which maps hostnames to their respective ldap port if such exists
     """
     port_dict = {}
     for res in ldap_data:
-        try:
-            attribute = res[attribute_name][0]
-            start_index = attribute.index('//')
-            colon_index = attribute.index(':', start_index)
-            end_index = attribute.index('/', colon_index)
-            fqdn = attribute[start_index + 2:colon_index]
-            port = attribute[colon_index + 1:end_index]
+        add_srm_port(logger, port_dict, res, attribute_name)
 
-            port_dict[fqdn] = port
+    return port_dict
 
-        except ValueError:
-            logger.error('Exception happened while retrieving port from: %s' % res)
 
-    return port_dict
+class SrmPortEnricher(object):
+    """
+        Enricher of SRM endpoints with port found in LDAP. LDAP entries
+        can be also added one by one as they arrive.
+    """
+    def __init__(self, logger, attributes, ldap_data=()):
+        self.logger = logger
+        self.attributes = attributes
+        self.srm_port_map = load_srm_port_map(logger, ldap_data, attributes)
+
+    def add(self, res):
+        add_srm_port(self.logger, self.srm_port_map, res, self.attributes)
+
+    def enrich(self, endpoint):
+        if endpoint['service'] == 'SRM' and self.srm_port_map.get(endpoint['hostname'], False):
+            endpoint['tags']['info_bdii_SRM2_PORT'] = self.srm_port_map[endpoint['hostname']]
+
 
 def attach_srmport_topodata(logger, attributes, topodata, group_endpoints):
     """
         Get SRM ports from LDAP and put them under tags -> info_srm_port
     """
-    srm_port_map = load_srm_port_map(logger, topodata, attributes)
+    enricher = SrmPortEnricher(logger, attributes, topodata)
     for endpoint in group_endpoints:
-        if endpoint['service'] == 'SRM' and srm_port_map.get(endpoint['hostname'], False):
-            endpoint['tags']['info_bdii_SRM2_PORT'] = srm_port_map[endpoint['hostname']]
+        enricher.enrich(endpoint)
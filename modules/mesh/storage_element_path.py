@@ -8,83 +8,110 @@ def extract_value(key, entry):
         return entry.get(key, None)
 
 
-def update_map_entry(endpoint, mapping, sepath, voname):
-    if endpoint not in mapping:
-        mapping[endpoint] = list()
-        mapping[endpoint].append({
-            'voname': voname,
-            'GlueVOInfoPath': sepath
-        })
-    else:
-        mapping[endpoint].append({
-            'voname': voname,
-            'GlueVOInfoPath': sepath
-        })
+class EndpointPathIndex(object):
+    """
+        Storage paths of VOs for every endpoint kept as ordered mapping of
+        path to VO names, so check whether the path is already known for
+        endpoint is a single lookup.
+    """
+    def __init__(self):
+        self._paths = dict()
 
+    def add(self, endpoint, sepath, vonames):
+        paths = self._paths.setdefault(endpoint, dict())
+        if sepath in paths:
+            return False
 
-def ispath_already_added(endpoint, mapping, sepath):
-    target = None
+        paths[sepath] = vonames
 
-    if endpoint in mapping:
-        target = mapping[endpoint]
-        sepaths = set()
+        return True
 
-        for entry in target:
-            sepaths.add(entry['GlueVOInfoPath'])
+    def vo_paths(self, endpoint):
+        for sepath, vonames in self._paths.get(endpoint, dict()).items():
+            for voname in vonames:
+                yield voname, sepath
 
-        return sepath in sepaths
+    def __contains__(self, endpoint):
+        return endpoint in self._paths
 
-    else:
-        return False
+    def __len__(self):
+        return len(self._paths)
 
+    def as_mapping(self):
+        mapping = dict()
+        for endpoint in self._paths:
+            mapping[endpoint] = [{'voname': voname, 'GlueVOInfoPath': sepath}
+                                 for voname, sepath in self.vo_paths(endpoint)]
 
-def build_map_endpoint_path(logger, bdiidata):
-    mapping = dict()
+        return mapping
+
+
+def add_endpoint_path(index, entry):
+    voname = extract_value('GlueVOInfoAccessControlBaseRule', entry)
+    if isinstance(voname, list):
+        voname = [e for e in voname if 'VO:' in e]
+        if voname:
+            voname = voname[0].split(':')[1]
+        else:
+            return
+
+    sepath = extract_value('GlueVOInfoPath', entry)
+    sepath = sepath[0] if isinstance(sepath, list) else None
+    endpoint = extract_value('GlueSEUniqueID', entry['dn'].rdns)
+
+    if voname and sepath and endpoint:
+        index.add(endpoint, sepath,
+                  voname.split(' ') if ' ' in voname else (voname,))
+
+
+def build_endpoint_path_index(logger, bdiidata):
+    index = EndpointPathIndex()
+    entry = None
 
     try:
         for entry in bdiidata:
-            voname = extract_value('GlueVOInfoAccessControlBaseRule', entry)
-            if isinstance(voname, list):
-                voname = list(filter(lambda e: 'VO:' in e, voname))
-                if voname:
-                    voname = voname[0].split(':')[1]
-                else:
-                    continue
-
-            sepath = extract_value('GlueVOInfoPath', entry)
-            sepath = sepath[0] if isinstance(sepath, list) else None
-            endpoint = extract_value('GlueSEUniqueID', entry['dn'].rdns)
-
-            if (voname and sepath and endpoint
-                and not ispath_already_added(endpoint, mapping, sepath)
-                and ' ' not in voname):
-                update_map_entry(endpoint, mapping, sepath, voname)
-
-            elif (voname and sepath and endpoint
-                and not ispath_already_added(endpoint, mapping, sepath)
-                and ' ' in voname):
-                vonames = voname.split(' ')
-                for vo in vonames:
-                    update_map_entry(endpoint, mapping, sepath, vo)
+            add_endpoint_path(index, entry)
 
     except IndexError as exc:
         logger.error('Error building map of endpoints and storage paths from BDII data: %s' % repr(exc))
         logger.error('LDAP entry: %s' % entry)
 
-    return mapping
+    return index
 
 
-def attach_sepath_topodata(logger, bdii_opts, bdiidata, group_endpoints):
+def build_map_endpoint_path(logger, bdiidata):
+    return build_endpoint_path_index(logger, bdiidata).as_mapping()
+
+
+class SEPathEnricher(object):
     """
-        Get SRM ports from LDAP and put them under tags -> info_srm_port
+        Enricher of endpoints with storage paths of VOs found in LDAP. LDAP
+        entries can be also added one by one as they arrive.
     """
-    endpoint_sepaths = build_map_endpoint_path(logger, bdiidata)
+    def __init__(self, logger, bdiidata=()):
+        self.logger = logger
+        self.endpoint_sepaths = build_endpoint_path_index(logger, bdiidata)
 
-    for endpoint in group_endpoints:
-        if endpoint['hostname'] in endpoint_sepaths:
-            for paths in endpoint_sepaths[endpoint['hostname']]:
-                voname = paths['voname']
-                sepath = paths['GlueVOInfoPath']
+    def add(self, entry):
+        try:
+            add_endpoint_path(self.endpoint_sepaths, entry)
+
+        except IndexError as exc:
+            self.logger.error('Error building map of endpoints and storage paths from BDII data: %s' % repr(exc))
+            self.logger.error('LDAP entry: %s' % entry)
+
+    def enrich(self, endpoint):
+        if endpoint['hostname'] in self.endpoint_sepaths:
+            for voname, sepath in self.endpoint_sepaths.vo_paths(endpoint['hostname']):
                 endpoint['tags'].update({
                     'vo_{}_attr_SE_PATH'.format(voname): sepath
                 })
+
+
+def attach_sepath_topodata(logger, bdii_opts, bdiidata, group_endpoints):
+    """
+        Get SRM ports from LDAP and put them under tags -> info_srm_port
+    """
+    enricher = SEPathEnricher(logger, bdiidata)
+    for endpoint in group_endpoints:
+        enricher.enrich(endpoint)
@@ -1,8 +1,7 @@
 from argo_connectors.exceptions import ConnectorParseError
 from argo_connectors.utils import module_class_name, remove_non_utf
 
-import json
-from json.decoder import JSONDecodeError
+from argo_connectors import jsoncodec
 from unidecode import unidecode
 
 
@@ -16,7 +15,7 @@ class ParseAgoraTopo(object):
     def get_group_groups(self):
         try:
             providers = list()
-            providers_data = json.loads(self.providers)
+            providers_data = jsoncodec.loads(self.providers)
 
             for data in providers_data:
                 subgroup = unidecode(data['epp_bai_id'])
@@ -38,7 +37,7 @@ class ParseAgoraTopo(object):
 
             return providers
 
-        except (KeyError, IndexError, TypeError, AttributeError, AssertionError, JSONDecodeError) as exc:
+        except (KeyError, IndexError, TypeError, AttributeError, AssertionError, jsoncodec.JSONDecodeError) as exc:
             msg = module_class_name(self) + ' Customer:%s : Error parsing Agora Providers feed - %s' % (
                 self.logger.customer, repr(exc).replace('\'', '').replace('\"', ''))
             raise ConnectorParseError(msg)
@@ -49,8 +48,8 @@ class ParseAgoraTopo(object):
     def get_group_endpoints(self):
         try:
             resources = list()
-            providers_data = json.loads(self.providers)
-            resources_data = json.loads(self.resources)
+            providers_data = jsoncodec.loads(self.providers)
+            resources_data = jsoncodec.loads(self.resources)
 
             for data in resources_data:
                 if data['erp_bai_providers_public'] != [] and len(data['erp_bai_providers_public']) > 1:
@@ -126,7 +125,7 @@ class ParseAgoraTopo(object):
 
             return resources
 
-        except (KeyError, IndexError, TypeError, AttributeError, AssertionError, JSONDecodeError) as exc:
+        except (KeyError, IndexError, TypeError, AttributeError, AssertionError, jsoncodec.JSONDecodeError) as exc:
             msg = module_class_name(self) + ' Customer:%s : Error parsing Agora Resources feed - %s' % (
                 self.logger.customer, repr(exc).replace('\'', '').replace('\"', ''))
             raise ConnectorParseError(msg)
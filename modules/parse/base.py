@@ -1,11 +1,15 @@
 import csv
-import json
+import itertools
 from io import StringIO
+from lxml import etree
 from lxml.etree import XMLSyntaxError
 
+from argo_connectors import jsoncodec
 from argo_connectors.utils import module_class_name
 from argo_connectors.exceptions import ConnectorParseError
 
+XML_FEED_CHUNK_SIZE = 64 * 1024
+
 
 class ParseHelpers(object):
     def __init__(self, logger, *args, **kwargs):
@@ -54,6 +58,20 @@ class ParseHelpers(object):
 
         return scopes_list
 
+    def find_children(self, node, tags):
+        """
+            Dispatch direct children of node by tag in a single iteration
+            instead of separate descendant xpath() search for each field.
+            Later occurrence of the same tag wins, like looping over xpath()
+            results does.
+        """
+        found = dict()
+        for child in node:
+            if child.tag in tags:
+                found[child.tag] = child
+
+        return found
+
     def parse_xmltext(self, node):
         try:
             value = node.text
@@ -74,6 +92,11 @@ class ParseHelpers(object):
                     raise ConnectorParseError("{} Customer:{} : No XML data fetched".format(
                         module_class_name(self), self.logger.customer))
 
+            # binary HTTP responses are already bytes that lxml consumes
+            # directly, only str content needs to be encoded
+            if isinstance(data, str):
+                return data.encode('utf-8')
+
             return data
 
         except XMLSyntaxError:
@@ -86,6 +109,90 @@ class ParseHelpers(object):
                 module_class_name(self), self.logger.customer, repr(exc))
             raise ConnectorParseError(msg)
 
+    def parse_xml_tree(self, page):
+        """
+            Parse single page that is either str, bytes or an iterable of
+            bytes chunks. Already parsed tree is returned as it is.
+        """
+        if etree.iselement(page):
+            return page
+
+        if page is None or isinstance(page, (str, bytes)):
+            return etree.fromstring(self.parse_xml(page))
+
+        parser = etree.XMLParser()
+        for chunk in page:
+            parser.feed(chunk)
+
+        return parser.close()
+
+    def parse_xml_documents(self, data):
+        """
+            Parse XML document, or an iterable of paginated documents, into
+            list of lxml trees that can be handed to multiple parsers so
+            that fetched buffer is parsed only once.
+        """
+        if data is None or isinstance(data, (str, bytes)):
+            data = [data]
+
+        return [self.parse_xml_tree(page) for page in data]
+
+    def parse_xml_pages(self, data):
+        """
+            Iterate over top level elements of XML document. Paginated feed
+            is passed as an iterable of pages, each parsed on its own and
+            released once its elements are consumed. Already parsed trees
+            from parse_xml_documents() are walked as they are.
+        """
+        if data is None or isinstance(data, (str, bytes)):
+            data = [data]
+
+        for page in data:
+            for element in self.parse_xml_tree(page):
+                yield element
+
+    def iterparse_xml_pages(self, data, tag):
+        """
+            Constant memory alternative of parse_xml_pages() that yields top
+            level elements with given tag one at a time. Raw pages are fed
+            to XMLPullParser in chunks and every element is cleared together
+            with its preceding siblings once consumer is done with it, so
+            the tree never grows beyond a single element. Page can also be
+            an iterable of bytes chunks as they arrive from the network.
+        """
+        if data is None or isinstance(data, (str, bytes)):
+            data = [data]
+
+        for page in data:
+            if etree.iselement(page):
+                for element in page.iterchildren(tag):
+                    yield element
+                continue
+
+            if page is None or isinstance(page, (str, bytes)):
+                page = self.parse_xml(page)
+                chunks = (page[i:i + XML_FEED_CHUNK_SIZE]
+                          for i in range(0, len(page), XML_FEED_CHUNK_SIZE))
+            else:
+                chunks = page
+
+            parser = etree.XMLPullParser(events=('end',), tag=tag)
+            for chunk in chunks:
+                parser.feed(chunk)
+                yield from self._pull_xml_elements(parser)
+            parser.close()
+            yield from self._pull_xml_elements(parser)
+
+    def _pull_xml_elements(self, parser):
+        for _, element in parser.read_events():
+            parent = element.getparent()
+            if parent is None or parent.getparent() is not None:
+                continue
+            yield element
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+
     def parse_json(self, data):
         try:
             if data is None:
@@ -96,7 +203,7 @@ class ParseHelpers(object):
                     raise ConnectorParseError("{} Customer:{} : No JSON data fetched".format(
                         module_class_name(self), self.logger.customer))
 
-            return json.loads(data)
+            return jsoncodec.loads(data)
 
         except ValueError as exc:
             msg = '{} Customer:{} : Error parsing JSON feed - {}'.format(
@@ -108,28 +215,34 @@ class ParseHelpers(object):
                 module_class_name(self), self.logger.customer, repr(exc))
             raise ConnectorParseError(msg)
 
-    def csv_to_json(self, data):
-        data = StringIO(data)
-        reader = csv.reader(data, delimiter=',')
-
-        num_row = 0
-        results = []
-        header = []
-        for row in reader:
-            if num_row == 0:
-                header = row
-                num_row = num_row + 1
-                continue
-            num_item = 0
-            datum = {}
-
-            for item in header:
-                datum[item] = row[num_item]
-                num_item = num_item + 1
-            results.append(datum)
-
-        if not results:
+    def iter_csv(self, data):
+        """
+            Yield rows of CSV feed one at a time as dicts keyed by header
+            fields. Feed is either str or an iterable of lines, so rows are
+            read lazily and the whole feed is never held as list of dicts.
+        """
+        if isinstance(data, str):
+            data = StringIO(data)
+
+        empty = True
+        for row in csv.DictReader(data, delimiter=','):
+            empty = False
+            yield row
+
+        if empty:
             msg = '{} Customer:{} : Error parsing CSV feed - empty data'.format(
                 module_class_name(self), self.logger.customer)
             raise ConnectorParseError(msg)
-        return results
+
+    def csv_rows(self, data):
+        """
+            Lazy iterator of CSV feed rows like iter_csv() with the first
+            row already read, so that empty feed is reported right away.
+        """
+        rows = self.iter_csv(data)
+        first = next(rows)
+
+        return itertools.chain((first,), rows)
+
+    def csv_to_json(self, data):
+        return list(self.iter_csv(data))
@@ -3,12 +3,22 @@ from argo_connectors.utils import construct_fqdn
 from urllib.parse import urlparse
 
 
+def add_contact(contacts, entity, uidservendp=False):
+    if uidservendp:
+        key = '{}_{}+{}'.format(construct_fqdn(entity['URL']), entity['Service Unique ID'], entity['SERVICE_TYPE'])
+    else:
+        key = '{}+{}'.format(construct_fqdn(entity['URL']), entity['SERVICE_TYPE'])
+
+    value = entity['CONTACT_EMAIL']
+    contacts[key] = [value] if not type(value) == list else value
+
+
 class ParseContacts(ParseHelpers):
     def __init__(self, logger, data, uidservendp=False, is_csv=False):
         self.logger = logger
         self.uidservendp = uidservendp
         if is_csv:
-            self.data = self.csv_to_json(data)
+            self.data = self.csv_rows(data)
         else:
             self.data = self.parse_json(data)
 
@@ -16,12 +26,6 @@ class ParseContacts(ParseHelpers):
         contacts = dict()
 
         for entity in self.data:
-            if self.uidservendp:
-                key = '{}_{}+{}'.format(construct_fqdn(entity['URL']), entity['Service Unique ID'], entity['SERVICE_TYPE'])
-            else:
-                key = '{}+{}'.format(construct_fqdn(entity['URL']), entity['SERVICE_TYPE'])
-
-            value = entity['CONTACT_EMAIL']
-            contacts[key] = [value] if not type(value) == list else value
+            add_contact(contacts, entity, self.uidservendp)
 
         return contacts
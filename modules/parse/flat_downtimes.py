@@ -12,7 +12,7 @@ from argo_connectors.utils import module_class_name
 class ParseDowntimes(ParseHelpers):
     def __init__(self, logger, data, current_date, uid=False):
         self.logger = logger
-        self.data = self.csv_to_json(data)
+        self.data = self.csv_rows(data)
         self.start = current_date
         self.end = current_date.replace(hour=23, minute=59, second=59)
         self.uid = uid
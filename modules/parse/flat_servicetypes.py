@@ -21,7 +21,7 @@ class ParseFlatServiceTypes(ParseHelpers):
     def get_data(self):
         try:
             services = list()
-            already_added = list()
+            already_added = set()
 
             for entity in self.data:
                 target_key = None
@@ -38,7 +38,7 @@ class ParseFlatServiceTypes(ParseHelpers):
                     continue
                 else:
                     services.append(tmp_dict)
-                already_added.append(tmp_dict['name'])
+                already_added.add(tmp_dict['name'])
 
             return services
 
@@ -1,5 +1,6 @@
 from argo_connectors.exceptions import ConnectorParseError
 from argo_connectors.parse.base import ParseHelpers
+from argo_connectors.parse.flat_contacts import add_contact
 from argo_connectors.utils import  construct_fqdn
 
 
@@ -12,69 +13,111 @@ class ParseFlatEndpoints(ParseHelpers):
         self.project = project
         self.is_csv = is_csv
         self.scope = scope if scope else project
+        self._data = None
         try:
             if is_csv:
-                self.data = self.csv_to_json(data)
+                self.rows = self.csv_rows(data)
             else:
-                self.data = self.parse_json(data)
+                self.rows = iter(self.parse_json(data))
 
         except ConnectorParseError as exc:
             raise exc
 
+    @property
+    def data(self):
+        # rows are read from feed only once, get_topology() keeps the ones
+        # it walked so later calls see the same feed
+        if self._data is None:
+            self._data = list(self.rows)
+
+        return self._data
+
+    def _feed_error(self, exc):
+        feedtype = 'CSV' if self.is_csv else 'JSON'
+        msg = 'Customer:%s : Error parsing %s feed - %s' % (self.logger.customer, feedtype, repr(exc).replace('\'', '').replace('\"', ''))
+        return ConnectorParseError(msg)
+
+    def _groupgroup(self, entity):
+        return {
+            'type': 'PROJECT',
+            'group': self.project,
+            'subgroup': entity['SITENAME-SERVICEGROUP'],
+            'tags': {'monitored': '1', 'scope': self.scope}
+        }
+
+    def _groupendpoint(self, entity):
+        tmp_dict = dict()
+
+        tmp_dict['type'] = self.fetchtype.upper()
+        tmp_dict['group'] = entity['SITENAME-SERVICEGROUP']
+        tmp_dict['service'] = entity['SERVICE_TYPE']
+        info_url = entity['URL']
+        if self.uidservendp:
+            tmp_dict['hostname'] = '{1}_{0}'.format(entity['Service Unique ID'], construct_fqdn(info_url))
+        else:
+            tmp_dict['hostname'] = construct_fqdn(entity['URL'])
+
+        tmp_dict['tags'] = {'scope': self.project,
+                            'monitored': '1',
+                            'info_URL': info_url}
+        if self.uidservendp:
+            tmp_dict['tags'].update({'hostname': construct_fqdn(entity['URL'])})
+
+        tmp_dict['tags'].update({'info_ID': str(entity['Service Unique ID'])})
+
+        return tmp_dict
+
     def get_groupgroups(self):
         try:
             groups = list()
-            already_added = list()
+            already_added = set()
 
             for entity in self.data:
-                tmp_dict = dict()
-
-                tmp_dict['type'] = 'PROJECT'
-                tmp_dict['group'] = self.project
-                tmp_dict['subgroup'] = entity['SITENAME-SERVICEGROUP']
-                tmp_dict['tags'] = {'monitored': '1', 'scope': self.scope}
-
-                if tmp_dict['subgroup'] in already_added:
+                if entity['SITENAME-SERVICEGROUP'] in already_added:
                     continue
-                else:
-                    groups.append(tmp_dict)
-                already_added.append(tmp_dict['subgroup'])
+                groups.append(self._groupgroup(entity))
+                already_added.add(entity['SITENAME-SERVICEGROUP'])
 
             return groups
 
         except (KeyError, IndexError, TypeError, AttributeError, AssertionError) as exc:
-            feedtype = 'CSV' if self.is_csv else 'JSON'
-            msg = 'Customer:%s : Error parsing %s feed - %s' % (self.logger.customer, feedtype, repr(exc).replace('\'', '').replace('\"', ''))
-            raise ConnectorParseError(msg)
+            raise self._feed_error(exc)
 
     def get_groupendpoints(self):
         try:
             groups = list()
 
             for entity in self.data:
-                tmp_dict = dict()
-
-                tmp_dict['type'] = self.fetchtype.upper()
-                tmp_dict['group'] = entity['SITENAME-SERVICEGROUP']
-                tmp_dict['service'] = entity['SERVICE_TYPE']
-                info_url = entity['URL']
-                if self.uidservendp:
-                    tmp_dict['hostname'] = '{1}_{0}'.format(entity['Service Unique ID'], construct_fqdn(info_url))
-                else:
-                    tmp_dict['hostname'] = construct_fqdn(entity['URL'])
-
-                tmp_dict['tags'] = {'scope': self.project,
-                                    'monitored': '1',
-                                    'info_URL': info_url}
-                if self.uidservendp:
-                    tmp_dict['tags'].update({'hostname': construct_fqdn(entity['URL'])})
-
-                tmp_dict['tags'].update({'info_ID': str(entity['Service Unique ID'])})
-                groups.append(tmp_dict)
+                groups.append(self._groupendpoint(entity))
 
             return groups
 
         except (KeyError, IndexError, TypeError, AttributeError, AssertionError) as exc:
-            feedtype = 'CSV' if self.is_csv else 'JSON'
-            msg = 'Customer:%s : Error parsing %s feed - %s' % (self.logger.customer, feedtype, repr(exc).replace('\'', '').replace('\"', ''))
-            raise ConnectorParseError(msg)
+            raise self._feed_error(exc)
+
+    def get_topology(self, with_contacts=False):
+        """
+            Build groups, endpoints and, if asked, endpoint contacts in
+            a single pass over feed rows. CSV feed is parsed lazily and only
+            once, walked rows are kept for repeated calls and other getters.
+        """
+        try:
+            groups, endpoints, contacts = list(), list(), dict()
+            already_added = set()
+            rows = list()
+
+            for entity in (self._data if self._data is not None else self.rows):
+                rows.append(entity)
+                if entity['SITENAME-SERVICEGROUP'] not in already_added:
+                    groups.append(self._groupgroup(entity))
+                    already_added.add(entity['SITENAME-SERVICEGROUP'])
+                endpoints.append(self._groupendpoint(entity))
+                if with_contacts:
+                    add_contact(contacts, entity, self.uidservendp)
+
+            self._data = rows
+
+            return groups, endpoints, contacts
+
+        except (KeyError, IndexError, TypeError, AttributeError, AssertionError) as exc:
+            raise self._feed_error(exc)
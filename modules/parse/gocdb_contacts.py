@@ -1,4 +1,3 @@
-from lxml import etree
 from lxml.etree import XMLSyntaxError
 
 from argo_connectors.parse.base import ParseHelpers
@@ -24,11 +23,7 @@ class ParseContacts(ParseHelpers):
         try:
             sites_contacts = dict()
 
-            doc = self.parse_xml(data)
-            xml_bytes = doc.encode("utf-8")
-            elements = etree.fromstring(xml_bytes)
-
-            for element in elements:
+            for element in self.parse_xml_pages(data):
                 sitename, contact = None, None
                 for child in element:
                     if child.tag == 'CONTACT_EMAIL':
@@ -60,11 +55,7 @@ class ParseContacts(ParseHelpers):
         try:
             endpoints_contacts = dict()
 
-            doc = self.parse_xml(data)
-            xml_bytes = doc.encode("utf-8")
-            elements = etree.fromstring(xml_bytes)
-
-            for element in elements:
+            for element in self.parse_xml_pages(data):
                 name, contact = None, None
                 for child in element:
                     if child.tag == 'NAME':
@@ -83,38 +74,36 @@ class ParseContacts(ParseHelpers):
                               (self.logger.customer, repr(exc).replace('\'', '').replace('\"', '')))
             raise exc
 
-    def parse_serviceendpoint_contacts(self, data):
-        try:
-            endpoints_contacts = dict()
+    def parse_serviceendpoint_contact(self, element, endpoints_contacts):
+        fqdn, contact, servtype = None, None, None
 
-            doc = self.parse_xml(data)
-            xml_bytes = doc.encode("utf-8")
-            elements = etree.fromstring(xml_bytes)
+        for child in element:
+            if child.tag == 'HOSTNAME':
+                fqdn = child.text
 
-            for element in elements:
+            if child.tag == 'CONTACT_EMAIL':
+                contact = child.text
 
-                fqdn, contact, servtype = None, None, None
+            if child.tag == 'SERVICE_TYPE':
+                servtype = child.text
 
-                for child in element:
-                    if child.tag == 'HOSTNAME':
-                        fqdn = child.text
-
-                    if child.tag == 'CONTACT_EMAIL':
-                        contact = child.text
+        if contact != None:
+            if ';' in contact:
+                lcontacts = list()
+                for single_contact in contact.split(';'):
+                    lcontacts.append(single_contact)
+                endpoints_contacts['{}+{}'.format(
+                    fqdn, servtype)] = lcontacts
+            else:
+                endpoints_contacts['{}+{}'.format(fqdn, servtype)] = [
+                    contact]
 
-                    if child.tag == 'SERVICE_TYPE':
-                        servtype = child.text
+    def parse_serviceendpoint_contacts(self, data):
+        try:
+            endpoints_contacts = dict()
 
-                if contact != None:
-                    if ';' in contact:
-                        lcontacts = list()
-                        for single_contact in contact.split(';'):
-                            lcontacts.append(single_contact)
-                        endpoints_contacts['{}+{}'.format(
-                            fqdn, servtype)] = lcontacts
-                    else:
-                        endpoints_contacts['{}+{}'.format(fqdn, servtype)] = [
-                            contact]
+            for element in self.iterparse_xml_pages(data, 'SERVICE_ENDPOINT'):
+                self.parse_serviceendpoint_contact(element, endpoints_contacts)
 
             return endpoints_contacts
 
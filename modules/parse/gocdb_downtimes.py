@@ -8,6 +8,9 @@ from argo_connectors.parse.base import ParseHelpers
 
 
 class ParseDowntimes(ParseHelpers):
+    downtime_tags = frozenset(['HOSTNAME', 'SERVICE_TYPE', 'FORMATED_START_DATE',
+                               'FORMATED_END_DATE', 'SEVERITY', 'PRIMARY_KEY'])
+
     def __init__(self, logger, data, start, end, uid=False):
 
         self.logger = logger
@@ -20,33 +23,19 @@ class ParseDowntimes(ParseHelpers):
         filtered_downtimes = list()
 
         try:
-            doc = self.parse_xml(self.data)
-            xml_bytes = doc.encode("utf-8")
+            xml_bytes = self.parse_xml(self.data)
             root = etree.fromstring(xml_bytes)
 
             for downtimes in root:
                 classification = downtimes.attrib['CLASSIFICATION']
-     
-                for downtime in downtimes.xpath('.//HOSTNAME'):
-                    hostname = downtime.text
-
-                for downtime in downtimes.xpath('.//SERVICE_TYPE'):
-                    service_type = downtime.text
-
-                for downtime in downtimes.xpath('.//FORMATED_START_DATE'):
-                    start_str = downtime.text
-
-                for downtime in downtimes.xpath('.//FORMATED_END_DATE'):
-                    end_str = downtime.text
-
-                for downtime in downtimes.xpath('.//SEVERITY'):
-                    severity = downtime.text
-
-                try:
-                    for downtime in downtimes.xpath('.//PRIMARY_KEY'):
-                        service_id = downtime.text
-                except ImportError:
-                    service_id = downtime.getAttribute('PRIMARY_KEY')
+                children = self.find_children(downtimes, self.downtime_tags)
+
+                hostname = children['HOSTNAME'].text
+                service_type = children['SERVICE_TYPE'].text
+                start_str = children['FORMATED_START_DATE'].text
+                end_str = children['FORMATED_END_DATE'].text
+                severity = children['SEVERITY'].text
+                service_id = children['PRIMARY_KEY'].text
 
                 start_time = datetime.datetime.strptime(
                     start_str, "%Y-%m-%d %H:%M")
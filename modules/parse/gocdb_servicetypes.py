@@ -15,8 +15,7 @@ class ParseGocdbServiceTypes(ParseHelpers):
         all_service_type = list()
 
         try:
-            doc = self.parse_xml(self.data)
-            xml_bytes = doc.encode("utf-8")
+            xml_bytes = self.parse_xml(self.data)
             service_types = etree.fromstring(xml_bytes)
 
             for service in service_types:
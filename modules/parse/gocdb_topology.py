@@ -1,4 +1,3 @@
-from lxml import etree
 from lxml.etree import XMLSyntaxError
 
 from argo_connectors.parse.base import ParseHelpers
@@ -7,6 +6,9 @@ from argo_connectors.exceptions import ConnectorParseError
 
 
 class ParseSites(ParseHelpers):
+    site_tags = frozenset(['PRODUCTION_INFRASTRUCTURE', 'CERTIFICATION_STATUS',
+                           'ROC', 'NOTIFICATIONS', 'EXTENSIONS'])
+
     def __init__(self, logger, data, custname, uid=False,
                  pass_extensions=False, notification_flag=False):
         super().__init__(logger)
@@ -21,29 +23,25 @@ class ParseSites(ParseHelpers):
 
     def _parse_data(self):
         try:
-            doc = self.parse_xml(self.data)
-            xml_bytes = doc.encode("utf-8")
-            sites = etree.fromstring(xml_bytes)
-
-            for site in sites:
+            for site in self.parse_xml_pages(self.data):
                 if site.tag != 'meta':
                     site_name = site.attrib["NAME"]
                     if site_name not in self._sites:
                         self._sites[site_name] = {'site': site_name}
 
-                    for prod_in in site.xpath('.//PRODUCTION_INFRASTRUCTURE'):
-                        production_infra = prod_in.text
-                        if production_infra:
-                            self._sites[site_name]['infrastructure'] = production_infra
+                    children = self.find_children(site, self.site_tags)
 
-                    for cert_st in site.xpath('.//CERTIFICATION_STATUS'):
-                        certification_status = cert_st.text
-                        if certification_status:
-                            self._sites[site_name]['certification'] = certification_status
+                    prod_in = children.get('PRODUCTION_INFRASTRUCTURE')
+                    if prod_in is not None and prod_in.text:
+                        self._sites[site_name]['infrastructure'] = prod_in.text
 
-                    for roc in site.xpath('.//ROC'):
-                        if roc != None:
-                            self._sites[site_name]['ngi'] = roc.text
+                    cert_st = children.get('CERTIFICATION_STATUS')
+                    if cert_st is not None and cert_st.text:
+                        self._sites[site_name]['certification'] = cert_st.text
+
+                    roc = children.get('ROC')
+                    if roc is not None:
+                        self._sites[site_name]['ngi'] = roc.text
 
                     try:
                         if site.attrib["ROC"] != None:
@@ -54,26 +52,17 @@ class ParseSites(ParseHelpers):
                     self._sites[site_name]['scope'] = ', '.join(
                         self.parse_scopes(site))
 
-                    if self.notification_flag:
-                        try:
-                            for notification in site.xpath('NOTIFICATIONS'):
-                                notification = notification.text
-                                notification = True if notification.lower(
-                                ) == 'true' or notification.lower() == 'y' else False
+                    if self.notification_flag and 'NOTIFICATIONS' in children:
+                        notification = children['NOTIFICATIONS'].text
+                        notification = True if notification.lower(
+                        ) == 'true' or notification.lower() == 'y' else False
 
-                                self._sites[site_name]['notification'] = notification
-                        except IndexError:
-                            self._sites[site_name]['notification'] = True
+                        self._sites[site_name]['notification'] = notification
 
                     # biomed feed does not have extensions
-                    if self.pass_extensions:
-                        try:
-                            for ext in site:
-                                if ext.tag == 'EXTENSIONS':
-                                    self._sites[site_name]['extensions'] = self.parse_extensions(
-                                        ext)
-                        except IndexError:
-                            pass
+                    if self.pass_extensions and 'EXTENSIONS' in children:
+                        self._sites[site_name]['extensions'] = self.parse_extensions(
+                            children['EXTENSIONS'])
 
         except (KeyError, IndexError, TypeError, AttributeError, AssertionError, XMLSyntaxError) as exc:
             msg = module_class_name(self) + ' Customer:%s : Error parsing sites feed - %s' % (
@@ -111,10 +100,27 @@ class ParseSites(ParseHelpers):
 
 
 class ParseServiceEndpoints(ParseHelpers):
+    """
+        Service endpoints feed is streamed with iterparse_xml_pages() so only
+        one SERVICE_ENDPOINT element is held in memory at a time. on_element
+        callable is invoked with every element while it's still populated
+        so other data, like contacts, can be extracted in the same pass.
+    """
+    endpoint_tags = frozenset(['HOSTNAME', 'SERVICE_TYPE', 'HOSTDN',
+                               'NODE_MONITORED', 'IN_PRODUCTION', 'SITENAME',
+                               'ROC_NAME', 'URL', 'NOTIFICATIONS',
+                               'EXTENSIONS', 'ENDPOINTS'])
+    endpoint_fields = [('HOSTNAME', 'hostname'), ('SERVICE_TYPE', 'type'),
+                       ('HOSTDN', 'hostdn'), ('NODE_MONITORED', 'monitored'),
+                       ('IN_PRODUCTION', 'production'), ('SITENAME', 'site'),
+                       ('ROC_NAME', 'roc')]
+
     def __init__(self, logger, data=None, custname=None, uid=False,
-                 pass_extensions=False, notification_flag=False):
+                 pass_extensions=False, notification_flag=False,
+                 on_element=None):
         super().__init__(logger)
         self.data = data
+        self.on_element = on_element
         self.uidservendp = uid
         self.custname = custname
         self.pass_extensions = pass_extensions
@@ -125,36 +131,19 @@ class ParseServiceEndpoints(ParseHelpers):
 
     def _parse_data(self):
         try:
-            doc = self.parse_xml(self.data)
-            xml_bytes = doc.encode("utf-8")
-            services = etree.fromstring(xml_bytes)
-
-            for service in services:
+            for service in self.iterparse_xml_pages(self.data, 'SERVICE_ENDPOINT'):
                 if service.tag != 'meta':
+                    if self.on_element:
+                        self.on_element(service)
                     service_id = service.attrib["PRIMARY_KEY"]
                     if service_id not in self._service_endpoints:
                         self._service_endpoints[service_id] = {}
 
-                    for serv_endpnts in service.xpath('.//HOSTNAME'):
-                        self._service_endpoints[service_id]['hostname'] = self.parse_xmltext(serv_endpnts)
-
-                    for serv_types in service.xpath('.//SERVICE_TYPE'):
-                        self._service_endpoints[service_id]['type'] = self.parse_xmltext(serv_types)
-
-                    for hostdn in service.xpath('.//HOSTDN'):
-                        self._service_endpoints[service_id]['hostdn'] = self.parse_xmltext(hostdn)
+                    children = self.find_children(service, self.endpoint_tags)
 
-                    for node_mon in service.xpath('.//NODE_MONITORED'):
-                        self._service_endpoints[service_id]['monitored'] = self.parse_xmltext(node_mon)
-
-                    for in_prod in service.xpath('.//IN_PRODUCTION'):
-                        self._service_endpoints[service_id]['production'] = self.parse_xmltext(in_prod)
-
-                    for site_name in service.xpath('.//SITENAME'):
-                        self._service_endpoints[service_id]['site'] = self.parse_xmltext(site_name)
-
-                    for roc_name in service.xpath('.//ROC_NAME'):
-                        self._service_endpoints[service_id]['roc'] = self.parse_xmltext(roc_name)
+                    for tag, field in self.endpoint_fields:
+                        if tag in children:
+                            self._service_endpoints[service_id][field] = self.parse_xmltext(children[tag])
 
                     self._service_endpoints[service_id]['service_id'] = service_id
 
@@ -165,31 +154,19 @@ class ParseServiceEndpoints(ParseHelpers):
                         '-' + self._service_endpoints[service_id]['type'] + \
                         '-' + self._service_endpoints[service_id]['site']
 
-                    self._service_endpoints[service_id]['url'] = service.find(
-                        'URL').text
+                    self._service_endpoints[service_id]['url'] = children['URL'].text
 
-                    if self.notification_flag:
-                        for notification in service.xpath('NOTIFICATIONS'):
-                            if notification is not None:
-                                notification = notification.text
-                                notification = True if notification.lower() == 'true' or notification.lower() == 'y' else False
-                                self._service_endpoints[service_id]['notification'] = notification
-                            else:
-                                self._service_endpoints[service_id]['notification'] = True
+                    if self.notification_flag and 'NOTIFICATIONS' in children:
+                        notification = children['NOTIFICATIONS'].text
+                        notification = True if notification.lower() == 'true' or notification.lower() == 'y' else False
+                        self._service_endpoints[service_id]['notification'] = notification
 
                     if self.pass_extensions:
-                        extension_node = None
-                        extnodes = service.xpath('.//EXTENSIONS')
-                        for node in extnodes:
-                            parent = node.getparent()
-                            if parent.tag == 'SERVICE_ENDPOINT':
-                                extension_node = node
-                        extensions = self.parse_extensions(extension_node)
+                        extensions = self.parse_extensions(children.get('EXTENSIONS'))
                         self._service_endpoints[service_id]['extensions'] = extensions
 
-                    url = service.find('.//ENDPOINTS')
                     self._service_endpoints[service_id]['endpoint_urls'] = self.parse_url_endpoints(
-                        url)
+                        children.get('ENDPOINTS'))
 
         except (KeyError, IndexError, TypeError, AttributeError, AssertionError, XMLSyntaxError) as exc:
             msg = module_class_name(self) + ' Customer:%s : Error parsing topology service endpoint feed - %s' % (
@@ -264,10 +241,7 @@ class ParseServiceGroups(ParseHelpers):
 
     def _parse_data(self):
         try:
-            doc = self.parse_xml(self.data)
-            xml_bytes = doc.encode("utf-8")
-            groups = etree.fromstring(xml_bytes)
-            for group in groups:
+            for group in self.parse_xml_pages(self.data):
                 if group.tag != 'meta':
                     group_id = group.attrib["PRIMARY_KEY"]
                     if group_id not in self._service_groups:
@@ -1,10 +1,11 @@
 import asyncio
 from urllib.parse import urlparse
 
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
 from argo_connectors.io.webapi import WebAPI
+from argo_connectors.jsoncodec import JsonPayload
 from argo_connectors.parse.agora_topology import ParseAgoraTopo
-from argo_connectors.tasks.common import write_topo_json as write_json, write_state
+from argo_connectors.tasks.common import build_publish_state, webapi_batch_opts, webapi_compress, write_topo_json as write_json, write_state
 from argo_connectors.exceptions import ConnectorError, ConnectorHttpError
 
 
@@ -18,7 +19,7 @@ def contains_exception(list):
 
 class TaskProviderTopology(object):
     def __init__(self, loop, logger, connector_name, globopts, webapi_opts,
-                 confcust, uidservendp, fetchtype, fixed_date):
+                 confcust, uidservendp, fetchtype, fixed_date, force_publish=False):
         self.loop = loop
         self.logger = logger
         self.connector_name = connector_name
@@ -28,6 +29,8 @@ class TaskProviderTopology(object):
         self.uidservendp = uidservendp
         self.fixed_date = fixed_date
         self.fetchtype = fetchtype
+        self.http_registry = SessionRegistry(globopts)
+        self.publish_state = build_publish_state(globopts, confcust, force_publish)
 
 
     def parse_source_topo(self, resources, providers):
@@ -36,7 +39,7 @@ class TaskProviderTopology(object):
         return topo.get_group_groups(), topo.get_group_endpoints()
 
 
-    async def send_webapi(self, webapi_opts, data, topotype, fixed_date=None):
+    async def send_webapi(self, webapi_opts, sends, fixed_date=None):
         webapi = WebAPI(self.connector_name, webapi_opts['webapihost'],
                         webapi_opts['webapitoken'], self.logger,
                         int(self.globopts['ConnectionRetry'.lower()]),
@@ -44,14 +47,18 @@ class TaskProviderTopology(object):
                         int(self.globopts['ConnectionSleepRetry'.lower()]),
                         self.globopts['ConnectionRetryRandom'.lower()],
                         int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
-                        date=fixed_date)
+                        date=fixed_date, registry=self.http_registry,
+                        publish_state=self.publish_state,
+                        compress=webapi_compress(webapi_opts),
+                        **webapi_batch_opts(webapi_opts))
 
-        await webapi.send(data, topotype)
+        await webapi.send_many(sends)
 
 
     async def fetch_data(self, feed):
         remote_topo = urlparse(feed)
-        session = SessionWithRetry(self.logger, self.logger.customer, self.globopts, handle_session_close=True)
+        session = SessionWithRetry(self.logger, self.logger.customer, self.globopts, handle_session_close=True,
+                                   registry=self.http_registry)
         headers = {
             "Accept": "application/json",
         }
@@ -95,15 +102,21 @@ class TaskProviderTopology(object):
             numgg = len(group_providers)
             numge = len(group_resources)
 
+            # encoded only once for WEB-API and JSON file
+            group_providers = JsonPayload(group_providers)
+            group_resources = JsonPayload(group_resources)
+
             # send concurrently to WEB-API in coroutines
+            coros = list()
             if eval(self.globopts['GeneralPublishWebAPI'.lower()]):
-                await asyncio.gather(
-                        self.send_webapi(self.webapi_opts, group_resources, 'endpoints', self.fixed_date),
-                        self.send_webapi(self.webapi_opts, group_providers, 'groups', self.fixed_date),
-                        loop=self.loop
-                )
+                coros.append(self.send_webapi(self.webapi_opts, [(group_resources, 'endpoints'),
+                                                                 (group_providers, 'groups')],
+                                              self.fixed_date))
 
             if eval(self.globopts['GeneralWriteJson'.lower()]):
-                write_json(self.logger, self.globopts, self.confcust, group_providers, group_resources, self.fixed_date)
+                coros.append(write_json(self.logger, self.globopts, self.confcust, group_providers, group_resources, self.fixed_date))
+
+            await asyncio.gather(*coros, loop=self.loop)
 
-            self.logger.info('Customer:' + self.logger.customer + ' Fetched Endpoints:%d' % (numge) + ' Groups(%s):%d' % (self.fetchtype, numgg))
+            publish_summary = ' ' + self.publish_state.summary() if self.publish_state else ''
+            self.logger.info('Customer:' + self.logger.customer + ' Fetched Endpoints:%d' % (numge) + ' Groups(%s):%d' % (self.fetchtype, numgg) + publish_summary)
@@ -1,6 +1,14 @@
+from argo_connectors.io.httpcache import HttpCache
+from argo_connectors.io.publishstate import PublishState
+from argo_connectors.io.resourceids import ResourceIds
 from argo_connectors.io.statewrite import state_write
 from argo_connectors.utils import filename_date, datestamp, date_check
-from argo_connectors.io.jsonwrite import JsonWriter
+from argo_connectors.io.jsonwrite import JsonStreamWriter, NdjsonWriter
+
+
+async def run_task(task):
+    async with task.http_registry:
+        await task.run()
 
 
 async def write_state(connector_name, globopts, confcust, fixed_date, state):
@@ -16,6 +24,58 @@ async def write_state(connector_name, globopts, confcust, fixed_date, state):
                           globopts['InputStateDays'.lower()])
 
 
+def build_http_cache(globopts, confcust):
+    if globopts.get('InputStateHttpCache'.lower(), 'False') != 'True':
+        return None
+    cust = list(confcust.get_customers())[0]
+    cachedir = confcust.get_fullstatedir(
+        globopts['InputStateSaveDir'.lower()], cust)
+    return HttpCache(cachedir + '/httpcache',
+                     globopts['InputStateDays'.lower()])
+
+
+def build_publish_state(globopts, confcust, force=False):
+    if globopts.get('InputStatePublishSkipUnchanged'.lower(), 'False') != 'True':
+        return None
+    cust = list(confcust.get_customers())[0]
+    statedir = confcust.get_fullstatedir(
+        globopts['InputStateSaveDir'.lower()], cust)
+    return PublishState(statedir + '/publish',
+                        globopts['InputStateDays'.lower()], force)
+
+
+def build_resource_ids(globopts, confcust, cust):
+    if globopts.get('InputStateResourceIdCache'.lower(), 'False') != 'True':
+        return None
+    statedir = confcust.get_fullstatedir(
+        globopts['InputStateSaveDir'.lower()], cust)
+    return ResourceIds(statedir + '/webapi')
+
+
+def webapi_batch_opts(webapi_opts):
+    batch_size = str(webapi_opts.get('WebAPIBatchSize'.lower(), '0'))
+    batch_concurrency = str(webapi_opts.get('WebAPIBatchConcurrency'.lower(), '4'))
+
+    return {
+        'batch_size': int(batch_size) if batch_size.isdigit() else 0,
+        'batch_concurrency': int(batch_concurrency) if batch_concurrency.isdigit() else 4
+    }
+
+
+def webapi_compress(webapi_opts):
+    return webapi_opts.get('WebAPICompress'.lower(), 'False') == 'True'
+
+
+def build_json_writer(globopts, data, filename, index_keys=None):
+    if index_keys and globopts.get('OutputFormat'.lower(), 'json') == 'ndjson':
+        return NdjsonWriter(data, filename, globopts['generalcompressjson'],
+                            index_keys)
+
+    compact = globopts.get('GeneralCompactJson'.lower(), 'False') == 'True'
+    return JsonStreamWriter(data, filename, globopts['generalcompressjson'],
+                            compact)
+
+
 async def write_weights_metricprofile_state(connector_name, globopts, cust, job, confcust, fixed_date, state):
     jobstatedir = confcust.get_fullstatedir(
         globopts['InputStateSaveDir'.lower()], cust, job)
@@ -28,7 +88,7 @@ async def write_weights_metricprofile_state(connector_name, globopts, cust, job,
                           globopts['InputStateDays'.lower()])
 
 
-def write_metricprofile_json(logger, globopts, cust, job, confcust, fixed_date, fetched_profiles):
+async def write_metricprofile_json(logger, globopts, cust, job, confcust, fixed_date, fetched_profiles):
     jobdir = confcust.get_fulldir(cust, job)
     if fixed_date:
         filename = filename_date(logger, globopts['OutputMetricProfile'.lower(
@@ -36,26 +96,26 @@ def write_metricprofile_json(logger, globopts, cust, job, confcust, fixed_date,
     else:
         filename = filename_date(
             logger, globopts['OutputMetricProfile'.lower()], jobdir)
-    json_writer = JsonWriter(fetched_profiles, filename, globopts['generalcompressjson'])
-    ret, excep = json_writer.write_json()
+    json_writer = build_json_writer(globopts, fetched_profiles, filename)
+    ret, excep = await json_writer.write_json_async()
     if not ret:
         logger.error('Customer:%s Job:%s %s' %
                      (logger.customer, logger.job, repr(excep)))
         raise SystemExit(1)
 
 
-def write_downtimes_json(logger, globopts, confcust, dts, timestamp):
+async def write_downtimes_json(logger, globopts, confcust, dts, timestamp):
     custdir = confcust.get_custdir()
     filename = filename_date(
         logger, globopts['OutputDowntimes'.lower()], custdir, stamp=timestamp)
-    json_writer = JsonWriter(dts, filename, globopts['generalcompressjson'])
-    ret, excep = json_writer.write_json()
+    json_writer = build_json_writer(globopts, dts, filename, ('service',))
+    ret, excep = await json_writer.write_json_async()
     if not ret:
         logger.error('Customer:{} {}'.format(logger.customer, repr(excep)))
         raise SystemExit(1)
 
 
-def write_weights_json(logger, globopts, cust, job, confcust, fixed_date, weights):
+async def write_weights_json(logger, globopts, cust, job, confcust, fixed_date, weights):
     jobdir = confcust.get_fulldir(cust, job)
     if fixed_date:
         filename = filename_date(
@@ -64,15 +124,15 @@ def write_weights_json(logger, globopts, cust, job, confcust, fixed_date, weight
         filename = filename_date(
             logger, globopts['OutputWeights'.lower()], jobdir)
 
-    json_writer = JsonWriter(weights, filename, globopts['generalcompressjson'])
-    ret, excep = json_writer.write_json()
+    json_writer = build_json_writer(globopts, weights, filename, ('type', 'site'))
+    ret, excep = await json_writer.write_json_async()
     if not ret:
         logger.error('Customer:%s Job:%s %s' %
                      (logger.customer, logger.job, repr(excep)))
         raise SystemExit(1)
 
 
-def write_topo_json(logger, globopts, confcust, group_groups, group_endpoints, fixed_date):
+async def write_topo_json(logger, globopts, confcust, group_groups, group_endpoints, fixed_date):
     custdir = confcust.get_custdir()
     if fixed_date:
         filename = filename_date(logger, globopts['OutputTopologyGroupOfGroups'.lower(
@@ -80,8 +140,8 @@ def write_topo_json(logger, globopts, confcust, group_groups, group_endpoints, f
     else:
         filename = filename_date(
             logger, globopts['OutputTopologyGroupOfGroups'.lower()], custdir)
-    json_writer = JsonWriter(group_groups, filename, globopts['generalcompressjson'])
-    ret, excep = json_writer.write_json()
+    json_writer = build_json_writer(globopts, group_groups, filename, ('group', 'type'))
+    ret, excep = await json_writer.write_json_async()
     if not ret:
         logger.error('Customer:%s : %s' % (logger.customer, repr(excep)))
         raise SystemExit(1)
@@ -92,8 +152,8 @@ def write_topo_json(logger, globopts, confcust, group_groups, group_endpoints, f
     else:
         filename = filename_date(
             logger, globopts['OutputTopologyGroupOfEndpoints'.lower()], custdir)
-    json_writer = JsonWriter(group_endpoints, filename, globopts['generalcompressjson'])
-    ret, excep = json_writer.write_json()
+    json_writer = build_json_writer(globopts, group_endpoints, filename, ('group', 'type'))
+    ret, excep = await json_writer.write_json_async()
     if not ret:
         logger.error('Customer:%s : %s' % (logger.customer, repr(excep)))
         raise SystemExit(1)
@@ -3,16 +3,16 @@ import os
 from urllib.parse import urlparse
 
 from argo_connectors.exceptions import ConnectorHttpError, ConnectorParseError
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
 from argo_connectors.io.webapi import WebAPI
 from argo_connectors.parse.flat_downtimes import ParseDowntimes
-from argo_connectors.tasks.common import write_state, write_downtimes_json as write_json
+from argo_connectors.tasks.common import build_publish_state, webapi_compress, write_state, write_downtimes_json as write_json
 
 
 class TaskCsvDowntimes(object):
     def __init__(self, loop, logger, connector_name, globopts, webapi_opts,
                  confcust, custname, feed, current_date,
-                 uidservtype, targetdate, timestamp):
+                 uidservtype, targetdate, timestamp, force_publish=False):
         self.event_loop = loop
         self.logger = logger
         self.connector_name = connector_name
@@ -25,11 +25,13 @@ class TaskCsvDowntimes(object):
         self.uidservtype = uidservtype
         self.targetdate = targetdate
         self.timestamp = timestamp
+        self.http_registry = SessionRegistry(globopts)
+        self.publish_state = build_publish_state(globopts, confcust, force_publish)
 
     async def fetch_data(self):
         session = SessionWithRetry(self.logger,
                                    os.path.basename(self.connector_name),
-                                   self.globopts)
+                                   self.globopts, registry=self.http_registry)
         res = await session.http_get(self.feed)
 
         return res
@@ -47,7 +49,9 @@ class TaskCsvDowntimes(object):
                         int(self.globopts['ConnectionSleepRetry'.lower()]),
                         self.globopts['ConnectionRetryRandom'.lower()],
                         int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
-                        date=self.targetdate)
+                        date=self.targetdate, registry=self.http_registry,
+                        publish_state=self.publish_state,
+                        compress=webapi_compress(self.webapi_opts))
         await webapi.send(dts, downtimes_component=True)
 
     async def run(self):
@@ -68,12 +72,13 @@ class TaskCsvDowntimes(object):
             # customer file so we can safely assume one tenant/customer
             if dts or write_empty:
                 cust = list(self.confcust.get_customers())[0]
+                publish_summary = ' ' + self.publish_state.summary() if self.publish_state else ''
                 self.logger.info('Customer:%s Fetched Date:%s Endpoints:%d' %
-                                 (self.confcust.get_custname(cust), self.targetdate, len(dts)))
+                                 (self.confcust.get_custname(cust), self.targetdate, len(dts)) + publish_summary)
 
             if eval(self.globopts['GeneralWriteJson'.lower()]):
-                write_json(self.logger, self.globopts,
-                           self.confcust, dts, self.timestamp)
+                await write_json(self.logger, self.globopts,
+                                 self.confcust, dts, self.timestamp)
 
         except (ConnectorHttpError, ConnectorParseError, KeyboardInterrupt) as exc:
             self.logger.error(repr(exc))
@@ -3,11 +3,11 @@ import asyncio
 
 from urllib.parse import urlparse
 
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
 from argo_connectors.parse.flat_servicetypes import ParseFlatServiceTypes
 from argo_connectors.parse.webapi_servicetypes import ParseWebApiServiceTypes
 from argo_connectors.io.webapi import WebAPI
-from argo_connectors.tasks.common import write_state, write_downtimes_json as write_json
+from argo_connectors.tasks.common import webapi_compress, write_state, write_downtimes_json as write_json
 from argo_connectors.exceptions import ConnectorHttpError, ConnectorParseError, ConnectorError
 
 
@@ -35,12 +35,15 @@ class TaskFlatServiceTypes(object):
         self.timestamp = timestamp
         self.is_csv = is_csv
         self.initsync = initsync
+        self.http_registry = SessionRegistry(globopts)
+        self.webapi = None
 
     async def fetch_data(self):
         feed_parts = urlparse(self.feed)
         session = SessionWithRetry(self.logger,
                                    os.path.basename(self.connector_name),
-                                   self.globopts, custauth=self.auth_opts)
+                                   self.globopts, custauth=self.auth_opts,
+                                   registry=self.http_registry)
         res = await session.http_get('{}://{}{}?{}'.format(feed_parts.scheme,
                                                            feed_parts.netloc,
                                                            feed_parts.path,
@@ -48,27 +51,25 @@ class TaskFlatServiceTypes(object):
 
         return res
 
+    def build_webapi(self):
+        # one client for fetch and send of service types
+        if self.webapi is None:
+            self.webapi = WebAPI(self.connector_name, self.webapi_opts['webapihost'],
+                                 self.webapi_opts['webapitoken'], self.logger,
+                                 int(self.globopts['ConnectionRetry'.lower()]),
+                                 int(self.globopts['ConnectionTimeout'.lower()]),
+                                 int(self.globopts['ConnectionSleepRetry'.lower()]),
+                                 self.globopts['ConnectionRetryRandom'.lower()],
+                                 int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
+                                 date=self.timestamp, registry=self.http_registry,
+                                 compress=webapi_compress(self.webapi_opts))
+        return self.webapi
+
     async def fetch_webapi(self):
-        webapi = WebAPI(self.connector_name, self.webapi_opts['webapihost'],
-                        self.webapi_opts['webapitoken'], self.logger,
-                        int(self.globopts['ConnectionRetry'.lower()]),
-                        int(self.globopts['ConnectionTimeout'.lower()]),
-                        int(self.globopts['ConnectionSleepRetry'.lower()]),
-                        self.globopts['ConnectionRetryRandom'.lower()],
-                        int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
-                        date=self.timestamp)
-        return await webapi.get('service-types', jsonret=False)
+        return await self.build_webapi().get('service-types', jsonret=False)
 
     async def send_webapi(self, data):
-        webapi = WebAPI(self.connector_name, self.webapi_opts['webapihost'],
-                        self.webapi_opts['webapitoken'], self.logger,
-                        int(self.globopts['ConnectionRetry'.lower()]),
-                        int(self.globopts['ConnectionTimeout'.lower()]),
-                        int(self.globopts['ConnectionSleepRetry'.lower()]),
-                        self.globopts['ConnectionRetryRandom'.lower()],
-                        int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
-                        date=self.timestamp)
-        await webapi.send(data, 'service-types')
+        await self.build_webapi().send(data, 'service-types')
 
     def parse_webapi_poem(self, res):
         webapi = ParseWebApiServiceTypes(self.logger, res)
@@ -3,18 +3,18 @@ import asyncio
 
 from urllib.parse import urlparse
 
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
 from argo_connectors.parse.flat_topology import ParseFlatEndpoints
-from argo_connectors.parse.flat_contacts import ParseContacts
 from argo_connectors.io.webapi import WebAPI
+from argo_connectors.jsoncodec import JsonPayload
 from argo_connectors.mesh.contacts import attach_contacts_topodata
-from argo_connectors.tasks.common import write_state, write_topo_json as write_json
+from argo_connectors.tasks.common import build_publish_state, webapi_batch_opts, webapi_compress, write_state, write_topo_json as write_json
 
 
 class TaskFlatTopology(object):
     def __init__(self, loop, logger, connector_name, globopts, webapi_opts,
                  confcust, custname, topofeed, fetchtype, fixed_date,
-                 uidservendp, is_csv=False):
+                 uidservendp, is_csv=False, force_publish=False):
         self.event_loop = loop
         self.logger = logger
         self.connector_name = connector_name
@@ -27,6 +27,8 @@ class TaskFlatTopology(object):
         self.fixed_date = fixed_date
         self.uidservendp = uidservendp
         self.is_csv = is_csv
+        self.http_registry = SessionRegistry(globopts)
+        self.publish_state = build_publish_state(globopts, confcust, force_publish)
 
     def _is_feed(self, feed):
         data = urlparse(feed)
@@ -38,7 +40,8 @@ class TaskFlatTopology(object):
 
     async def fetch_data(self):
         remote_topo = urlparse(self.topofeed)
-        session = SessionWithRetry(self.logger, self.custname, self.globopts)
+        session = SessionWithRetry(self.logger, self.custname, self.globopts,
+                                   registry=self.http_registry)
         if remote_topo.query:
             res = await \
             session.http_get('{}://{}{}?{}'.format(remote_topo.scheme,
@@ -51,16 +54,13 @@ class TaskFlatTopology(object):
                                                             remote_topo.path))
         return res
 
-    def parse_source_topo(self, res):
+    def parse_source_topo(self, res, with_contacts=False):
         topo = ParseFlatEndpoints(self.logger, res, self.custname,
                                   self.uidservendp, self.fetchtype,
                                   self.is_csv, scope=self.custname)
-        group_groups = topo.get_groupgroups()
-        group_endpoints = topo.get_groupendpoints()
+        return topo.get_topology(with_contacts)
 
-        return group_groups, group_endpoints
-
-    async def send_webapi(self, data, topotype):
+    async def send_webapi(self, sends):
         webapi = WebAPI(self.connector_name, self.webapi_opts['webapihost'],
                         self.webapi_opts['webapitoken'], self.logger,
                         int(self.globopts['ConnectionRetry'.lower()]),
@@ -68,21 +68,23 @@ class TaskFlatTopology(object):
                         int(self.globopts['ConnectionSleepRetry'.lower()]),
                         self.globopts['ConnectionRetryRandom'.lower()],
                         int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
-                        date=self.fixed_date)
-        await webapi.send(data, topotype)
+                        date=self.fixed_date, registry=self.http_registry,
+                        publish_state=self.publish_state,
+                        compress=webapi_compress(self.webapi_opts),
+                        **webapi_batch_opts(self.webapi_opts))
+        await webapi.send_many(sends)
 
     async def run(self):
         if self._is_feed(self.topofeed):
             res = await self.fetch_data()
-            group_groups, group_endpoints = self.parse_source_topo(res)
-            contacts = ParseContacts(self.logger, res, self.uidservendp, self.is_csv).get_contacts()
+            group_groups, group_endpoints, contacts = self.parse_source_topo(res, True)
             attach_contacts_topodata(self.logger, contacts, group_endpoints)
 
         elif not self._is_feed(self.topofeed) and not self.is_csv:
             try:
                 with open(self.topofeed) as fp:
                     js = json.load(fp)
-                    group_groups, group_endpoints = self.parse_source_topo(js)
+                    group_groups, group_endpoints, _ = self.parse_source_topo(js)
             except IOError as exc:
                 self.logger.error('Customer:%s : Problem opening %s - %s' % (self.logger.customer, self.topofeed, repr(exc)))
 
@@ -91,14 +93,21 @@ class TaskFlatTopology(object):
         numge = len(group_endpoints)
         numgg = len(group_groups)
 
-        # send concurrently to WEB-API in coroutines
+        # encoded only once for WEB-API and JSON file
+        group_groups = JsonPayload(group_groups)
+        group_endpoints = JsonPayload(group_endpoints)
+
+        # send concurrently to WEB-API in coroutines while JSON is
+        # written from thread
+        coros = list()
         if eval(self.globopts['GeneralPublishWebAPI'.lower()]):
-            await asyncio.gather(
-                self.send_webapi(group_groups, 'groups'),
-                self.send_webapi(group_endpoints,'endpoints')
-            )
+            coros.append(self.send_webapi([(group_groups, 'groups'),
+                                           (group_endpoints, 'endpoints')]))
 
         if eval(self.globopts['GeneralWriteJson'.lower()]):
-            write_json(self.logger, self.globopts, self.confcust, group_groups, group_endpoints, self.fixed_date)
+            coros.append(write_json(self.logger, self.globopts, self.confcust, group_groups, group_endpoints, self.fixed_date))
+
+        await asyncio.gather(*coros)
 
-        self.logger.info('Customer:' + self.custname + ' Fetched Endpoints:%d' % (numge) + ' Groups(%s):%d' % (self.fetchtype, numgg))
+        publish_summary = ' ' + self.publish_state.summary() if self.publish_state else ''
+        self.logger.info('Customer:' + self.custname + ' Fetched Endpoints:%d' % (numge) + ' Groups(%s):%d' % (self.fetchtype, numgg) + publish_summary)
@@ -2,16 +2,16 @@ import os
 
 from urllib.parse import urlparse
 
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
 from argo_connectors.parse.gocdb_downtimes import ParseDowntimes
 from argo_connectors.io.webapi import WebAPI
-from argo_connectors.tasks.common import write_state, write_downtimes_json as write_json
+from argo_connectors.tasks.common import build_publish_state, webapi_compress, write_state, write_downtimes_json as write_json
 
 
 class TaskGocdbDowntimes(object):
     def __init__(self, loop, logger, connector_name, globopts, auth_opts,
                  webapi_opts, confcust, custname, feed, start, end,
-                 uidservtype, targetdate, timestamp):
+                 uidservtype, targetdate, timestamp, force_publish=False):
         self.event_loop = loop
         self.logger = logger
         self.connector_name = connector_name
@@ -26,6 +26,8 @@ class TaskGocdbDowntimes(object):
         self.uidservtype = uidservtype
         self.targetdate = targetdate
         self.timestamp = timestamp
+        self.http_registry = SessionRegistry(globopts)
+        self.publish_state = build_publish_state(globopts, confcust, force_publish)
 
     async def fetch_data(self):
         feed_parts = urlparse(self.feed)
@@ -34,7 +36,8 @@ class TaskGocdbDowntimes(object):
         session = SessionWithRetry(self.logger,
                                    os.path.basename(self.connector_name),
                                    self.globopts,
-                                   custauth=self.auth_opts)
+                                   custauth=self.auth_opts,
+                                   registry=self.http_registry, binary=True)
         if feed_parts.query:
             query_url = \
             '{}://{}{}?{}&windowstart={}&windowend={}'.format(feed_parts.scheme,
@@ -66,7 +69,9 @@ class TaskGocdbDowntimes(object):
                         int(self.globopts['ConnectionSleepRetry'.lower()]),
                         self.globopts['ConnectionRetryRandom'.lower()],
                         int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
-                        date=self.targetdate)
+                        date=self.targetdate, registry=self.http_registry,
+                        publish_state=self.publish_state,
+                        compress=webapi_compress(self.webapi_opts))
         await webapi.send(dts, downtimes_component=True)
 
     async def run(self):
@@ -86,8 +91,9 @@ class TaskGocdbDowntimes(object):
 
         if dts or write_empty:
             cust = list(self.confcust.get_customers())[0]
+            publish_summary = ' ' + self.publish_state.summary() if self.publish_state else ''
             self.logger.info('Customer:%s Fetched Date:%s Endpoints:%d' %
-                        (self.confcust.get_custname(cust), self.targetdate, len(dts)))
+                        (self.confcust.get_custname(cust), self.targetdate, len(dts)) + publish_summary)
 
         if eval(self.globopts['GeneralWriteJson'.lower()]):
-            write_json(self.logger, self.globopts, self.confcust, dts, self.timestamp)
+            await write_json(self.logger, self.globopts, self.confcust, dts, self.timestamp)
@@ -1,27 +1,32 @@
 import os
 import asyncio
+from io import BytesIO
 from lxml import etree
 
 from collections import Callable
-from urllib.parse import urlparse
 
-from concurrent.futures import ProcessPoolExecutor
 from functools import partial
 
 from argo_connectors.parse.gocdb_topology import ParseServiceGroups, ParseServiceEndpoints, ParseSites
 from argo_connectors.parse.gocdb_contacts import ParseServiceEndpointContacts, ParseSitesWithContacts, ParseServiceGroupWithContacts
 from argo_connectors.exceptions import ConnectorError, ConnectorParseError, ConnectorHttpError
-from argo_connectors.io.http import SessionWithRetry
-from argo_connectors.io.ldap import LDAPSessionWithRetry
+from argo_connectors.jsoncodec import JsonPayload
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
+from argo_connectors.io.ldap import LDAPCache, LDAPSharedSession
 from argo_connectors.io.statewrite import state_write
 from argo_connectors.io.webapi import WebAPI
-from argo_connectors.mesh.contacts import attach_contacts_topodata
-from argo_connectors.mesh.srm_port import attach_srmport_topodata
-from argo_connectors.mesh.storage_element_path import attach_sepath_topodata
-from argo_connectors.tasks.common import write_state, write_topo_json as write_json
+from argo_connectors.mesh.contacts import ContactsEnricher
+from argo_connectors.mesh.enrichment import EnrichmentPipeline
+from argo_connectors.mesh.srm_port import SrmPortEnricher
+from argo_connectors.mesh.storage_element_path import SEPathEnricher
+from argo_connectors.tasks.common import build_http_cache, build_publish_state, webapi_batch_opts, webapi_compress, write_state, write_topo_json as write_json
+from argo_connectors.tasks.workers import PackedEntities, get_parse_pool
 from argo_connectors.parse.base import ParseHelpers
 
 
+PAGES_QUEUED = 2
+
+
 def contains_exception(list):
     for a in list:
         if isinstance(a, Exception):
@@ -30,35 +35,6 @@ def contains_exception(list):
     return (False, None)
 
 
-def filter_multiple_tags(data):
-    """
-        Paginated content is represented with multiple XML enclosing tags
-        in a single buffer:
-
-        <?xml version="1.0" encoding="UTF-8"?>
-        <results>
-            topology entities
-        </results>
-        <?xml version="1.0" encoding="UTF-8"?>
-        <results>
-            topology entities
-        </results>
-        ...
-
-        Remove them and leave only one enclosing.
-    """
-    data_lines = data.split('\n')
-    data_lines = list(filter(lambda line:
-                             '</results>' not in line
-                             and '<results>' not in line
-                             and '<?xml' not in line,
-                             data_lines))
-    data_lines.insert(0, '<?xml version="1.0" encoding="UTF-8"?>')
-    data_lines.insert(1, '<results>')
-    data_lines.append('</results>')
-    return '\n'.join(data_lines)
-
-
 class find_next_paging_cursor_count(ParseHelpers, Callable):
     def __init__(self, logger, res):
         self.res = res
@@ -67,118 +43,179 @@ class find_next_paging_cursor_count(ParseHelpers, Callable):
     def __call__(self):
         try:
             return self._parse()
-        except ConnectorParseError as exc:
+        except (ConnectorParseError, etree.XMLSyntaxError) as exc:
             self.logger.error(repr(exc))
+            res = self.res.decode('utf-8', 'replace') if isinstance(self.res, bytes) else self.res
             self.logger.error("Tried to parse (512 chars): %.512s" % ''.join(
-                self.res.replace('\r\n', '').replace('\n', '')))
+                res.replace('\r\n', '').replace('\n', '')))
             raise ConnectorParseError(exc)
 
     def _parse(self):
         cursor, count = None, None
 
-        doc = self.parse_xml(self.res)
-        xml_bytes = doc.encode("utf-8")
-        sites = etree.fromstring(xml_bytes)
+        xml_bytes = self.parse_xml(self.res)
 
-        for cnt in sites.xpath('.//count'):
-            count = int(cnt.text)
-
-        for lnk in sites.xpath('.//link'):
-            if lnk.attrib["rel"] == "next":
-                href = lnk.attrib["href"]
+        # <meta> is leading element of the page so stop parsing once it's
+        # read and leave the topology entities to the parse workers
+        for _, node in etree.iterparse(BytesIO(xml_bytes), events=('end',),
+                                       tag=('count', 'link', 'meta')):
+            if node.tag == 'count':
+                count = int(node.text)
+            elif node.tag == 'link' and node.attrib["rel"] == "next":
+                href = node.attrib["href"]
                 for query in href.split('&'):
                     if 'next_cursor' in query:
                         cursor = query.split('=')[1]
+            elif node.tag == 'meta':
+                break
 
         return count, cursor
 
 
-class TaskParseTopology(object):
+class TaskParseContacts(object):
+    def __init__(self, logger):
+        self.logger = logger
+
+    def parse_siteswith_contacts(self, res):
+        contacts = ParseSitesWithContacts(self.logger, res)
+        return contacts.get_contacts()
+
+    def parse_servicegroups_contacts(self, res):
+        contacts = ParseServiceGroupWithContacts(self.logger, res)
+        return contacts.get_contacts()
+
+    def parse_serviceendpoints_contacts(self, res):
+        contacts = ParseServiceEndpointContacts(self.logger, res)
+        return contacts.get_contacts()
+
+
+class TaskParseTopology(TaskParseContacts):
+    """
+        Fetched buffer is parsed only once and topology and contacts parsers
+        walk the same tree, or the same stream of elements for service
+        endpoints. Every method returns tuple of parsed topology and
+        contacts.
+    """
     def __init__(self, logger, custname, uidservendp, pass_extensions,
                  notiflag):
-        self.logger = logger
+        super().__init__(logger)
         self.custname = custname
         self.uidservendp = uidservendp
         self.pass_extensions = pass_extensions
         self.notification_flag = notiflag
 
+    def parse_documents(self, res):
+        return ParseHelpers(self.logger).parse_xml_documents(res)
+
     def parse_source_servicegroups(self, res):
-        group_groups = ParseServiceGroups(self.logger, res, self.custname,
-                                          self.uidservendp,
-                                          self.pass_extensions,
-                                          self.notification_flag).get_group_groups()
-        group_endpoints = ParseServiceGroups(self.logger, res, self.custname,
-                                             self.uidservendp,
-                                             self.pass_extensions,
-                                             self.notification_flag).get_group_endpoints()
+        docs = self.parse_documents(res)
+        servicegroups = ParseServiceGroups(self.logger, docs, self.custname,
+                                           self.uidservendp,
+                                           self.pass_extensions,
+                                           self.notification_flag)
+        group_groups = servicegroups.get_group_groups()
+        group_endpoints = servicegroups.get_group_endpoints()
 
-        return group_groups, group_endpoints
+        return (group_groups, group_endpoints), self.parse_servicegroups_contacts(docs)
 
     def parse_source_endpoints(self, res):
+        # service endpoints feed is the largest one so it's streamed rather
+        # than parsed into a tree and contacts are collected in the same pass
+        contacts = dict()
+        contacts_parser = ParseServiceEndpointContacts(self.logger, res)
         group_endpoints = ParseServiceEndpoints(self.logger, res, self.custname, self.uidservendp,
                                                 self.pass_extensions,
-                                                self.notification_flag).get_group_endpoints()
+                                                self.notification_flag,
+                                                on_element=partial(contacts_parser.parse_serviceendpoint_contact,
+                                                                   endpoints_contacts=contacts)).get_group_endpoints()
+
+        return group_endpoints, contacts
 
-        return group_endpoints
+    def parse_source_endpoints_contacts(self, res):
+        return list(), self.parse_serviceendpoints_contacts(res)
 
     def parse_source_sites(self, res):
-        group_groups = ParseSites(self.logger, res, self.custname,
+        docs = self.parse_documents(res)
+        group_groups = ParseSites(self.logger, docs, self.custname,
                                   self.uidservendp,
                                   self.pass_extensions,
                                   self.notification_flag).get_group_groups()
 
-        return group_groups
+        return group_groups, self.parse_siteswith_contacts(docs)
 
 
 # basic function wrappers used because to avoid class TaskParseTopology pickle
-# in ProcessPoolExecutor
+# in parse worker processes. parsed topology is returned packed to keep the
+# transfer back to the connector process small.
 def parse_endpoints(logger, custname, uidservendp, pass_extensions,
                     notification_flag, data):
     task = TaskParseTopology(logger, custname, uidservendp, pass_extensions,
                              notification_flag)
-    return task.parse_source_endpoints(data)
+    group_endpoints, contacts = task.parse_source_endpoints(data)
+    return PackedEntities.pack(group_endpoints), contacts
+
+
+def parse_endpoints_contacts(logger, custname, uidservendp, pass_extensions,
+                             notification_flag, data):
+    task = TaskParseTopology(logger, custname, uidservendp, pass_extensions,
+                             notification_flag)
+    group_endpoints, contacts = task.parse_source_endpoints_contacts(data)
+    return PackedEntities.pack(group_endpoints), contacts
 
 
 def parse_sites(logger, custname, uidservendp, pass_extensions,
                 notification_flag, data):
     task = TaskParseTopology(
         logger, custname, uidservendp, pass_extensions, notification_flag)
-    return task.parse_source_sites(data)
+    group_groups, contacts = task.parse_source_sites(data)
+    return PackedEntities.pack(group_groups), contacts
 
 
 def parse_servicegroups(logger, custname, uidservendp, pass_extensions,
                         notification_flag, data):
     task = TaskParseTopology(logger, custname, uidservendp, pass_extensions,
                              notification_flag)
-    return task.parse_source_servicegroups(data)
+    (group_groups, group_endpoints), contacts = task.parse_source_servicegroups(data)
+    return (PackedEntities.pack(group_groups),
+            PackedEntities.pack(group_endpoints)), contacts
 
 
-class TaskParseContacts(object):
-    def __init__(self, logger):
-        self.logger = logger
+def merge_contacts_pages(pages):
+    contacts = dict()
+    for page_contacts in pages:
+        contacts.update(page_contacts)
 
-    def parse_siteswith_contacts(self, res):
-        contacts = ParseSitesWithContacts(self.logger, res)
-        return contacts.get_contacts()
+    return contacts
 
-    def parse_servicegroups_contacts(self, res):
-        contacts = ParseServiceGroupWithContacts(self.logger, res)
-        return contacts.get_contacts()
 
-    def parse_serviceendpoints_contacts(self, res):
-        contacts = ParseServiceEndpointContacts(self.logger, res)
-        return contacts.get_contacts()
+def merge_sorted_pages(pages):
+    """
+        Every page of sites and service endpoints is already sorted by group
+        so stable sort of concatenated pages results with the same order as
+        parsing of the whole joined feed.
+    """
+    topology = PackedEntities.concat(topo for topo, _ in pages)
+    if len(pages) > 1:
+        topology.sort_by('group')
+
+    return topology, merge_contacts_pages(contacts for _, contacts in pages)
+
 
+def merge_servicegroups_pages(pages):
+    group_groups = PackedEntities.concat(groups for (groups, _), _ in pages)
+    group_endpoints = PackedEntities.concat(endpoints for (_, endpoints), _ in pages)
 
-class TaskGocdbTopology(TaskParseContacts, TaskParseTopology):
+    return (group_groups, group_endpoints), merge_contacts_pages(contacts for _, contacts in pages)
+
+
+class TaskGocdbTopology(TaskParseTopology):
     def __init__(self, loop, logger, connector_name, SERVICE_ENDPOINTS_PI,
                  SERVICE_GROUPS_PI, SITES_PI, globopts, auth_opts, webapi_opts,
                  bdii_opts, confcust, custname, topofeed, topofetchtype,
                  fixed_date, uidservendp, pass_extensions, topofeedpaging,
-                 notiflag):
+                 notiflag, force_publish=False):
         TaskParseTopology.__init__(self, logger, custname, uidservendp,
                                    pass_extensions, notiflag)
-        super(TaskGocdbTopology, self).__init__(logger)
         self.loop = loop
         self.logger = logger
         self.connector_name = connector_name
@@ -198,25 +235,74 @@ class TaskGocdbTopology(TaskParseContacts, TaskParseTopology):
         self.pass_extensions = pass_extensions
         self.topofeedpaging = topofeedpaging
         self.notification_flag = notiflag
+        self.http_registry = SessionRegistry(globopts)
+        self.http_cache = build_http_cache(globopts, confcust)
+        self.publish_state = build_publish_state(globopts, confcust, force_publish)
+        self.bdii_cache = None
+        self.ldap_sessions = list()
+
+    def build_bdii_cache(self):
+        ttl = int(self.bdii_opts.get('bdiicachettl', 0) or 0)
+        if not ttl:
+            return None
+        cust = list(self.confcust.get_customers())[0]
+        cachedir = self.confcust.get_fullstatedir(
+            self.globopts['InputStateSaveDir'.lower()], cust)
+        return LDAPCache(cachedir + '/bdiicache', ttl)
+
+    async def fetch_ldap_data(self, host, port, base, searches):
+        """
+            Run all BDII searches concurrently over single LDAP connection.
+            Searches are given as (filter, attributes, consumer) tuples and
+            every entry is passed to consumer as it arrives. Session is
+            closed with close_ldap_sessions() once the run is done and cache
+            refresh still running in background is then cancelled, so it
+            doesn't hold back the topology.
+        """
+        self.bdii_cache = self.build_bdii_cache()
+        ldap_session = LDAPSharedSession(self.logger, host, port,
+                                         int(self.globopts['ConnectionRetry'.lower()]),
+                                         int(self.globopts['ConnectionSleepRetry'.lower()]),
+                                         int(self.globopts['ConnectionTimeout'.lower()]),
+                                         cache=self.bdii_cache,
+                                         background_refresh=self.bdii_opts.get('bdiicachebackgroundrefresh', 'False') == 'True')
+        self.ldap_sessions.append(ldap_session)
+
+        return await ldap_session.search_many(
+            [(base, filter, attributes, consumer)
+             for filter, attributes, consumer in searches]
+        )
+
+    async def close_ldap_sessions(self):
+        for ldap_session in self.ldap_sessions:
+            await ldap_session.close()
+        self.ldap_sessions = list()
 
-    async def fetch_ldap_data(self, host, port, base, filter, attributes):
-        ldap_session = LDAPSessionWithRetry(self.logger, int(self.globopts['ConnectionRetry'.lower()]),
-                                            int(self.globopts['ConnectionSleepRetry'.lower()]), int(self.globopts['ConnectionTimeout'.lower()]))
+    async def fetch_data(self, api):
+        session = SessionWithRetry(self.logger,
+                                   os.path.basename(self.connector_name),
+                                   self.globopts, custauth=self.auth_opts,
+                                   registry=self.http_registry,
+                                   cache=self.http_cache, binary=True)
+        res = await session.http_get(api)
 
-        res = await ldap_session.search(host, port, base, filter, attributes)
         return res
 
-    async def fetch_data(self, api):
-        feed_parts = urlparse(api)
-        fetched_data = list()
-        if self.topofeedpaging:
-            count, cursor = 1, 0
+    async def fetch_pages(self, api, pages):
+        """
+            Producer of paginated topology. Only the paging cursor is parsed
+            here, page is queued right after and next one is requested
+            immediately. None is queued as the last item even on failure,
+            but not when producer is cancelled by the consumer.
+        """
+        count, cursor = 1, 0
+        session = SessionWithRetry(self.logger,
+                                   os.path.basename(self.connector_name),
+                                   self.globopts, custauth=self.auth_opts,
+                                   registry=self.http_registry,
+                                   cache=self.http_cache, binary=True)
+        try:
             while count != 0:
-                session = SessionWithRetry(self.logger,
-                                           os.path.basename(
-                                               self.connector_name),
-                                           self.globopts,
-                                           custauth=self.auth_opts)
                 res = await session.http_get('{}&next_cursor={}'.format(api,
                                                                         cursor))
 
@@ -224,23 +310,76 @@ class TaskGocdbTopology(TaskParseContacts, TaskParseTopology):
                     next_cursor = find_next_paging_cursor_count(
                         self.logger, res)
                     count, cursor = next_cursor()
-                    fetched_data.append(res)
+                    await pages.put(res)
 
                 except ConnectorParseError as exc:
                     await session.close()
                     raise exc
 
-            return filter_multiple_tags(''.join(fetched_data))
-
-        else:
-            session = SessionWithRetry(self.logger,
-                                       os.path.basename(self.connector_name),
-                                       self.globopts, custauth=self.auth_opts)
-            res = await session.http_get(api)
-
-            return res
-
-    async def send_webapi(self, data, topotype):
+        except asyncio.CancelledError:
+            # consumer is gone and doesn't wait for the end of pages
+            raise
+
+        except Exception as exc:
+            await pages.put(None)
+            raise exc
+
+        await pages.put(None)
+
+    async def fetch_parse_data(self, api, pool, parse_page, merge_pages):
+        """
+            Fetch topology and parse it in parse worker pool. With paging
+            enabled, every page is handed over to parse worker as soon as it
+            arrives so download of the next page overlaps with parsing of
+            the previous ones. At most PAGES_QUEUED fetched pages wait in
+            the queue and no more pages than there are parse workers are
+            being parsed, so fetching is held back if parsing falls behind.
+            Page that fails to fetch or parse cancels the fetch of the next
+            pages and parsing of the others.
+            Fetched buffers are not kept around, only the merged parsed
+            topology and contacts are returned.
+        """
+        parse_args = (self.custname, self.uidservendp, self.pass_extensions,
+                      self.notification_flag)
+
+        if not self.topofeedpaging:
+            res = await self.fetch_data(api)
+            parsed = await pool.run(parse_page, res, *parse_args)
+            return merge_pages([parsed])
+
+        pages = asyncio.Queue(maxsize=PAGES_QUEUED)
+        producer = asyncio.ensure_future(self.fetch_pages(api, pages))
+        parse_workers, parsing = list(), set()
+        try:
+            while True:
+                page = await pages.get()
+                if page is None:
+                    break
+                if len(parsing) >= pool.size:
+                    await asyncio.wait(parsing,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                done = set(worker for worker in parsing if worker.done())
+                for worker in done:
+                    # page that failed to parse raises here
+                    worker.result()
+                parsing -= done
+                worker = asyncio.ensure_future(pool.run(parse_page, page, *parse_args))
+                parse_workers.append(worker)
+                parsing.add(worker)
+
+            await producer
+
+            return merge_pages(await asyncio.gather(*parse_workers, loop=self.loop))
+
+        finally:
+            # failed fetch or parse of any page stops the rest of pipeline
+            producer.cancel()
+            for worker in parse_workers:
+                worker.cancel()
+            await asyncio.gather(producer, *parse_workers, loop=self.loop,
+                                 return_exceptions=True)
+
+    async def send_webapi(self, sends):
         webapi = WebAPI(self.connector_name, self.webapi_opts['webapihost'],
                         self.webapi_opts['webapitoken'], self.logger,
                         int(self.globopts['ConnectionRetry'.lower()]),
@@ -248,168 +387,130 @@ class TaskGocdbTopology(TaskParseContacts, TaskParseTopology):
                         int(self.globopts['ConnectionSleepRetry'.lower()]),
                         self.globopts['ConnectionRetryRandom'.lower()],
                         int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
-                        date=self.fixed_date)
-        await webapi.send(data, topotype)
+                        date=self.fixed_date, registry=self.http_registry,
+                        publish_state=self.publish_state,
+                        compress=webapi_compress(self.webapi_opts),
+                        **webapi_batch_opts(self.webapi_opts))
+        await webapi.send_many(sends)
 
     async def run(self):
-        fetched_sites, fetched_servicegroups, fetched_endpoints = None, None, None
-        fetched_bdii = None
-
-        group_endpoints, group_groups = list(), list()
+        group_endpoints, group_groups = PackedEntities(), PackedEntities()
         parsed_site_contacts, parsed_servicegroups_contacts, parsed_serviceendpoint_contacts = None, None, None
 
-        coros = [self.fetch_data(self.SERVICE_ENDPOINTS_PI)]
+        # proces data in parallel in long-lived parse worker processes
+        pool = get_parse_pool(self.logger, self.globopts)
+
+        # parse topology depend on configured components fetch. we can fetch
+        # only sites, only servicegroups or both. service endpoints are
+        # always fetched for contacts, but parsed as topology only along
+        # with sites.
+        if 'sites' in self.topofetchtype:
+            coros = [self.fetch_parse_data(self.SERVICE_ENDPOINTS_PI, pool,
+                                           parse_endpoints,
+                                           merge_sorted_pages)]
+        else:
+            coros = [self.fetch_parse_data(self.SERVICE_ENDPOINTS_PI, pool,
+                                           parse_endpoints_contacts,
+                                           merge_sorted_pages)]
         if 'servicegroups' in self.topofetchtype:
-            coros.append(self.fetch_data(self.SERVICE_GROUPS_PI))
+            coros.append(self.fetch_parse_data(self.SERVICE_GROUPS_PI, pool,
+                                               parse_servicegroups,
+                                               merge_servicegroups_pages))
         if 'sites' in self.topofetchtype:
-            coros.append(self.fetch_data(self.SITES_PI))
+            coros.append(self.fetch_parse_data(self.SITES_PI, pool,
+                                               parse_sites,
+                                               merge_sorted_pages))
 
         if self.bdii_opts and eval(self.bdii_opts['bdii']):
             host = self.bdii_opts['bdiihost']
             port = self.bdii_opts['bdiiport']
             base = self.bdii_opts['bdiiquerybase']
 
-            coros.append(
-                self.fetch_ldap_data(host, port, base,
-                                     self.bdii_opts['bdiiqueryfiltersrm'],
-                                     self.bdii_opts['bdiiqueryattributessrm'].split(' '))
-            )
+            # SRM port and storage path maps are built as LDAP entries
+            # arrive
+            srmport_enricher = SrmPortEnricher(self.logger,
+                                               self.bdii_opts['bdiiqueryattributessrm'].split(' ')[0])
+            sepath_enricher = SEPathEnricher(self.logger)
 
             coros.append(
-                self.fetch_ldap_data(host, port, base,
-                                     self.bdii_opts['bdiiqueryfiltersepath'],
-                                     self.bdii_opts['bdiiqueryattributessepath'].split(' '))
+                self.fetch_ldap_data(host, port, base, [
+                    (self.bdii_opts['bdiiqueryfiltersrm'],
+                     self.bdii_opts['bdiiqueryattributessrm'].split(' '),
+                     srmport_enricher.add),
+                    (self.bdii_opts['bdiiqueryfiltersepath'],
+                     self.bdii_opts['bdiiqueryattributessepath'].split(' '),
+                     sepath_enricher.add)
+                ])
             )
 
-        # fetch topology data concurrently in coroutines
+        # fetch and parse topology data concurrently in coroutines
         fetched_topology = await asyncio.gather(*coros, loop=self.loop, return_exceptions=True)
 
-        fetched_endpoints = fetched_topology[0]
-        if self.bdii_opts and eval(self.bdii_opts['bdii']):
-            fetched_bdii = list()
-            fetched_bdii.append(fetched_topology[-2])
-            fetched_bdii.append(fetched_topology[-1])
-        if 'sites' in self.topofetchtype and 'servicegroups' in self.topofetchtype:
-            fetched_servicegroups, fetched_sites = (
-                fetched_topology[1], fetched_topology[2])
-        elif 'sites' in self.topofetchtype:
-            fetched_sites = fetched_topology[1]
-        elif 'servicegroups' in self.topofetchtype:
-            fetched_servicegroups = fetched_topology[1]
-
         exc_raised, exc = contains_exception(fetched_topology)
         if exc_raised:
             raise ConnectorError(repr(exc))
 
-        # proces data in parallel using multiprocessing
-        executor = ProcessPoolExecutor(max_workers=3)
-        parse_workers = list()
-        exe_parse_source_endpoints = partial(parse_endpoints, self.logger,
-                                             self.custname, self.uidservendp,
-                                             self.pass_extensions,
-                                             self.notification_flag,
-                                             fetched_endpoints)
-        exe_parse_source_servicegroups = partial(parse_servicegroups,
-                                                 self.logger, self.custname,
-                                                 self.uidservendp,
-                                                 self.pass_extensions,
-                                                 self.notification_flag,
-                                                 fetched_servicegroups)
-        exe_parse_source_sites = partial(parse_sites, self.logger,
-                                         self.custname, self.uidservendp,
-                                         self.pass_extensions,
-                                         self.notification_flag, fetched_sites)
-
-        # parse topology depend on configured components fetch. we can fetch
-        # only sites, only servicegroups or both.
-
-        if fetched_servicegroups and fetched_sites:
-            parse_workers.append(
-                self.loop.run_in_executor(executor, exe_parse_source_endpoints)
-            )
-            parse_workers.append(
-                self.loop.run_in_executor(
-                    executor, exe_parse_source_servicegroups)
-            )
-            parse_workers.append(
-                self.loop.run_in_executor(executor, exe_parse_source_sites)
-            )
-        elif fetched_servicegroups and not fetched_sites:
-            parse_workers.append(
-                self.loop.run_in_executor(
-                    executor, exe_parse_source_servicegroups)
-            )
-        elif fetched_sites and not fetched_servicegroups:
-            parse_workers.append(
-                self.loop.run_in_executor(executor, exe_parse_source_endpoints)
-            )
-            parse_workers.append(
-                self.loop.run_in_executor(executor, exe_parse_source_sites)
-            )
-
-        parsed_topology = await asyncio.gather(*parse_workers, loop=self.loop)
-
-        if fetched_servicegroups and fetched_sites:
-            group_endpoints = parsed_topology[0]
-            group_groups, group_endpoints_sg = parsed_topology[1]
-            group_endpoints += group_endpoints_sg
-            group_groups += parsed_topology[2]
-        elif fetched_servicegroups and not fetched_sites:
-            group_groups, group_endpoints = parsed_topology[0]
-        elif fetched_sites and not fetched_servicegroups:
-            group_endpoints = parsed_topology[0]
-            group_groups = parsed_topology[1]
-
+        parsed_endpoints, parsed_serviceendpoint_contacts = fetched_topology[0]
+        if 'sites' in self.topofetchtype and 'servicegroups' in self.topofetchtype:
+            parsed_servicegroups, parsed_servicegroups_contacts = fetched_topology[1]
+            parsed_sites, parsed_site_contacts = fetched_topology[2]
+            group_groups, group_endpoints_sg = parsed_servicegroups
+            group_endpoints = PackedEntities.concat([parsed_endpoints, group_endpoints_sg])
+            group_groups = PackedEntities.concat([group_groups, parsed_sites])
+        elif 'sites' in self.topofetchtype:
+            parsed_sites, parsed_site_contacts = fetched_topology[1]
+            group_endpoints = parsed_endpoints
+            group_groups = parsed_sites
+        elif 'servicegroups' in self.topofetchtype:
+            parsed_servicegroups, parsed_servicegroups_contacts = fetched_topology[1]
+            group_groups, group_endpoints = parsed_servicegroups
+
+        # contacts, SRM ports and storage paths are attached in a single
+        # pass over packed topology that is turned into dicts on the way
+        groups_enrichment = EnrichmentPipeline(self.logger)
+        for contacts in [parsed_site_contacts, parsed_servicegroups_contacts]:
+            if contacts:
+                groups_enrichment.register(ContactsEnricher(contacts, self.notification_flag))
+
+        endpoints_enrichment = EnrichmentPipeline(self.logger)
+        if parsed_serviceendpoint_contacts:
+            endpoints_enrichment.register(ContactsEnricher(parsed_serviceendpoint_contacts,
+                                                           self.notification_flag))
         # check if we fetched SRM port info and attach it appropriate endpoint
         # data
         if self.bdii_opts and eval(self.bdii_opts['bdii']):
-            attach_srmport_topodata(self.logger, self.bdii_opts['bdiiqueryattributessrm'].split(
-                ' ')[0], fetched_bdii[0], group_endpoints)
-            attach_sepath_topodata(self.logger, self.bdii_opts['bdiiqueryattributessepath'].split(
-                ' ')[0], fetched_bdii[1], group_endpoints)
-
-        # parse contacts from fetched service endpoints topology, if there are
-        # any
-        parsed_serviceendpoint_contacts = self.parse_serviceendpoints_contacts(fetched_endpoints)
-
-        if fetched_sites:
-            parsed_site_contacts = self.parse_siteswith_contacts(fetched_sites)
-
-        attach_contacts_workers = [
-            self.loop.run_in_executor(executor,
-                                      partial(attach_contacts_topodata, self.logger,
-                                              parsed_site_contacts,
-                                              group_groups, self.notification_flag)),
-            self.loop.run_in_executor(executor,
-                                      partial(attach_contacts_topodata, self.logger,
-                                              parsed_serviceendpoint_contacts,
-                                              group_endpoints, self.notification_flag))
-        ]
-
-        executor = ProcessPoolExecutor(max_workers=2)
-        group_groups, group_endpoints = await asyncio.gather(*attach_contacts_workers, loop=self.loop)
-
-        if fetched_servicegroups:
-            parsed_servicegroups_contacts = self.parse_servicegroups_contacts(fetched_servicegroups)
-            attach_contacts_topodata(self.logger,
-                                     parsed_servicegroups_contacts,
-                                     group_groups, self.notification_flag)
+            endpoints_enrichment.register(srmport_enricher)
+            endpoints_enrichment.register(sepath_enricher)
+
+        group_groups = groups_enrichment.run(group_groups)
+        group_endpoints = endpoints_enrichment.run(group_endpoints)
 
         await write_state(self.connector_name, self.globopts, self.confcust, self.fixed_date, True)
 
         numge = len(group_endpoints)
         numgg = len(group_groups)
 
-        # send concurrently to WEB-API in coroutines
+        # encoded only once for WEB-API and JSON file
+        group_groups = JsonPayload(group_groups)
+        group_endpoints = JsonPayload(group_endpoints)
+
+        # send concurrently to WEB-API in coroutines while JSON is
+        # written from thread
+        coros = list()
         if eval(self.globopts['GeneralPublishWebAPI'.lower()]):
-            await asyncio.gather(
-                self.send_webapi(group_groups, 'groups'),
-                self.send_webapi(group_endpoints, 'endpoints')
-            )
+            coros.append(self.send_webapi([(group_groups, 'groups'),
+                                           (group_endpoints, 'endpoints')]))
 
         if eval(self.globopts['GeneralWriteJson'.lower()]):
-            write_json(self.logger, self.globopts, self.confcust,
-                       group_groups, group_endpoints, self.fixed_date)
+            coros.append(write_json(self.logger, self.globopts, self.confcust,
+                                    group_groups, group_endpoints, self.fixed_date))
+
+        await asyncio.gather(*coros)
 
+        cache_summary = ' ' + self.http_cache.summary() if self.http_cache else ''
+        if self.bdii_cache:
+            cache_summary += ' ' + self.bdii_cache.summary()
+        if self.publish_state:
+            cache_summary += ' ' + self.publish_state.summary()
         self.logger.info('Customer:' + self.custname + ' Type:%s ' % (','.join(
-            self.topofetchtype)) + 'Fetched Endpoints:%d' % (numge) + ' Groups:%d' % (numgg))
+            self.topofetchtype)) + 'Fetched Endpoints:%d' % (numge) + ' Groups:%d' % (numgg) + cache_summary)
@@ -1,16 +1,17 @@
 import asyncio
-import json
 
 from collections import Callable
 from urllib.parse import urlparse
 
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors import jsoncodec
+from argo_connectors.jsoncodec import JsonPayload
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
 from argo_connectors.io.webapi import WebAPI
 from argo_connectors.mesh.contacts import attach_contacts_topodata
 from argo_connectors.parse.base import ParseHelpers
 from argo_connectors.parse.provider_contacts import ParseResourcesContacts
 from argo_connectors.parse.provider_topology import ParseTopo, ParseExtensions, buildmap_id2groupname
-from argo_connectors.tasks.common import write_topo_json as write_json, write_state
+from argo_connectors.tasks.common import build_http_cache, build_publish_state, webapi_batch_opts, webapi_compress, write_topo_json as write_json, write_state
 from argo_connectors.exceptions import ConnectorError, ConnectorParseError, ConnectorHttpError
 
 
@@ -47,7 +48,7 @@ class find_next_paging_cursor_count(ParseHelpers, Callable):
 
 
 def filter_out_results(data):
-    json_data = json.loads(data)['results']
+    json_data = jsoncodec.loads(data)['results']
     return json_data
 
 
@@ -56,8 +57,8 @@ def join_resources(left, right):
         Join default and extras resources leaving out duplicate if found from
         default.
     """
-    data_left = json.loads(left)['results']
-    data_right = json.loads(right)['results']
+    data_left = jsoncodec.loads(left)['results']
+    data_right = jsoncodec.loads(right)['results']
     keys = [resource['id'] for resource in data_right]
     new_def = []
     for resource_def in data_left:
@@ -65,14 +66,15 @@ def join_resources(left, right):
             continue
         new_def.append(resource_def)
 
-    return json.dumps({
+    return jsoncodec.dumps({
         'results': new_def + data_right
     })
 
 
 class TaskProviderTopology(object):
     def __init__(self, loop, logger, connector_name, globopts, webapi_opts,
-                 confcust, topofeedpaging, uidservendp, fetchtype, fixed_date):
+                 confcust, topofeedpaging, uidservendp, fetchtype, fixed_date,
+                 force_publish=False):
         self.loop = loop
         self.logger = logger
         self.connector_name = connector_name
@@ -83,6 +85,9 @@ class TaskProviderTopology(object):
         self.uidservendp = uidservendp
         self.fixed_date = fixed_date
         self.fetchtype = fetchtype
+        self.http_registry = SessionRegistry(globopts)
+        self.http_cache = build_http_cache(globopts, confcust)
+        self.publish_state = build_publish_state(globopts, confcust, force_publish)
 
     def parse_source_extensions(self, extensions, groupnames):
         resources_extended = ParseExtensions(self.logger, extensions, groupnames, self.uidservendp, self.logger.customer)
@@ -94,7 +99,7 @@ class TaskProviderTopology(object):
 
         return topo.get_group_groups(), topo.get_group_endpoints()
 
-    async def send_webapi(self, webapi_opts, data, topotype, fixed_date=None):
+    async def send_webapi(self, webapi_opts, sends, fixed_date=None):
         webapi = WebAPI(self.connector_name, webapi_opts['webapihost'],
                         webapi_opts['webapitoken'], self.logger,
                         int(self.globopts['ConnectionRetry'.lower()]),
@@ -102,13 +107,17 @@ class TaskProviderTopology(object):
                         int(self.globopts['ConnectionSleepRetry'.lower()]),
                         self.globopts['ConnectionRetryRandom'.lower()],
                         int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
-                        date=fixed_date)
-        await webapi.send(data, topotype)
+                        date=fixed_date, registry=self.http_registry,
+                        publish_state=self.publish_state,
+                        compress=webapi_compress(webapi_opts),
+                        **webapi_batch_opts(webapi_opts))
+        await webapi.send_many(sends)
 
     async def fetch_data(self, feed, access_token, paginated):
         fetched_data = list()
         remote_topo = urlparse(feed)
-        session = SessionWithRetry(self.logger, self.logger.customer, self.globopts, handle_session_close=True)
+        session = SessionWithRetry(self.logger, self.logger.customer, self.globopts, handle_session_close=True,
+                                   registry=self.http_registry, cache=self.http_cache)
 
         headers = {
             "Accept": "application/json",
@@ -177,7 +186,8 @@ class TaskProviderTopology(object):
 
     async def token_fetch(self, oidcclientid, oidctoken, oidcapi):
         token_endpoint = urlparse(oidcapi)
-        session = SessionWithRetry(self.logger, self.logger.customer, self.globopts, handle_session_close=True)
+        session = SessionWithRetry(self.logger, self.logger.customer, self.globopts, handle_session_close=True,
+                                   registry=self.http_registry)
 
         data = 'grant_type=refresh_token&refresh_token={0}'.format(oidctoken)
         data += '&client_id={0}&scope=openid%20email%20profile'.format(oidcclientid)
@@ -197,8 +207,8 @@ class TaskProviderTopology(object):
             await session.close()
 
         try:
-            access_token = json.loads(res).get('access_token', None)
-        except (json.decoder.JSONDecodeError, TypeError) as exc:
+            access_token = jsoncodec.loads(res).get('access_token', None)
+        except (jsoncodec.JSONDecodeError, TypeError) as exc:
             msg = "Could not extract OIDC Access token: {}".format(repr(exc))
             raise ConnectorParseError(msg)
 
@@ -254,15 +264,23 @@ class TaskProviderTopology(object):
             numge = len(group_endpoints)
             numgg = len(group_groups)
 
+            # encoded only once for WEB-API and JSON file
+            group_groups = JsonPayload(group_groups)
+            group_endpoints = JsonPayload(group_endpoints)
+
             # send concurrently to WEB-API in coroutines
+            coros = list()
             if eval(self.globopts['GeneralPublishWebAPI'.lower()]):
-                await asyncio.gather(
-                        self.send_webapi(self.webapi_opts, group_groups, 'groups', self.fixed_date),
-                        self.send_webapi(self.webapi_opts, group_endpoints,'endpoints', self.fixed_date),
-                        loop=self.loop
-                )
+                coros.append(self.send_webapi(self.webapi_opts, [(group_groups, 'groups'),
+                                                                 (group_endpoints, 'endpoints')],
+                                              self.fixed_date))
 
             if eval(self.globopts['GeneralWriteJson'.lower()]):
-                write_json(self.logger, self.globopts, self.confcust, group_groups, group_endpoints, self.fixed_date)
+                coros.append(write_json(self.logger, self.globopts, self.confcust, group_groups, group_endpoints, self.fixed_date))
+
+            await asyncio.gather(*coros, loop=self.loop)
 
-            self.logger.info('Customer:' + self.logger.customer + ' Fetched Endpoints:%d' % (numge) + ' Groups(%s):%d' % (self.fetchtype, numgg))
+            cache_summary = ' ' + self.http_cache.summary() if self.http_cache else ''
+            if self.publish_state:
+                cache_summary += ' ' + self.publish_state.summary()
+            self.logger.info('Customer:' + self.logger.customer + ' Fetched Endpoints:%d' % (numge) + ' Groups(%s):%d' % (self.fetchtype, numgg) + cache_summary)
@@ -2,10 +2,10 @@ import os
 
 from urllib.parse import urlparse
 
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
 from argo_connectors.io.webapi import WebAPI
 from argo_connectors.parse.vapor import ParseWeights
-from argo_connectors.tasks.common import write_weights_metricprofile_state as write_state, write_weights_json as write_json
+from argo_connectors.tasks.common import build_http_cache, build_resource_ids, webapi_compress, write_weights_metricprofile_state as write_state, write_weights_json as write_json
 
 
 class TaskVaporWeights(object):
@@ -20,11 +20,15 @@ class TaskVaporWeights(object):
         self.jobcust = jobcust
         self.cglob = cglob
         self.fixed_date = fixed_date
+        self.http_registry = SessionRegistry(globopts)
+        self.http_cache = build_http_cache(globopts, confcust)
+        self.resource_ids = dict()
 
     async def fetch_data(self):
         feed_parts = urlparse(self.feed)
         session = SessionWithRetry(self.logger, os.path.basename(
-            self.connector_name), self.globopts)
+            self.connector_name), self.globopts, registry=self.http_registry,
+            cache=self.http_cache)
         res = await session.http_get('{}://{}{}'.format(feed_parts.scheme,
                                                         feed_parts.netloc,
                                                         feed_parts.path))
@@ -44,7 +48,9 @@ class TaskVaporWeights(object):
         weights = ParseWeights(self.logger, res).get_data()
         return weights
 
-    async def send_webapi(self, weights, webapi_opts, job):
+    async def send_webapi(self, weights, webapi_opts, cust, job):
+        if cust not in self.resource_ids:
+            self.resource_ids[cust] = build_resource_ids(self.globopts, self.confcust, cust)
         webapi = WebAPI(self.connector_name, webapi_opts['webapihost'],
                         webapi_opts['webapitoken'], self.logger,
                         int(self.globopts['ConnectionRetry'.lower()]),
@@ -53,7 +59,9 @@ class TaskVaporWeights(object):
                         self.globopts['ConnectionRetryRandom'.lower()],
                         int(self.globopts['ConnectionSleepRandomRetryMax'.lower()]),
                         report=self.confcust.get_jobdir(job), endpoints_group='SITES',
-                        date=self.fixed_date)
+                        date=self.fixed_date, registry=self.http_registry,
+                        compress=webapi_compress(webapi_opts),
+                        resource_ids=self.resource_ids[cust])
         await webapi.send(weights)
 
     async def run(self):
@@ -72,11 +80,11 @@ class TaskVaporWeights(object):
             webapi_opts = self.get_webapi_opts(cust, job)
 
             if eval(self.globopts['GeneralPublishWebAPI'.lower()]):
-                await self.send_webapi(weights, webapi_opts, job)
+                await self.send_webapi(weights, webapi_opts, cust, job)
 
             if eval(self.globopts['GeneralWriteJson'.lower()]):
-                write_json(self.logger, self.globopts, cust, job,
-                           self.confcust, self.fixed_date, weights)
+                await write_json(self.logger, self.globopts, cust, job,
+                                 self.confcust, self.fixed_date, weights)
 
             await write_state(self.connector_name, self.globopts, cust, job, self.confcust, self.fixed_date, True)
 
@@ -84,8 +92,9 @@ class TaskVaporWeights(object):
             custs = set([cust for job, cust in self.jobcust])
             for cust in custs:
                 jobs = [job for job, lcust in self.jobcust if cust == lcust]
+                cache_summary = ' ' + self.http_cache.summary() if self.http_cache else ''
                 self.logger.info('Customer:%s Jobs:%s Sites:%d' %
                                  (self.confcust.get_custname(cust), jobs[0]
                                      if len(jobs) == 1 else
                                      '({0})'.format(','.join(jobs)),
-                                     len(weights)))
+                                     len(weights)) + cache_summary)
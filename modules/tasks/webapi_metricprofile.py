@@ -1,7 +1,7 @@
 import os
 
 from argo_connectors.exceptions import ConnectorHttpError, ConnectorParseError
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
 from argo_connectors.tasks.common import write_weights_metricprofile_state as write_state, write_metricprofile_json as write_json
 from argo_connectors.parse.webapi_metricprofile import ParseMetricProfiles
 
@@ -19,11 +19,13 @@ class TaskWebApiMetricProfile(object):
         self.confcust = confcust
         self.cglob = cglob
         self.fixed_date = fixed_date
+        self.http_registry = SessionRegistry(globopts)
 
     async def fetch_data(self, host, token):
         session = SessionWithRetry(self.logger,
                                    os.path.basename(self.connector_name),
-                                   self.globopts, token=token)
+                                   self.globopts, token=token,
+                                   registry=self.http_registry)
         res = await session.http_get('{}://{}{}'.format('https', host, API_PATH))
         return res
 
@@ -53,7 +55,7 @@ class TaskWebApiMetricProfile(object):
                 await write_state(self.connector_name, self.globopts, self.cust, job, self.confcust, self.fixed_date, True)
 
                 if eval(self.globopts['GeneralWriteJson'.lower()]):
-                    write_json(self.logger, self.globopts, self.cust, job, self.confcust, self.fixed_date, fetched_profiles)
+                    await write_json(self.logger, self.globopts, self.cust, job, self.confcust, self.fixed_date, fetched_profiles)
 
                 self.logger.info('Customer:' + self.logger.customer + ' Job:' + job + ' Profiles:%s Tuples:%d' % (', '.join(profiles), len(fetched_profiles)))
 
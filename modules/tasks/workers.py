@@ -0,0 +1,232 @@
+import asyncio
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from argo_connectors.parse.base import XML_FEED_CHUNK_SIZE
+
+_worker_logger = None
+_parse_pool = None
+
+
+def _init_worker(logger):
+    global _worker_logger
+
+    # import parsing machinery once when worker starts so no parse job pays
+    # for it, modules are only preloaded and not used here
+    import lxml.etree  # noqa: F401
+    import argo_connectors.parse.gocdb_contacts  # noqa: F401
+    import argo_connectors.parse.gocdb_topology  # noqa: F401
+
+    _worker_logger = logger
+
+
+def _shared_chunks(shm, size):
+    buf = shm.buf
+    for i in range(0, size, XML_FEED_CHUNK_SIZE):
+        yield bytes(buf[i:min(i + XML_FEED_CHUNK_SIZE, size)])
+
+
+def _run_shared(func, name, size, customer, args):
+    # logger copy in worker is taken when worker starts, customer is set
+    # for each job so log lines name the one that job is parsed for
+    _worker_logger.customer = customer
+
+    # workers share resource tracker with the parent that unlinks the
+    # segment once the job is done
+    shm = shared_memory.SharedMemory(name=name)
+    chunks = _shared_chunks(shm, size)
+    try:
+        return func(_worker_logger, *args, [chunks])
+
+    finally:
+        chunks.close()
+        shm.close()
+
+
+class PackedEntities(object):
+    """
+        Compact form of parsed topology entities used to move them between
+        processes. Every distinct string is stored once in strings table
+        and every distinct layout of entity keys, nested ones included,
+        once in shapes table, so single entity is a tuple of small integers.
+        Entities are turned back into dicts, with the keys in the original
+        order, only when they are iterated over.
+    """
+    STRING, VALUE = 0, 1
+
+    def __init__(self, strings=None, shapes=None, rows=None):
+        self.strings = strings if strings is not None else list()
+        self.shapes = shapes if shapes is not None else list()
+        self.rows = rows if rows is not None else list()
+
+    @classmethod
+    def pack(cls, entities):
+        packed = cls()
+        string_index, shape_index = dict(), dict()
+
+        for entity in entities:
+            shape, values = list(), list()
+            packed._flatten(entity, (), shape, values, string_index)
+            shape = tuple(shape)
+            if shape not in shape_index:
+                shape_index[shape] = len(packed.shapes)
+                packed.shapes.append(shape)
+            packed.rows.append((shape_index[shape],) + tuple(values))
+
+        return packed
+
+    @classmethod
+    def concat(cls, packs):
+        """
+            Join several packed pages into one with common strings and
+            shapes tables. Order of entities is kept.
+        """
+        packs = list(packs)
+        if len(packs) == 1:
+            return packs[0]
+
+        joined = cls()
+        string_index, shape_index = dict(), dict()
+        for pack in packs:
+            strings_map = [joined._intern(string, string_index)
+                           for string in pack.strings]
+            shapes_map = list()
+            for shape in pack.shapes:
+                if shape not in shape_index:
+                    shape_index[shape] = len(joined.shapes)
+                    joined.shapes.append(shape)
+                shapes_map.append(shape_index[shape])
+
+            for row in pack.rows:
+                shape = pack.shapes[row[0]]
+                joined.rows.append((shapes_map[row[0]],) + tuple(
+                    strings_map[value] if kind == cls.STRING else value
+                    for (_, kind), value in zip(shape, row[1:])
+                ))
+
+        return joined
+
+    def _intern(self, string, string_index):
+        if string not in string_index:
+            string_index[string] = len(self.strings)
+            self.strings.append(string)
+
+        return string_index[string]
+
+    def _flatten(self, entity, path, shape, values, string_index):
+        for key, value in entity.items():
+            if isinstance(value, dict) and value:
+                self._flatten(value, path + (key,), shape, values, string_index)
+            elif isinstance(value, str):
+                shape.append((path + (key,), self.STRING))
+                values.append(self._intern(value, string_index))
+            else:
+                shape.append((path + (key,), self.VALUE))
+                values.append(value)
+
+    def _unpack(self, row):
+        entity = dict()
+        for (keys, kind), value in zip(self.shapes[row[0]], row[1:]):
+            node = entity
+            for key in keys[:-1]:
+                node = node.setdefault(key, dict())
+            node[keys[-1]] = self.strings[value] if kind == self.STRING else value
+
+        return entity
+
+    def sort_by(self, field):
+        """
+            Stable in place sort of entities by value of top-level string
+            field.
+        """
+        positions = [dict((keys[0], i) for i, (keys, kind) in enumerate(shape, 1)
+                          if len(keys) == 1 and kind == self.STRING)[field]
+                     for shape in self.shapes]
+        self.rows.sort(key=lambda row: self.strings[row[positions[row[0]]]])
+
+        return self
+
+    def materialize(self):
+        return list(self)
+
+    def __iter__(self):
+        for row in self.rows:
+            yield self._unpack(row)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class ParseWorkerPool(object):
+    """
+        Long-lived pool of parse worker processes. Fetched feed is copied
+        into shared memory segment and only its name is sent to the worker
+        that reads it in chunks, instead of pickling the whole feed for
+        every job. Logger is handed to workers once, when they start, and
+        its current customer is sent along with every job.
+        Parse function is called in worker as func(logger, *args, data)
+        where data is a single page given as an iterable of bytes chunks.
+    """
+    def __init__(self, logger, size):
+        self.logger = logger
+        self.size = size
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.size,
+                                                 initializer=_init_worker,
+                                                 initargs=(self.logger,))
+        return self._executor
+
+    async def run(self, func, data, *args):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        size = len(data)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            shm.buf[:size] = data
+            loop = asyncio.get_event_loop()
+            customer = getattr(self.logger, 'customer', None)
+            return await loop.run_in_executor(self.executor, _run_shared,
+                                              func, shm.name, size,
+                                              customer, args)
+
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def get_parse_pool(logger, globopts):
+    """
+        Parse pool is created on first use and reused by every task of the
+        connector process afterwards, that is only for the single customer
+        the process runs for. Pool of different size than asked for is
+        shut down and created anew.
+    """
+    global _parse_pool
+
+    size = int(globopts.get('ParsePoolSize'.lower(), 3))
+    if _parse_pool is not None and _parse_pool.size != size:
+        shutdown_parse_pool()
+
+    if _parse_pool is None:
+        _parse_pool = ParseWorkerPool(logger, size)
+
+    return _parse_pool
+
+
+def shutdown_parse_pool():
+    global _parse_pool
+
+    if _parse_pool is not None:
+        _parse_pool.shutdown()
+        _parse_pool = None
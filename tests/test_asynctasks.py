@@ -5,14 +5,24 @@ import asyncio
 import datetime
 
 import mock
+import os
+import tempfile
+import time
 
+from bonsai import LDAPEntry
+
+from argo_connectors.log import Logger
 from argo_connectors.exceptions import ConnectorError, ConnectorParseError, ConnectorHttpError
+from argo_connectors.io.ldap import LDAPCache, LDAPSharedSession
 from argo_connectors.tasks.flat_downtimes import TaskCsvDowntimes
 from argo_connectors.tasks.flat_servicetypes import TaskFlatServiceTypes
 from argo_connectors.tasks.gocdb_servicetypes import TaskGocdbServiceTypes
-from argo_connectors.tasks.gocdb_topology import TaskGocdbTopology, find_next_paging_cursor_count
+from argo_connectors.tasks.gocdb_topology import TaskGocdbTopology, find_next_paging_cursor_count, parse_sites, merge_sorted_pages, PAGES_QUEUED
 from argo_connectors.tasks.provider_topology import TaskProviderTopology
+from argo_connectors.tasks.workers import ParseWorkerPool, shutdown_parse_pool
 from argo_connectors.parse.base import ParseHelpers
+from argo_connectors.parse.gocdb_topology import ParseSites
+from argo_connectors.parse.gocdb_contacts import ParseSitesWithContacts
 
 
 CUSTOMER_NAME = 'CUSTOMERFOO'
@@ -70,6 +80,9 @@ class TopologyGocdb(unittest.TestCase):
             notification_flag
         )
 
+    def tearDown(self):
+        shutdown_parse_pool()
+
     @mock.patch.object(ParseHelpers, 'parse_xml')
     @mock.patch('argo_connectors.io.http.build_connection_retry_settings')
     @mock.patch('argo_connectors.io.http.build_ssl_settings')
@@ -108,6 +121,340 @@ class TestFindNextPagingCursorCount(unittest.TestCase):
         self.assertEqual(cursor, '134')
 
 
+class TopologyGocdbPaging(unittest.TestCase):
+    def setUp(self):
+        self.logger = mock.Mock()
+        self.logger.customer = CUSTOMER_NAME
+        self.loop = asyncio.get_event_loop()
+        globopts = mock.MagicMock()
+        confcust = mock.Mock()
+        with open('tests/sample-topofeedpaging.xml', 'rb') as tf:
+            self.first_page = tf.read()
+        with open('tests/sample-site.xml', 'rb') as tf:
+            self.last_page = tf.read().replace(
+                b'<results>', b'<results>\n  <meta><count>0</count></meta>', 1)
+        self.topo_gocdb = TaskGocdbTopology(
+            self.loop, self.logger, 'test_asynctasks_topologygocdb',
+            'https://gocdb.com/serviceendpoints_api',
+            'https://gocdb.com/serviceegroups_api',
+            'https://gocdb.com/sites_api', globopts, mock.MagicMock(),
+            mock.MagicMock(), None, confcust, CUSTOMER_NAME,
+            'https://gocdb.com/', 'sites', None, False, False, True, False
+        )
+        pool_logger = Logger('test_asynctasks.py')
+        pool_logger.customer = CUSTOMER_NAME
+        self.pool = ParseWorkerPool(pool_logger, 2)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        shutdown_parse_pool()
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.tasks.gocdb_topology.SessionWithRetry.http_get')
+    @async_test
+    async def test_PagesParsedAsFetched(self, mock_httpget, mock_buildsslsettings):
+        mock_httpget.side_effect = [self.first_page, self.last_page]
+        group_groups, contacts = await self.topo_gocdb.fetch_parse_data(
+            'https://gocdb.com/sites_api', self.pool, parse_sites,
+            merge_sorted_pages)
+        pages = [self.first_page, self.last_page]
+        self.assertEqual(mock_httpget.call_count, 2)
+        self.assertEqual(mock_httpget.call_args[0][0],
+                         'https://gocdb.com/sites_api&next_cursor=134')
+        self.assertEqual(len(group_groups), 5)
+        group_groups = group_groups.materialize()
+        self.assertEqual(group_groups, ParseSites(self.logger, pages, CUSTOMER_NAME).get_group_groups())
+        self.assertEqual(contacts, ParseSitesWithContacts(self.logger, pages).get_contacts())
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.tasks.gocdb_topology.SessionWithRetry.http_get')
+    @async_test
+    async def test_FailedPageStopsPipeline(self, mock_httpget, mock_buildsslsettings):
+        mock_httpget.side_effect = [self.first_page, ConnectorHttpError('failed page')]
+        with self.assertRaises(ConnectorHttpError):
+            await self.topo_gocdb.fetch_parse_data('https://gocdb.com/sites_api',
+                                                   self.pool, parse_sites,
+                                                   merge_sorted_pages)
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.tasks.gocdb_topology.SessionWithRetry.http_get')
+    @async_test
+    async def test_SlowParsingHoldsBackFetch(self, mock_httpget, mock_buildsslsettings):
+        mock_httpget.side_effect = [self.first_page] * 9 + [self.last_page]
+        parsed = asyncio.Event()
+        pool = mock.Mock()
+        pool.size = 1
+
+        async def run(func, data, *args):
+            await parsed.wait()
+            return data
+
+        pool.run = run
+        fetch = asyncio.ensure_future(self.topo_gocdb.fetch_parse_data(
+            'https://gocdb.com/sites_api', pool, parse_sites, list))
+        await asyncio.sleep(0.1)
+        self.assertEqual(mock_httpget.call_count, pool.size + PAGES_QUEUED + 2)
+        parsed.set()
+        pages = await fetch
+        self.assertEqual(mock_httpget.call_count, 10)
+        self.assertEqual(pages, [self.first_page] * 9 + [self.last_page])
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.tasks.gocdb_topology.SessionWithRetry.http_get')
+    @async_test
+    async def test_FailedParseStopsFetch(self, mock_httpget, mock_buildsslsettings):
+        mock_httpget.side_effect = [self.first_page] * 9 + [self.last_page]
+        pool = mock.Mock()
+        pool.size = 1
+
+        async def run(func, data, *args):
+            await asyncio.sleep(0)
+            raise ConnectorParseError('failed page')
+
+        pool.run = run
+        with self.assertRaises(ConnectorParseError):
+            await self.topo_gocdb.fetch_parse_data('https://gocdb.com/sites_api',
+                                                   pool, parse_sites, list)
+        fetched = mock_httpget.call_count
+        await asyncio.sleep(0.1)
+        self.assertEqual(mock_httpget.call_count, fetched)
+        self.assertLess(fetched, 10)
+
+
+
+class LDAPEntries(object):
+    def __init__(self, entries):
+        self.entries = iter(entries)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        try:
+            return next(self.entries)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class LDAPEntriesFailing(LDAPEntries):
+    def __init__(self, entries, fail_after):
+        super().__init__(entries)
+        self.left = fail_after
+
+    async def __anext__(self):
+        if self.left == 0:
+            raise Exception('LDAP page failed')
+        self.left -= 1
+        return await super().__anext__()
+
+
+class LDAPShared(unittest.TestCase):
+    def setUp(self):
+        self.logger = mock.Mock()
+        self.logger.customer = CUSTOMER_NAME
+        self.loop = asyncio.get_event_loop()
+
+    @mock.patch('argo_connectors.io.ldap.bonsai.LDAPClient')
+    @async_test
+    async def test_SearchesShareConnection(self, mock_ldapclient):
+        conn = mock.Mock()
+        conn.paged_search = mock.AsyncMock()
+        conn.paged_search.side_effect = [LDAPEntries(['srm1', 'srm2']),
+                                         LDAPEntries(['path1', 'path2', 'path3'])]
+        mock_ldapclient.return_value.connect = mock.AsyncMock(return_value=conn)
+        srm, paths = list(), list()
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10)
+        nentries = await session.search_many([
+            ('o=grid', '(objectClass=GlueService)', ['GlueServiceEndpoint'], srm.append),
+            ('o=grid', '(objectClass=GlueSATop)', ['GlueVOInfoPath'], paths.append)
+        ])
+        await session.close()
+        self.assertEqual(nentries, [2, 3])
+        self.assertEqual(srm, ['srm1', 'srm2'])
+        self.assertEqual(paths, ['path1', 'path2', 'path3'])
+        self.assertEqual(mock_ldapclient.return_value.connect.call_count, 1)
+        self.assertEqual(conn.paged_search.call_count, 2)
+        self.assertTrue(conn.close.called)
+
+    @mock.patch('argo_connectors.io.ldap.bonsai.LDAPClient')
+    @async_test
+    async def test_SearchRetryReconnects(self, mock_ldapclient):
+        failed_conn, conn = mock.Mock(), mock.Mock()
+        failed_conn.paged_search = mock.AsyncMock(side_effect=Exception('LDAP failed'))
+        conn.paged_search = mock.AsyncMock(return_value=LDAPEntries(['srm1']))
+        mock_ldapclient.return_value.connect = mock.AsyncMock(side_effect=[failed_conn, conn])
+        srm = list()
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10)
+        nentries = await session.search('o=grid', '(objectClass=GlueService)',
+                                        ['GlueServiceEndpoint'], srm.append)
+        self.assertEqual(nentries, 1)
+        self.assertEqual(srm, ['srm1'])
+        self.assertTrue(failed_conn.close.called)
+        self.assertEqual(mock_ldapclient.return_value.connect.call_count, 2)
+
+    @mock.patch('argo_connectors.io.ldap.bonsai.LDAPClient')
+    @async_test
+    async def test_SearchFailedPageFedAgain(self, mock_ldapclient):
+        failed_conn, conn = mock.Mock(), mock.Mock()
+        failed_conn.paged_search = mock.AsyncMock(
+            return_value=LDAPEntriesFailing(['srm1', 'srm2', 'srm3'], 2))
+        conn.paged_search = mock.AsyncMock(return_value=LDAPEntries(['srm1', 'srm2', 'srm3']))
+        mock_ldapclient.return_value.connect = mock.AsyncMock(side_effect=[failed_conn, conn])
+        srm = list()
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10, page_size=2)
+        nentries = await session.search('o=grid', '(objectClass=GlueService)',
+                                        ['GlueServiceEndpoint'], srm.append)
+        self.assertEqual(nentries, 3)
+        self.assertEqual(srm, ['srm1', 'srm2', 'srm1', 'srm2', 'srm3'])
+
+
+
+class LDAPCached(unittest.TestCase):
+    def setUp(self):
+        self.logger = mock.Mock()
+        self.logger.customer = CUSTOMER_NAME
+        self.loop = asyncio.get_event_loop()
+        self.cachedir = tempfile.TemporaryDirectory()
+        self.cache = LDAPCache(self.cachedir.name, 3600)
+        self.search = ('o=grid', '(objectClass=GlueService)', ['GlueServiceEndpoint'])
+        self.entries = list()
+        for i in range(2):
+            entry = LDAPEntry('GlueServiceUniqueID=srm{0},o=grid'.format(i))
+            entry['GlueServiceEndpoint'] = ['httpg://srm{0}.host:8446/srm/managerv2'.format(i)]
+            self.entries.append(entry)
+
+    def tearDown(self):
+        self.cachedir.cleanup()
+
+    def _connection(self, mock_ldapclient, entries):
+        conn = mock.Mock()
+        conn.paged_search = mock.AsyncMock(return_value=LDAPEntries(entries))
+        mock_ldapclient.return_value.connect = mock.AsyncMock(return_value=conn)
+        return conn
+
+    @mock.patch('argo_connectors.io.ldap.bonsai.LDAPClient')
+    @async_test
+    async def test_FreshResultsFromCache(self, mock_ldapclient):
+        self._connection(mock_ldapclient, self.entries)
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10, cache=self.cache)
+        fetched = list()
+        await session.search(*self.search, fetched.append)
+        await session.close()
+        self.assertEqual(mock_ldapclient.return_value.connect.call_count, 1)
+
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10, cache=self.cache)
+        cached = list()
+        nentries = await session.search(*self.search, cached.append)
+        await session.close()
+        self.assertEqual(nentries, 2)
+        self.assertEqual(mock_ldapclient.return_value.connect.call_count, 1)
+        self.assertEqual([str(entry['dn']) for entry in cached],
+                         [str(entry['dn']) for entry in fetched])
+        self.assertEqual([entry['GlueServiceEndpoint'][0] for entry in cached],
+                         ['httpg://srm0.host:8446/srm/managerv2',
+                          'httpg://srm1.host:8446/srm/managerv2'])
+        self.assertEqual(self.cache.summary(), 'BDIICacheHits:1 BDIICacheMisses:1')
+
+    @mock.patch('argo_connectors.io.ldap.bonsai.LDAPClient')
+    @async_test
+    async def test_FailedSearchNotCached(self, mock_ldapclient):
+        failed_conn, conn = mock.Mock(), mock.Mock()
+        failed_conn.paged_search = mock.AsyncMock(
+            return_value=LDAPEntriesFailing(self.entries, 1))
+        conn.paged_search = mock.AsyncMock(return_value=LDAPEntries(self.entries))
+        mock_ldapclient.return_value.connect = mock.AsyncMock(side_effect=[failed_conn, conn])
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10,
+                                    page_size=1, cache=self.cache)
+        fetched = list()
+        nentries = await session.search(*self.search, fetched.append)
+        await session.close()
+        self.assertEqual(nentries, 2)
+        self.assertEqual(len(fetched), 3)
+        cache_path = self.cache.path('bdii.host', '2170', *self.search)
+        self.assertEqual(os.listdir(self.cachedir.name), [os.path.basename(cache_path)])
+        cached = list()
+        await self.cache.load(cache_path, cached.append)
+        self.assertEqual([str(entry['dn']) for entry in cached],
+                         [str(entry['dn']) for entry in self.entries])
+        self.assertEqual(self.cache.summary(), 'BDIICacheHits:1 BDIICacheMisses:1')
+
+    @mock.patch('argo_connectors.io.ldap.bonsai.LDAPClient')
+    @async_test
+    async def test_StaleResultsRefreshedInBackground(self, mock_ldapclient):
+        self._connection(mock_ldapclient, self.entries[:1])
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10, cache=self.cache)
+        await session.search(*self.search, lambda entry: None)
+        await session.close()
+        cache_path = self.cache.path('bdii.host', '2170', *self.search)
+        mtime = time.time() - 2 * 3600
+        os.utime(cache_path, (mtime, mtime))
+
+        self._connection(mock_ldapclient, self.entries)
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10,
+                                    cache=self.cache, background_refresh=True)
+        stale = list()
+        await session.search(*self.search, stale.append)
+        self.assertEqual(len(stale), 1)
+        self.assertEqual(len(session.refreshes), 1)
+        await asyncio.wait(session.refreshes)
+        await session.close()
+        self.assertTrue(self.cache.is_fresh(cache_path))
+
+        refreshed = list()
+        await self.cache.load(cache_path, refreshed.append)
+        self.assertEqual(len(refreshed), 2)
+
+    @mock.patch('argo_connectors.io.ldap.bonsai.LDAPClient')
+    @async_test
+    async def test_TooOldResultsFetched(self, mock_ldapclient):
+        self._connection(mock_ldapclient, self.entries[:1])
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10, cache=self.cache)
+        await session.search(*self.search, lambda entry: None)
+        await session.close()
+        cache_path = self.cache.path('bdii.host', '2170', *self.search)
+        os.utime(cache_path, (0, 0))
+
+        self._connection(mock_ldapclient, self.entries)
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10,
+                                    cache=self.cache, background_refresh=True)
+        fetched = list()
+        await session.search(*self.search, fetched.append)
+        await session.close()
+        self.assertEqual(len(fetched), 2)
+        self.assertEqual(session.refreshes, list())
+        self.assertTrue(self.cache.is_fresh(cache_path))
+
+    @mock.patch('argo_connectors.io.ldap.bonsai.LDAPClient')
+    @async_test
+    async def test_UnfinishedRefreshCancelledOnClose(self, mock_ldapclient):
+        self._connection(mock_ldapclient, self.entries[:1])
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10, cache=self.cache)
+        await session.search(*self.search, lambda entry: None)
+        await session.close()
+        cache_path = self.cache.path('bdii.host', '2170', *self.search)
+        mtime = time.time() - 2 * 3600
+        os.utime(cache_path, (mtime, mtime))
+
+        async def paged_search(*args, **kwargs):
+            await asyncio.sleep(3600)
+
+        conn = self._connection(mock_ldapclient, self.entries)
+        conn.paged_search.side_effect = paged_search
+        session = LDAPSharedSession(self.logger, 'bdii.host', '2170', 3, 0, 10,
+                                    cache=self.cache, background_refresh=True)
+        stale = list()
+        await session.search(*self.search, stale.append)
+        await asyncio.sleep(0)
+        refresh = session.refreshes[0]
+        await asyncio.wait_for(session.close(), 1)
+        self.assertTrue(refresh.cancelled())
+        self.assertEqual(conn.paged_search.call_count, 1)
+        self.assertEqual(len(stale), 1)
+        self.assertFalse(self.cache.is_fresh(cache_path))
+        self.assertEqual(os.listdir(self.cachedir.name), [os.path.basename(cache_path)])
+
+
 class TopologyProvider(unittest.TestCase):
     def setUp(self):
         logger = mock.Mock()
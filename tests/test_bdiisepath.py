@@ -4,7 +4,7 @@ import json
 import mock
 
 from argo_connectors.log import Logger
-from argo_connectors.mesh.storage_element_path import attach_sepath_topodata
+from argo_connectors.mesh.storage_element_path import attach_sepath_topodata, build_endpoint_path_index
 
 from bonsai import LDAPEntry
 
@@ -172,6 +172,18 @@ class MeshSePathAndTopodata(unittest.TestCase):
                 'type': 'SITES'
             }])
 
+    def test_endpointPathIndex(self):
+        index = build_endpoint_path_index(logger, self.sample_ldap)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(list(index.vo_paths('grid-se.physik.uni-wuppertal.de')), [
+            ('ops', '/pnfs/physik.uni-wuppertal.de/data/ops'),
+            ('dteam', '/pnfs/physik.uni-wuppertal.de/data/dteam')
+        ])
+        self.assertEqual(list(index.vo_paths('se02.esc.qmul.ac.uk')), [
+            ('ops', '/info'), ('dteam', '/info')
+        ])
+        self.assertEqual(list(index.vo_paths('unknown.host')), [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -3,7 +3,8 @@ import unittest
 from argo_connectors.log import Logger
 from argo_connectors.parse.gocdb_contacts import ParseSitesWithContacts, \
     ParseServiceEndpointContacts, ParseServiceGroupWithContacts, ConnectorParseError
-from argo_connectors.parse.gocdb_topology import ParseServiceEndpoints
+from argo_connectors.parse.base import ParseHelpers
+from argo_connectors.parse.gocdb_topology import ParseServiceEndpoints, ParseSites
 from argo_connectors.parse.provider_topology import ParseTopo
 from argo_connectors.parse.flat_contacts import ParseContacts as ParseFlatContacts
 from argo_connectors.parse.provider_contacts import ParseResourcesContacts, ParseProvidersContacts
@@ -30,6 +31,14 @@ class ParseSitesWithContactTest(unittest.TestCase):
             }
         )
 
+    def test_sharedParsedDocument(self):
+        docs = ParseHelpers(logger).parse_xml_documents(self.content)
+        group_groups = ParseSites(logger, docs, CUSTOMER_NAME).get_group_groups()
+        self.assertEqual(ParseSitesWithContacts(logger, docs).get_contacts(),
+                         self.site_contacts)
+        self.assertEqual(group_groups,
+                         ParseSites(logger, self.content, CUSTOMER_NAME).get_group_groups())
+
 
 class ParseServiceEndpointsWithContactsTest(unittest.TestCase):
     def setUp(self):
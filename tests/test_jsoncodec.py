@@ -0,0 +1,88 @@
+import asyncio
+import json
+import unittest
+
+import mock
+
+from argo_connectors import jsoncodec
+from argo_connectors.jsoncodec import JsonPayload
+
+
+class JsonCodec(unittest.TestCase):
+    def setUp(self):
+        self.backend = jsoncodec.backend
+        with open('tests/sample-private-resource.json', encoding='utf-8') as feed_file:
+            self.resources = feed_file.read()
+
+    def tearDown(self):
+        jsoncodec.set_backend(self.backend)
+
+    def test_loadsSameForBackends(self):
+        for backend in jsoncodec.available_backends():
+            jsoncodec.set_backend(backend)
+            self.assertEqual(jsoncodec.loads(self.resources), json.loads(self.resources))
+            self.assertEqual(jsoncodec.loads(self.resources.encode('utf-8')),
+                             json.loads(self.resources))
+
+    def test_dumpsRoundtrip(self):
+        data = json.loads(self.resources)
+        for backend in jsoncodec.available_backends():
+            jsoncodec.set_backend(backend)
+            self.assertEqual(json.loads(jsoncodec.dumps(data)), data)
+            self.assertEqual(jsoncodec.dumps(data, indent=4), json.dumps(data, indent=4))
+            self.assertEqual(json.loads(jsoncodec.dumps({1: 'a'})), {'1': 'a'})
+            self.assertEqual(json.loads(jsoncodec.dumps({'big': 2 ** 70})), {'big': 2 ** 70})
+
+    def test_decodeError(self):
+        for backend in jsoncodec.available_backends():
+            jsoncodec.set_backend(backend)
+            with self.assertRaises(jsoncodec.JSONDecodeError):
+                jsoncodec.loads('FAILED_DATA')
+            with self.assertRaises(ValueError):
+                jsoncodec.loads('FAILED_DATA')
+
+    def test_unavailableBackend(self):
+        with self.assertRaises(ValueError):
+            jsoncodec.set_backend('simdjson')
+
+
+class JsonCodecPayload(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.data = [{'group': 'SITE{}'.format(i), 'hostname': 'host{}.foo.bar'.format(i)}
+                     for i in range(jsoncodec.PAYLOAD_THREAD_RECORDS)]
+
+    def tearDown(self):
+        self.loop.close()
+
+    @mock.patch('argo_connectors.jsoncodec.dumpb', wraps=jsoncodec.dumpb)
+    def test_encodedOnce(self, mocked_dumpb):
+        payload = JsonPayload(self.data)
+
+        async def run():
+            return await asyncio.gather(payload.encode(), payload.encode())
+
+        first, second = self.loop.run_until_complete(run())
+        self.assertIs(first, second)
+        self.assertIs(payload.body, first)
+        self.assertEqual(json.loads(first), self.data)
+        self.assertEqual(mocked_dumpb.call_count, 1)
+        self.assertEqual(len(payload), len(self.data))
+        self.assertIs(jsoncodec.payload_data(payload), self.data)
+        self.assertIs(jsoncodec.payload_data(self.data), self.data)
+
+    def test_canonicalDigest(self):
+        reordered = [dict(reversed(list(entry.items()))) for entry in self.data]
+
+        async def run():
+            return await asyncio.gather(JsonPayload(self.data).digest(),
+                                        JsonPayload(reordered).digest(),
+                                        JsonPayload(self.data[1:]).digest())
+
+        first, second, third = self.loop.run_until_complete(run())
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,12 @@
+import asyncio
+import gzip
 import unittest
 import json
 from unittest.mock import mock_open, patch, Mock
 import os
 
-from argo_connectors.io.jsonwrite import JsonWriter
+from argo_connectors.io.jsonwrite import JsonWriter, JsonStreamWriter, NdjsonWriter
+from argo_connectors.jsoncodec import JsonPayload
 
 mock_json = [
     {
@@ -78,5 +81,134 @@ class TestJsonWriter(unittest.TestCase):
             self.assertEqual(str(error), "Mocked error: line 1 column 1 (char 0)")
 
 
+class TestJsonStreamWriter(unittest.TestCase):
+    def setUp(self):
+        self.data = [dict(mock_json[0], subgroup='dirac-durham-{}'.format(i))
+                     for i in range(5000)]
+
+    def tearDown(self):
+        if os.path.exists(mock_filename + '.gz'):
+            os.remove(mock_filename + '.gz')
+
+        if os.path.exists(mock_filename):
+            os.remove(mock_filename)
+
+    def test_write_same_as_jsonwriter(self):
+        writer = JsonStreamWriter(self.data, mock_filename, 'False')
+        success, error = writer.write_json()
+        self.assertTrue(success)
+        self.assertIsNone(error)
+        with open(mock_filename) as fp:
+            self.assertEqual(fp.read(), json.dumps(self.data, indent=4))
+
+    def test_write_compressed(self):
+        writer = JsonStreamWriter(self.data, mock_filename, 'True')
+        loop = asyncio.new_event_loop()
+        success, error = loop.run_until_complete(writer.write_json_async())
+        loop.close()
+        self.assertTrue(success)
+        with gzip.open(mock_filename + '.gz', 'rb') as fp:
+            self.assertEqual(fp.read(), json.dumps(self.data, indent=4).encode())
+
+    def test_write_compact(self):
+        writer = JsonStreamWriter(self.data, mock_filename, 'False', compact=True)
+        success, error = writer.write_json()
+        self.assertTrue(success)
+        with open(mock_filename) as fp:
+            content = fp.read()
+        self.assertNotIn('\n', content)
+        self.assertEqual(json.loads(content), self.data)
+
+        writer = JsonStreamWriter([], mock_filename, 'False', compact=True)
+        writer.write_json()
+        with open(mock_filename) as fp:
+            self.assertEqual(json.load(fp), [])
+
+    def test_write_compact_payload(self):
+        payload = JsonPayload(self.data)
+        writer = JsonStreamWriter(payload, mock_filename, 'True', compact=True)
+        loop = asyncio.new_event_loop()
+        success, error = loop.run_until_complete(writer.write_json_async())
+        loop.close()
+        self.assertTrue(success)
+        with gzip.open(mock_filename + '.gz', 'rb') as fp:
+            self.assertEqual(fp.read(), payload.body)
+
+        writer = JsonStreamWriter(payload, mock_filename, 'False')
+        writer.write_json()
+        with open(mock_filename) as fp:
+            self.assertEqual(fp.read(), json.dumps(self.data, indent=4))
+
+    def test_fail_write(self):
+        writer = JsonStreamWriter(self.data, '/nonexisting/' + mock_filename, 'False')
+        success, error = writer.write_json()
+        self.assertFalse(success)
+        self.assertIsInstance(error, OSError)
+
+
+class TestNdjsonWriter(unittest.TestCase):
+    def setUp(self):
+        self.filename = 'mock_file.json'
+        self.ndjson = 'mock_file.ndjson'
+        self.data = list()
+        for i in range(3000):
+            self.data.append(dict(mock_json[0], subgroup='dirac-durham-{}'.format(i),
+                                  type='NGI' if i % 2 else 'SITES',
+                                  group='group-{}'.format(i // 1000)))
+
+    def tearDown(self):
+        for filename in [self.ndjson, self.ndjson + '.gz', self.ndjson + '.idx']:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def test_write_ndjson_index(self):
+        writer = NdjsonWriter(JsonPayload(self.data), self.filename, 'False')
+        success, error = writer.write_json()
+        self.assertTrue(success)
+        self.assertIsNone(error)
+
+        with open(self.ndjson, 'rb') as fp:
+            content = fp.read()
+        self.assertEqual([json.loads(line) for line in content.splitlines()], self.data)
+
+        with open(self.ndjson + '.idx') as fp:
+            index = json.load(fp)
+        self.assertEqual(sorted(index['group'].keys()), ['group-0', 'group-1', 'group-2'])
+        self.assertEqual(len(index['group']['group-1']), 1)
+        self.assertEqual(len(index['type']['NGI']), 1500)
+
+        offset, length = index['group']['group-1'][0]
+        records = [json.loads(line) for line in content[offset:offset + length].splitlines()]
+        self.assertEqual(records, self.data[1000:2000])
+
+        offset, length = index['type']['SITES'][1]
+        self.assertEqual(json.loads(content[offset:offset + length]), self.data[2])
+
+    def test_write_ndjson_compressed(self):
+        writer = NdjsonWriter(self.data, self.filename, 'True', index_keys=('group', 'type'))
+        success, error = writer.write_json()
+        self.assertTrue(success)
+        self.assertIsNone(error)
+
+        with gzip.open(self.ndjson + '.gz', 'rb') as fp:
+            self.assertEqual([json.loads(line) for line in fp.read().splitlines()], self.data)
+
+        with open(self.ndjson + '.idx') as fp:
+            index = json.load(fp)
+        self.assertEqual(len(index['type']['NGI']), 1500)
+
+        def read_range(member, offset, length):
+            with open(self.ndjson + '.gz', 'rb') as fp:
+                fp.seek(member)
+                with gzip.GzipFile(fileobj=fp) as member_fp:
+                    member_fp.seek(offset)
+                    return [json.loads(line) for line in member_fp.read(length).splitlines()]
+
+        group_ranges = index['group']['group-2']
+        self.assertTrue(all(member > 0 for member, _, _ in group_ranges))
+        self.assertEqual([record for r in group_ranges for record in read_range(*r)],
+                         self.data[2000:])
+        self.assertEqual(read_range(*index['type']['NGI'][-1]), [self.data[-1]])
+
 if __name__ == '__main__':
     unittest.main()
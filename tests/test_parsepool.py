@@ -0,0 +1,114 @@
+import asyncio
+import os
+import unittest
+
+from argo_connectors.log import Logger
+from argo_connectors.parse.gocdb_topology import ParseSites, ParseServiceEndpoints
+from argo_connectors.tasks.workers import PackedEntities, ParseWorkerPool, get_parse_pool, shutdown_parse_pool
+
+
+logger = Logger('test_parsepool.py')
+CUSTOMER_NAME = 'CUSTOMERFOO'
+
+
+def parse_sites(logger, custname, data):
+    return ParseSites(logger, data, custname).get_group_groups()
+
+
+def worker_pid(logger, data):
+    return os.getpid(), b''.join(b''.join(page) for page in data)
+
+
+def worker_customer(logger, data):
+    return logger.customer
+
+
+class ParseWorkerPoolTest(unittest.TestCase):
+    def setUp(self):
+        logger.customer = CUSTOMER_NAME
+        self.loop = asyncio.get_event_loop()
+        with open('tests/sample-site.xml', 'rb') as feed_file:
+            self.content = feed_file.read()
+        self.pool = ParseWorkerPool(logger, 1)
+        shutdown_parse_pool()
+
+    def tearDown(self):
+        self.pool.shutdown()
+        shutdown_parse_pool()
+
+    def test_parseInWorker(self):
+        group_groups = self.loop.run_until_complete(
+            self.pool.run(parse_sites, self.content, CUSTOMER_NAME))
+        self.assertEqual(group_groups,
+                         ParseSites(logger, self.content, CUSTOMER_NAME).get_group_groups())
+
+        group_groups = self.loop.run_until_complete(
+            self.pool.run(parse_sites, self.content.decode('utf-8'), CUSTOMER_NAME))
+        self.assertEqual(len(group_groups), 3)
+
+    def test_workerReused(self):
+        first_pid, first_data = self.loop.run_until_complete(
+            self.pool.run(worker_pid, self.content))
+        second_pid, second_data = self.loop.run_until_complete(
+            self.pool.run(worker_pid, b''))
+        self.assertEqual(first_pid, second_pid)
+        self.assertNotEqual(first_pid, os.getpid())
+        self.assertEqual(first_data, self.content)
+        self.assertEqual(second_data, b'')
+
+    def test_workerCustomer(self):
+        customer = self.loop.run_until_complete(
+            self.pool.run(worker_customer, b''))
+        self.assertEqual(customer, CUSTOMER_NAME)
+        logger.customer = 'CUSTOMERBAR'
+        customer = self.loop.run_until_complete(
+            self.pool.run(worker_customer, b''))
+        self.assertEqual(customer, 'CUSTOMERBAR')
+
+    def test_sharedPool(self):
+        globopts = {'parsepoolsize': '2'}
+        pool = get_parse_pool(logger, globopts)
+        self.assertIs(get_parse_pool(logger, globopts), pool)
+        self.assertEqual(pool.size, 2)
+        resized = get_parse_pool(logger, {'parsepoolsize': '1'})
+        self.assertIsNot(resized, pool)
+        self.assertEqual(resized.size, 1)
+        self.assertIsNone(pool._executor)
+        shutdown_parse_pool()
+        self.assertIsNot(get_parse_pool(logger, globopts), pool)
+        shutdown_parse_pool()
+
+
+class PackedEntitiesTest(unittest.TestCase):
+    def setUp(self):
+        logger.customer = CUSTOMER_NAME
+        with open('tests/sample-service_endpoint.xml') as feed_file:
+            self.endpoints = ParseServiceEndpoints(logger, feed_file.read(),
+                                                   CUSTOMER_NAME, True, True,
+                                                   True).get_group_endpoints()
+
+    def test_packedRoundTrip(self):
+        packed = PackedEntities.pack(self.endpoints)
+        self.assertEqual(len(packed), len(self.endpoints))
+        self.assertEqual(packed.materialize(), self.endpoints)
+        for entity, orig in zip(packed, self.endpoints):
+            self.assertEqual(list(entity.keys()), list(orig.keys()))
+            self.assertEqual(list(entity['tags'].keys()), list(orig['tags'].keys()))
+        self.assertEqual(len(packed.strings), len(set(packed.strings)))
+        self.assertTrue(all(isinstance(value, int) for row in packed.rows
+                            for value in row if not isinstance(value, (bool, list))))
+
+    def test_concatSorted(self):
+        half = len(self.endpoints) // 2
+        packed = PackedEntities.concat([PackedEntities.pack(self.endpoints[half:]),
+                                        PackedEntities.pack(self.endpoints[:half]),
+                                        PackedEntities.pack([])])
+        self.assertEqual(packed.materialize(), self.endpoints[half:] + self.endpoints[:half])
+        packed.sort_by('group')
+        self.assertEqual(packed.materialize(),
+                         sorted(self.endpoints[half:] + self.endpoints[:half],
+                                key=lambda entity: entity['group']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,24 @@
 import unittest
 import mock
 import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+import time
 
 from aiohttp import client_exceptions
 from aiohttp import http_exceptions
 
-from argo_connectors.io.http import SessionWithRetry
+from argo_connectors.io.http import SessionWithRetry, SessionRegistry
+from argo_connectors.io.httpcache import HttpCache
+from argo_connectors.io.publishstate import PublishState
+from argo_connectors.io.resourceids import ResourceIds
+from argo_connectors.io.webapi import WebAPI
+from argo_connectors import jsoncodec
+from argo_connectors.jsoncodec import JsonPayload
 from argo_connectors.log import Logger
+from argo_connectors.tasks.common import run_task
 from argo_connectors.exceptions import ConnectorHttpError
 
 logger = Logger('test_topofeed.py')
@@ -74,6 +86,38 @@ class mockHttpErroneousStatuses(mock.AsyncMock):
         pass
 
 
+class mockHttpWithETag(mock.AsyncMock):
+    async def __aenter__(self, *args, **kwargs):
+        mock_obj = mock.AsyncMock()
+        mock_obj.text.return_value = 'mocked cacheable response data'
+        mock_obj.status = 200
+        mock_obj.headers = {'ETag': '"fa1afe1"'}
+        return mock_obj
+    async def __aexit__(self, *args, **kwargs):
+        pass
+
+
+class mockHttpNotModified(mock.AsyncMock):
+    async def __aenter__(self, *args, **kwargs):
+        mock_obj = mock.AsyncMock()
+        mock_obj.text.return_value = ''
+        mock_obj.status = 304
+        mock_obj.headers = {'ETag': '"fa1afe1"'}
+        return mock_obj
+    async def __aexit__(self, *args, **kwargs):
+        pass
+
+
+class mockHttpBinary(mock.AsyncMock):
+    async def __aenter__(self, *args, **kwargs):
+        mock_obj = mock.AsyncMock()
+        mock_obj.status = 200
+        mock_obj.read.return_value = '<results><SITE>\u0160</SITE></results>'.encode('utf-8')
+        return mock_obj
+    async def __aexit__(self, *args, **kwargs):
+        pass
+
+
 class ConnectorsHttpRetry(unittest.TestCase):
     def setUp(self):
         self.loop = asyncio.get_event_loop()
@@ -154,7 +198,387 @@ class ConnectorsHttpRetry(unittest.TestCase):
         self.assertEqual(mocked_httperrorstatuses.call_count, 1)
         self.assertFalse(mocked_httperrorstatuses.text.called)
 
+    @mock.patch('aiohttp.ClientSession.get', side_effect=mockHttpBinary)
+    @async_test
+    async def test_ConnectorBinaryBody(self, mocked_get):
+        self.session.binary = True
+        self.session.verbose_ret = False
+        res = await self.session.http_get('http://localhost/url_path')
+        self.assertEqual(res, '<results><SITE>\u0160</SITE></results>'.encode('utf-8'))
+
     def tearDown(self):
         async def run():
             await self.session.close()
         self.loop.run_until_complete(run())
+
+
+class ConnectorsSessionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        logger.customer = CUSTOMER_NAME
+        self.globopts = {
+            'authenticationcafile': 'fakeca',
+            'authenticationcapath': 'fakepath',
+            'authenticationhostcert': 'fakehostcert',
+            'authenticationhostkey': 'fakehostkey',
+            'connectionretry': '3', 'connectionsleepretry': '1',
+            'connectiontimeout': '180', 'connectionretryrandom' : 'False',
+            'connectionsleeprandomretrymax': '5',
+            'connectionpoolsize': '4', 'connectionkeepalivetimeout': '30'
+        }
+        self.registry = SessionRegistry(self.globopts)
+
+    def test_SessionPerHost(self):
+        async def run():
+            first = self.registry.get_session('https://goc.foo.bar/gocdbpi/?method=get_site')
+            second = self.registry.get_session('https://goc.foo.bar/gocdbpi/?method=get_service_endpoint')
+            other = self.registry.get_session('https://api.foo.bar/api/v2/topology')
+            self.assertIs(first, second)
+            self.assertIsNot(first, other)
+            self.assertEqual(first.connector.limit, 4)
+        self.loop.run_until_complete(run())
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('aiohttp.ClientSession.get', side_effect=mockHttpAcceptableStatuses)
+    @async_test
+    async def test_SharedSessionNotClosed(self, mocked_get, mocked_buildssl):
+        mocked_buildssl.return_value = None
+        for page in range(3):
+            session = SessionWithRetry(logger, 'test_retry.py', self.globopts,
+                                       registry=self.registry)
+            await session.http_get('https://goc.foo.bar/url_path?next_cursor={}'.format(page))
+        self.assertEqual(mocked_get.call_count, 3)
+        self.assertEqual(mocked_buildssl.call_count, 1)
+        self.assertFalse(self.registry.get_session('https://goc.foo.bar/').closed)
+        await self.registry.close()
+        self.assertEqual(self.registry._sessions, dict())
+
+    def test_ClosedAfterFailedRun(self):
+        async def run():
+            task = mock.Mock()
+            task.http_registry = self.registry
+            task.run = mock.AsyncMock(side_effect=ConnectorHttpError())
+            session = self.registry.get_session('https://goc.foo.bar/')
+            with self.assertRaises(ConnectorHttpError):
+                await run_task(task)
+            self.assertTrue(session.closed)
+            self.assertEqual(self.registry._sessions, dict())
+        self.loop.run_until_complete(run())
+
+    def tearDown(self):
+        async def run():
+            await self.registry.close()
+        self.loop.run_until_complete(run())
+
+
+class ConnectorsHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        logger.customer = CUSTOMER_NAME
+        self.globopts = {
+            'authenticationcafile': 'fakeca',
+            'authenticationcapath': 'fakepath',
+            'authenticationhostcert': 'fakehostcert',
+            'authenticationhostkey': 'fakehostkey',
+            'connectionretry': '3', 'connectionsleepretry': '1',
+            'connectiontimeout': '180', 'connectionretryrandom' : 'False',
+            'connectionsleeprandomretrymax': '5',
+        }
+        self.cachedir = tempfile.mkdtemp()
+        self.cache = HttpCache(self.cachedir)
+        self.registry = SessionRegistry(self.globopts)
+        self.url = 'https://goc.foo.bar/gocdbpi/?method=get_service_endpoint'
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('aiohttp.ClientSession.get')
+    @async_test
+    async def test_ConditionalGet(self, mocked_get, mocked_buildssl):
+        mocked_buildssl.return_value = None
+        session = SessionWithRetry(logger, 'test_retry.py', self.globopts,
+                                   registry=self.registry, cache=self.cache)
+
+        mocked_get.side_effect = mockHttpWithETag
+        res = await session.http_get(self.url)
+        self.assertEqual(res, 'mocked cacheable response data')
+        self.assertNotIn('If-None-Match', mocked_get.call_args[1]['headers'])
+        self.assertEqual(len(os.listdir(self.cachedir)), 2)
+
+        mocked_get.side_effect = mockHttpNotModified
+        res = await session.http_get(self.url)
+        self.assertEqual(res, 'mocked cacheable response data')
+        self.assertEqual(mocked_get.call_args[1]['headers']['If-None-Match'], '"fa1afe1"')
+        self.assertEqual(self.cache.summary(),
+                         'CacheHits:1 CacheMisses:1 CacheSavedBytes:30')
+
+    def test_HitKeptFromPrune(self):
+        async def run():
+            await self.cache.store(self.url, 'ident', 'data', {'ETag': '"fa1afe1"'})
+            old = time.time() - 10 * 24 * 3600
+            for entry in os.listdir(self.cachedir):
+                os.utime(os.path.join(self.cachedir, entry), (old, old))
+            self.assertEqual(await self.cache.load(self.url, 'ident'), b'data')
+        self.loop.run_until_complete(run())
+        self.assertEqual(sorted(os.listdir(self.cachedir)),
+                         sorted(os.path.basename(path) for path in
+                                self.cache._paths(self.url, 'ident')))
+        HttpCache(self.cachedir, savedays=7)
+        self.assertEqual(len(os.listdir(self.cachedir)), 2)
+        self.assertEqual(self.cache.conditional_headers(self.url, 'ident'),
+                         {'If-None-Match': '"fa1afe1"'})
+
+    def test_NoValidatorsNotStored(self):
+        async def run():
+            await self.cache.store(self.url, 'ident', 'data', {})
+        self.loop.run_until_complete(run())
+        self.assertEqual(os.listdir(self.cachedir), [])
+        self.assertEqual(self.cache.conditional_headers(self.url, 'ident'), dict())
+
+    def tearDown(self):
+        async def run():
+            await self.registry.close()
+        self.loop.run_until_complete(run())
+        shutil.rmtree(self.cachedir)
+
+
+class WebAPIPayload(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        logger.customer = CUSTOMER_NAME
+        self.endpoints = [{'group': 'SITE{}'.format(i), 'hostname': 'host{}.foo.bar'.format(i),
+                           'service': 'foo.service', 'type': 'SITES', 'tags': {}}
+                          for i in range(10)]
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.jsoncodec.dumpb', wraps=jsoncodec.dumpb)
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_delete')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_get')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_post')
+    @async_test
+    async def test_ResendSameBody(self, mocked_post, mocked_get, mocked_delete,
+                                  mocked_dumpb, mocked_buildssl):
+        mocked_buildssl.return_value = None
+        mocked_post.side_effect = [('{"message": "exists"}', {}, 409), ('', {}, 201)]
+        mocked_get.return_value = ('{"data": []}', {}, 200)
+        mocked_delete.return_value = ('', {}, 200)
+        payload = JsonPayload(self.endpoints)
+        webapi = WebAPI('topology-gocdb-connector.py', 'api.foo.bar', 'token',
+                        logger, 3, date='2024-01-01')
+        await webapi.send(payload, 'endpoints')
+        self.assertEqual(mocked_post.call_count, 2)
+        first, second = mocked_post.call_args_list
+        self.assertIs(first[1]['data'], second[1]['data'])
+        self.assertIs(first[1]['data'], payload.body)
+        self.assertEqual(first[1]['headers']['Content-Type'], 'application/json')
+        self.assertEqual(mocked_dumpb.call_count, 1)
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_post')
+    @async_test
+    async def test_SkipUnchanged(self, mocked_post, mocked_buildssl):
+        mocked_buildssl.return_value = None
+        mocked_post.return_value = ('', {}, 201)
+        statedir = tempfile.mkdtemp()
+        try:
+            publish_state = PublishState(statedir)
+            for _ in range(2):
+                webapi = WebAPI('topology-gocdb-connector.py', 'api.foo.bar', 'token',
+                                logger, 3, date='2024-01-01', publish_state=publish_state)
+                await webapi.send(JsonPayload(self.endpoints), 'endpoints')
+            self.assertEqual(mocked_post.call_count, 1)
+            self.assertEqual(publish_state.summary(), 'PublishSkipped:1')
+
+            self.endpoints[0]['tags'] = {'monitored': '1'}
+            await webapi.send(JsonPayload(self.endpoints), 'endpoints')
+            self.assertEqual(mocked_post.call_count, 2)
+
+            webapi = WebAPI('topology-gocdb-connector.py', 'api.foo.bar', 'token',
+                            logger, 3, date='2024-01-02', publish_state=publish_state)
+            await webapi.send(JsonPayload(self.endpoints), 'endpoints')
+            self.assertEqual(mocked_post.call_count, 3)
+
+            webapi.publish_state = PublishState(statedir, force=True)
+            await webapi.send(JsonPayload(self.endpoints), 'endpoints')
+            self.assertEqual(mocked_post.call_count, 4)
+            self.assertEqual(publish_state.skipped, 1)
+        finally:
+            shutil.rmtree(statedir)
+
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_delete')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_get')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_post')
+    @async_test
+    async def test_SendBatches(self, mocked_post, mocked_get, mocked_delete,
+                               mocked_buildssl):
+        mocked_buildssl.return_value = None
+        mocked_get.return_value = ('{"data": []}', {}, 200)
+        mocked_delete.return_value = ('', {}, 200)
+        sent, inflight = list(), list()
+        statuses = [409]
+
+        async def post(api, data, headers):
+            inflight.append(1)
+            await asyncio.sleep(0.01)
+            inflight.pop()
+            sent.append((jsoncodec.loads(data), len(inflight)))
+            return ('{"message": "exists"}', {}, statuses.pop(0) if statuses else 201)
+
+        mocked_post.side_effect = post
+        webapi = WebAPI('topology-gocdb-connector.py', 'api.foo.bar', 'token',
+                        logger, 3, date='2024-01-01', batch_size=3, batch_concurrency=2)
+        await webapi.send(JsonPayload(self.endpoints), 'endpoints')
+        self.assertEqual(mocked_post.call_count, 5)
+        self.assertEqual(mocked_delete.call_count, 1)
+        self.assertEqual(sent[0][0], sent[1][0])
+        self.assertEqual([len(batch) for batch, _ in sent[1:]], [3, 3, 3, 1])
+        self.assertEqual([e for batch, _ in sent[1:] for e in batch], self.endpoints)
+        self.assertEqual(max(concurrent for _, concurrent in sent), 1)
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_delete')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_get')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_post')
+    @async_test
+    async def test_DowntimesDeleteOnlyOnConflict(self, mocked_post, mocked_get,
+                                                 mocked_delete, mocked_buildssl):
+        mocked_buildssl.return_value = None
+        mocked_post.return_value = ('', {}, 201)
+        mocked_get.return_value = ('{"data": []}', {}, 200)
+        mocked_delete.return_value = ('', {}, 200)
+        downtimes = [{'hostname': 'host1.foo.bar', 'service': 'foo.service',
+                      'start_time': '2024-01-01T00:00:00Z',
+                      'end_time': '2024-01-01T23:59:00Z'}]
+        webapi = WebAPI('downtimes-gocdb-connector.py', 'api.foo.bar', 'token',
+                        logger, 3, date='2024-01-01')
+        await webapi.send(downtimes, downtimes_component=True)
+        self.assertEqual(mocked_post.call_count, 1)
+        self.assertEqual(mocked_delete.call_count, 0)
+
+        mocked_post.side_effect = [('{"message": "exists"}', {}, 409), ('', {}, 201)]
+        webapi = WebAPI('downtimes-gocdb-connector.py', 'api.foo.bar', 'token',
+                        logger, 3, date='2024-01-01')
+        await webapi.send(downtimes, downtimes_component=True)
+        self.assertEqual(mocked_post.call_count, 3)
+        self.assertEqual(mocked_delete.call_count, 1)
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_post')
+    @async_test
+    async def test_SendBatchesFailed(self, mocked_post, mocked_buildssl):
+        mocked_buildssl.return_value = None
+        mocked_post.side_effect = [('', {}, 201), ('', {}, 201),
+                                   ConnectorHttpError(), ('', {}, 201)]
+        statedir = tempfile.mkdtemp()
+        try:
+            publish_state = PublishState(statedir)
+            webapi = WebAPI('topology-gocdb-connector.py', 'api.foo.bar', 'token',
+                            logger, 3, date='2024-01-01', publish_state=publish_state,
+                            batch_size=3, batch_concurrency=1)
+            with self.assertLogs(logger.logger, level='ERROR') as log:
+                await webapi.send(JsonPayload(self.endpoints), 'endpoints')
+            self.assertEqual(mocked_post.call_count, 4)
+            self.assertTrue(any('Batch 3/4 failed' in msg for msg in log.output))
+            self.assertTrue(any('Failed sent of data to WEB-API' in msg for msg in log.output))
+            self.assertEqual(os.listdir(statedir), [])
+        finally:
+            shutil.rmtree(statedir)
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_post')
+    @async_test
+    async def test_CompressedBody(self, mocked_post, mocked_buildssl):
+        mocked_buildssl.return_value = None
+        mocked_post.side_effect = [('', {}, 201),
+                                   ('{"message": "unsupported"}', {}, 415), ('', {}, 201),
+                                   ('', {}, 201)]
+        payload = JsonPayload(self.endpoints)
+        webapi = WebAPI('topology-gocdb-connector.py', 'api.foo.bar', 'token',
+                        logger, 3, date='2024-01-01', compress=True)
+        with self.assertLogs(logger.logger, level='INFO') as log:
+            await webapi.send(payload, 'endpoints')
+        first = mocked_post.call_args_list[0][1]
+        self.assertEqual(first['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(first['data']), payload.body)
+        self.assertTrue(any('compressed from {} to {} bytes'.format(len(payload.body), len(first['data'])) in msg
+                            for msg in log.output))
+
+        webapi = WebAPI('topology-gocdb-connector.py', 'api.foo.bar', 'token',
+                        logger, 3, date='2024-01-01', compress=True)
+        await webapi.send(payload, 'endpoints')
+        rejected, plain = mocked_post.call_args_list[1:3]
+        self.assertIs(rejected[1]['data'], first['data'])
+        self.assertIs(plain[1]['data'], payload.body)
+        self.assertNotIn('Content-Encoding', plain[1]['headers'])
+        self.assertFalse(webapi.compress)
+
+        await webapi.send(payload, 'endpoints')
+        self.assertIs(mocked_post.call_args_list[3][1]['data'], payload.body)
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_put')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_get')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_post')
+    @async_test
+    async def test_UpdateCachedId(self, mocked_post, mocked_get, mocked_put,
+                                  mocked_buildssl):
+        mocked_buildssl.return_value = None
+        mocked_post.return_value = ('{"errors": [{"details": "exists"}]}', {}, 409)
+        mocked_get.return_value = ('{"data": [{"id": "id-critical", "name": "Critical"},'
+                                   ' {"id": "id-other", "name": "Other"}]}', {}, 200)
+        mocked_put.return_value = ('', {}, 200)
+        weights = [{'type': 'hepspec', 'site': 'SITE1', 'weight': '10'}]
+        logger.job = 'Critical'
+        statedir = tempfile.mkdtemp()
+        try:
+            for _ in range(2):
+                webapi = WebAPI('weights-vapor-connector.py', 'api.foo.bar', 'token',
+                                logger, 3, report='Critical', endpoints_group='SITES',
+                                date='2024-01-01', resource_ids=ResourceIds(statedir))
+                await webapi.send(weights)
+            self.assertEqual(mocked_get.call_count, 1)
+            self.assertEqual(mocked_put.call_count, 2)
+            self.assertTrue(all('/weights/id-critical?' in call[0][0]
+                                for call in mocked_put.call_args_list))
+
+            mocked_get.return_value = ('{"data": [{"id": "id-new", "name": "Critical"}]}', {}, 200)
+            mocked_put.side_effect = [None, ('', {}, 200)]
+            webapi = WebAPI('weights-vapor-connector.py', 'api.foo.bar', 'token',
+                            logger, 3, report='Critical', endpoints_group='SITES',
+                            date='2024-01-01', resource_ids=ResourceIds(statedir))
+            await webapi.send(weights)
+            self.assertEqual(mocked_get.call_count, 2)
+            self.assertIn('/weights/id-new?', mocked_put.call_args_list[-1][0][0])
+            self.assertEqual(await ResourceIds(statedir).get('api.foo.bar', CUSTOMER_NAME,
+                                                             'weights', 'Critical'), 'id-new')
+        finally:
+            del logger.job
+            shutil.rmtree(statedir)
+
+    @mock.patch('argo_connectors.io.http.build_ssl_settings')
+    @mock.patch('argo_connectors.io.http.SessionRegistry.close')
+    @mock.patch('argo_connectors.io.http.SessionWithRetry.http_post')
+    @async_test
+    async def test_SendMany(self, mocked_post, mocked_close, mocked_buildssl):
+        mocked_buildssl.return_value = None
+        mocked_post.return_value = ('', {}, 201)
+        groups = [{'group': 'NGI', 'type': 'NGIS', 'subgroup': 'SITE1', 'tags': {}}]
+        webapi = WebAPI('topology-gocdb-connector.py', 'api.foo.bar', 'token',
+                        logger, 3, date='2024-01-01')
+        await webapi.send_many([(groups, 'groups'), (JsonPayload(self.endpoints), 'endpoints')])
+        self.assertEqual(sorted(call[0][0] for call in mocked_post.call_args_list),
+                         ['https://api.foo.bar/api/v2/topology/endpoints?date=2024-01-01',
+                          'https://api.foo.bar/api/v2/topology/groups?date=2024-01-01'])
+        self.assertIs(webapi.session.registry, webapi.registry)
+        self.assertEqual(mocked_close.call_count, 1)
+
+        await webapi.send(groups, 'groups')
+        self.assertEqual(mocked_post.call_count, 3)
+        self.assertEqual(mocked_close.call_count, 2)
+
+        registry = SessionRegistry(dict())
+        webapi = WebAPI('topology-gocdb-connector.py', 'api.foo.bar', 'token',
+                        logger, 3, date='2024-01-01', registry=registry)
+        await webapi.send_many([(groups, 'groups'), (self.endpoints, 'endpoints')])
+        self.assertIs(webapi.session.registry, registry)
+        self.assertEqual(mocked_close.call_count, 2)
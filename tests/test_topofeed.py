@@ -1,12 +1,16 @@
 import unittest
 
 from argo_connectors.log import Logger
+from argo_connectors.parse.base import ParseHelpers
 from argo_connectors.parse.gocdb_topology import ParseServiceGroups, ParseServiceEndpoints, ParseSites
 from argo_connectors.parse.flat_topology import ParseFlatEndpoints
 from argo_connectors.parse.provider_topology import ParseTopo, ParseExtensions, buildmap_id2groupname
 from argo_connectors.parse.agora_topology import ParseAgoraTopo
 from argo_connectors.exceptions import ConnectorParseError
-from argo_connectors.mesh.contacts import attach_contacts_topodata
+from argo_connectors.mesh.contacts import attach_contacts_topodata, ContactsIndex, ContactsEnricher
+from argo_connectors.mesh.enrichment import EnrichmentPipeline
+from argo_connectors.mesh.srm_port import SrmPortEnricher
+from argo_connectors.tasks.workers import PackedEntities
 
 logger = Logger('test_topofeed.py')
 CUSTOMER_NAME = 'CUSTOMERFOO'
@@ -72,6 +76,28 @@ class ParseServiceEndpointsTest(unittest.TestCase):
             }
         )
 
+    def test_PaginatedEndpoints(self):
+        last_page = '<?xml version="1.0" encoding="UTF-8"?>\n<results><meta><count>0</count></meta></results>'
+        pages = [self.content.encode('utf-8'), last_page.encode('utf-8')]
+        parse_service_endpoints = ParseServiceEndpoints(logger, pages, CUSTOMER_NAME)
+        self.assertEqual(parse_service_endpoints.get_group_endpoints(), self.group_endpoints)
+
+    def test_StreamedChunks(self):
+        content = self.content.encode('utf-8')
+        chunks = [content[i:i + 128] for i in range(0, len(content), 128)]
+        parse_service_endpoints = ParseServiceEndpoints(logger, [chunks], CUSTOMER_NAME)
+        self.assertEqual(parse_service_endpoints.get_group_endpoints(), self.group_endpoints)
+
+    def test_StreamedElementsReleased(self):
+        consumed = list()
+        for element in ParseHelpers(logger).iterparse_xml_pages(self.content, 'SERVICE_ENDPOINT'):
+            previous = element.getprevious()
+            self.assertTrue(previous is None or len(previous) == 0)
+            self.assertIsNone(previous.getprevious() if previous is not None else None)
+            consumed.append(element)
+        self.assertEqual(len(consumed), 4)
+        self.assertTrue(all(len(element) == 0 for element in consumed))
+
     def test_HaveExtensions(self):
         # Assert pass_extensions=False is working
         self.assertFalse(endpoints_have_extension(self.group_endpoints))
@@ -446,6 +472,111 @@ class MeshServiceEndpointsAndContacts(unittest.TestCase):
         )
 
 
+class MeshContactsIndex(unittest.TestCase):
+    def setUp(self):
+        logger.customer = CUSTOMER_NAME
+        self.contacts = {
+            'SITE1': [{'email': 'name1@email.com'}, {'email': 'name1@email.com'},
+                      {'email': 'name2@email.com;name3@email.com'},
+                      {'email': 'noemail'}],
+            'GROUP1': ['name4@email.com,name5@email.com', 'name4@email.com,name5@email.com'],
+            'fqdn1.com+1234': ['name6@email.com'],
+            'fqdn2.com+service2': ['name7@email.com']
+        }
+
+    def test_GroupEmailsNormalized(self):
+        index = ContactsIndex(self.contacts)
+        self.assertEqual(index.group_emails('SITE1'),
+                         ('name1@email.com', 'name2@email.com', 'name3@email.com'))
+        self.assertEqual(index.group_emails('GROUP1'),
+                         ('name4@email.com', 'name5@email.com'))
+        self.assertIs(index.group_emails('SITE1'), index.group_emails('SITE1'))
+        self.assertEqual(index.group_emails('SITE2'), tuple())
+
+    def test_SharedIndex(self):
+        index = ContactsIndex(self.contacts)
+        group_groups = [
+            {'group': 'NGI1', 'subgroup': 'SITE1', 'type': 'NGI'},
+            {'group': 'NGI2', 'subgroup': 'SITE1', 'type': 'NGI'},
+            {'group': 'NGI2', 'subgroup': 'SITE2', 'type': 'NGI'}
+        ]
+        group_endpoints = [
+            {'group': 'SITE1', 'hostname': 'fqdn1.com_1234', 'service': 'service1'},
+            {'group': 'SITE2', 'hostname': 'fqdn2.com', 'service': 'service2'},
+            {'group': 'SITE2', 'hostname': 'fqdn3.com', 'service': 'service3'}
+        ]
+        attach_contacts_topodata(logger, index, group_groups)
+        attach_contacts_topodata(logger, index, group_endpoints)
+        self.assertEqual(group_groups[1]['notifications'],
+                         {'contacts': ['name1@email.com', 'name2@email.com', 'name3@email.com'],
+                          'enabled': True})
+        self.assertNotIn('notifications', group_groups[2])
+        self.assertEqual(group_endpoints[0]['notifications']['contacts'], ['name6@email.com'])
+        self.assertEqual(group_endpoints[1]['notifications']['contacts'], ['name7@email.com'])
+        self.assertNotIn('notifications', group_endpoints[2])
+
+    def test_EndpointKeys(self):
+        index = ContactsIndex({
+            'fqdn1.com+CE': ['ce@email.com'],
+            'fqdn1.com+SRM': ['srm@email.com'],
+            'fqdn2.com+99': ['uid@email.com'],
+            'fqdn3.com_7+CE': ['flatuid@email.com']
+        })
+        self.assertEqual(index.endpoint_contacts({'hostname': 'fqdn1.com', 'service': 'CE'}),
+                         ['ce@email.com'])
+        self.assertEqual(index.endpoint_contacts({'hostname': 'fqdn1.com', 'service': 'SRM'}),
+                         ['srm@email.com'])
+        self.assertIsNone(index.endpoint_contacts({'hostname': 'fqdn1.com', 'service': 'XRootD'}))
+        self.assertEqual(index.endpoint_contacts({'hostname': 'fqdn2.com_99', 'service': 'CE'}),
+                         ['uid@email.com'])
+        self.assertEqual(index.endpoint_contacts({'hostname': 'fqdn3.com_7', 'service': 'CE'}),
+                         ['flatuid@email.com'])
+        self.assertIsNone(index.endpoint_contacts({'hostname': 'fqdn3.com_7', 'service': 'SRM'}))
+
+
+class MeshEnrichmentPipeline(unittest.TestCase):
+    def setUp(self):
+        logger.customer = CUSTOMER_NAME
+        self.group_endpoints = [
+            {'group': 'SITE1', 'hostname': 'srm1.com', 'service': 'SRM',
+             'notifications': {'enabled': False}, 'tags': {'scope': 'EGI'}},
+            {'group': 'SITE1', 'hostname': 'srm2.com', 'service': 'SRM',
+             'tags': {'scope': 'EGI'}},
+            {'group': 'SITE2', 'hostname': 'ce1.com', 'service': 'CE',
+             'notifications': {'enabled': True}, 'tags': {'scope': 'EGI'}}
+        ]
+        self.contacts = {
+            'srm1.com+SRM': ['name1@email.com'],
+            'srm2.com+SRM': ['name2@email.com'],
+            'ce1.com+CE': ['name3@email.com']
+        }
+        self.ldap = [
+            {'GlueServiceEndpoint': ['httpg://srm1.com:8446/srm/managerv2']},
+            {'GlueServiceEndpoint': ['httpg://srm2.com:8443/srm/managerv2']},
+        ]
+
+    def test_SinglePass(self):
+        pipeline = EnrichmentPipeline(logger)
+        pipeline.register(ContactsEnricher(self.contacts, True))
+        pipeline.register(SrmPortEnricher(logger, 'GlueServiceEndpoint', self.ldap))
+        group_endpoints = pipeline.run(PackedEntities.pack(self.group_endpoints))
+        self.assertEqual(len(group_endpoints), 3)
+        self.assertEqual(group_endpoints[0],
+            {
+                'group': 'SITE1', 'hostname': 'srm1.com', 'service': 'SRM',
+                'notifications': {'contacts': ['name1@email.com'], 'enabled': False},
+                'tags': {'scope': 'EGI', 'info_bdii_SRM2_PORT': '8446'}
+            }
+        )
+        # missing notifications with honored notification flag fails
+        # contacts enricher only, other enrichers are still applied
+        self.assertNotIn('notifications', group_endpoints[1])
+        self.assertEqual(group_endpoints[1]['tags']['info_bdii_SRM2_PORT'], '8443')
+        self.assertEqual(group_endpoints[2]['notifications'],
+                         {'contacts': ['name3@email.com'], 'enabled': True})
+        self.assertNotIn('info_bdii_SRM2_PORT', group_endpoints[2]['tags'])
+
+
 class ParseServiceEndpointsAndServiceGroupsCsv(unittest.TestCase):
     def setUp(self):
         with open('tests/sample-topo.csv') as feed_file:
@@ -526,6 +657,38 @@ class ParseServiceEndpointsAndServiceGroupsCsv(unittest.TestCase):
             ]
         )
 
+    def test_CsvTopologySinglePass(self):
+        topology = ParseFlatEndpoints(logger, self.content, CUSTOMER_NAME,
+                                      uidservendp=True,
+                                      fetchtype='ServiceGroups',
+                                      scope=CUSTOMER_NAME, is_csv=True)
+        group_groups, group_endpoints, contacts = topology.get_topology(with_contacts=True)
+        self.assertEqual(group_groups, self.topology.get_groupgroups())
+        self.assertEqual(group_endpoints, self.topology.get_groupendpoints())
+        self.assertEqual(contacts['sso.tenant.eu_tenant_3+aai'], ['name.surname@country.com'])
+        self.assertEqual(len(contacts), 4)
+
+    def test_CsvTopologyLines(self):
+        topology = ParseFlatEndpoints(logger, iter(self.content.splitlines(True)),
+                                      CUSTOMER_NAME, uidservendp=True,
+                                      fetchtype='ServiceGroups',
+                                      scope=CUSTOMER_NAME, is_csv=True)
+        group_groups, group_endpoints, contacts = topology.get_topology()
+        self.assertEqual(group_endpoints, self.topology.get_groupendpoints())
+        self.assertEqual(contacts, {})
+
+    def test_CsvTopologyRepeated(self):
+        topology = ParseFlatEndpoints(logger, iter(self.content.splitlines(True)),
+                                      CUSTOMER_NAME, uidservendp=True,
+                                      fetchtype='ServiceGroups',
+                                      scope=CUSTOMER_NAME, is_csv=True)
+        first = topology.get_topology(with_contacts=True)
+        second = topology.get_topology(with_contacts=True)
+        self.assertEqual(len(first[1]), 4)
+        self.assertEqual(first, second)
+        self.assertEqual(topology.get_groupgroups(), first[0])
+        self.assertEqual(topology.get_groupendpoints(), first[1])
+
     def test_FailedCsvTopology(self):
         with self.assertRaises(ConnectorParseError) as cm:
             self.failed_topology = ParseFlatEndpoints(logger, 'FAILED_DATA',